@@ -1,12 +1,25 @@
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List, Optional, Any
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional, Any, Tuple
+from datetime import datetime
+from pydantic import BaseModel, computed_field
+import asyncio
+import base64
+import hashlib
+import json
 import uuid
 
-from app.db.session import get_db
+from app.db.session import AsyncSessionLocal, get_async_db
 from app.db.models import Task
-from app.services.orchestrator import orchestrator
+from app.core.config import settings
+from app.providers.refine_cache import refine_cache
+from app.services.batch import batch_service
+from app.services.events import event_bus, is_terminal, task_event
+from app.services.provider_health import provider_health
+from app.services.storage import media_url
+from app.services.task_state import task_states
 
 router = APIRouter()
 
@@ -16,6 +29,10 @@ class GenerateRequest(BaseModel):
     monologue: str = ""       # Default to empty string if missing
     style: str = "cinematic"
     use_paid_voice: bool = False
+    fresh_video: bool = False  # Skip the stored-clip reuse (A/B takes of the same prompt)
+
+class BatchRequest(BaseModel):
+    items: List[GenerateRequest]
 
 # --- OUTPUT SCHEMA (For Gallery) ---
 class TaskSchema(BaseModel):
@@ -24,19 +41,75 @@ class TaskSchema(BaseModel):
     monologue: Optional[str] = None
     style: str  # <--- NEW
     is_paid_voice: bool # <--- NEW
+    audio_provider_used: Optional[str] = None  # Premium jobs may have fallen back to edgetts
     status: str
+    stage: Optional[str] = None
+    progress: Optional[float] = None
     final_output: Optional[str] = None
+    preview_output: Optional[str] = None
+    hls_manifest: Optional[str] = None
+    poster_path: Optional[str] = None
+    animated_preview: Optional[str] = None
+    attempts: Optional[int] = None  # Each attempt rewrites the files; versions the thumbnail URLs
+    duration_seconds: Optional[float] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    bitrate_kbps: Optional[int] = None
+    file_size_bytes: Optional[int] = None
+    has_audio: Optional[bool] = None
+    expired_at: Any = None
+    refine_seconds: Optional[float] = None
+    video_seconds: Optional[float] = None
+    audio_seconds: Optional[float] = None
+    stitch_seconds: Optional[float] = None
+    total_seconds: Optional[float] = None
     created_at: Any = None 
 
     class Config:
         from_attributes = True
 
+    @computed_field
+    @property
+    def expired(self) -> bool:
+        """Outputs were evicted by the storage janitor; metadata and poster remain."""
+        return self.expired_at is not None
+
+    @computed_field
+    @property
+    def video_url(self) -> Optional[str]:
+        return None if self.expired else media_url(self.final_output)
+
+    @computed_field
+    @property
+    def preview_output_url(self) -> Optional[str]:
+        """Fast low-res render, available while the final encode is still running."""
+        return None if self.expired else media_url(self.preview_output)
+
+    @computed_field
+    @property
+    def playback_url(self) -> Optional[str]:
+        """Best source for the player: the HLS ladder when rendered, else the faststart MP4."""
+        if self.expired:
+            return None
+        return media_url(self.hls_manifest) or self.video_url
+
+    @computed_field
+    @property
+    def poster_url(self) -> Optional[str]:
+        return media_url(self.poster_path, settings.THUMB_DIR, "/thumbs", version=self.attempts or 0)
+
+    @computed_field
+    @property
+    def preview_url(self) -> Optional[str]:
+        return media_url(self.animated_preview, settings.THUMB_DIR, "/thumbs", version=self.attempts or 0)
+
 # --- ENDPOINTS ---
 
 @router.post("/generate")
-def create_task(req: GenerateRequest, bg: BackgroundTasks, db: Session = Depends(get_db)):
+async def create_task(req: GenerateRequest, db: AsyncSession = Depends(get_async_db)):
     """
-    Creates a new Task in the DB and starts the Orchestrator.
+    Creates a new Task in the DB. The QUEUED row *is* the job:
+    a worker (python -m app.worker) leases it and runs the Orchestrator.
     """
     task_id = str(uuid.uuid4())
     
@@ -47,41 +120,199 @@ def create_task(req: GenerateRequest, bg: BackgroundTasks, db: Session = Depends
         monologue=req.monologue,  # <--- Saving the monologue
         style=req.style, 
         is_paid_voice=req.use_paid_voice,
+        fresh_video=req.fresh_video,
         status="QUEUED"
     )
     
     try:
         db.add(new_task)
-        db.commit()
-        db.refresh(new_task) # Refresh to get the created_at timestamp
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Database Error: {e}")
 
-    # 2. Start Background Job
-    bg.add_task(orchestrator.process_task, task_id)
-
     return {"task_id": task_id, "status": "QUEUED"}
 
+@router.post("/generate/batch")
+async def create_batch(req: BatchRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Submits many generations in one bulk transaction.
+    Identical items share one task; `task_ids` lines up with `items`.
+    """
+    if not req.items:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if len(req.items) > settings.BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {settings.BATCH_MAX_ITEMS} items")
+
+    try:
+        return await batch_service.submit(db, req.items)
+    except Exception as e:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=f"Database Error: {e}")
+
+@router.get("/batches/{batch_id}")
+async def get_batch(batch_id: str, db: AsyncSession = Depends(get_async_db)):
+    """
+    Aggregated progress of every task in a batch.
+    """
+    summary = await batch_service.status(db, batch_id)
+    if not summary:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return summary
+
+@router.get("/providers")
+async def get_providers(db: AsyncSession = Depends(get_async_db)):
+    """
+    Circuit-breaker state per provider: the worst across API and worker
+    processes, with each process' last transition. "open" means jobs skip
+    that provider (or its fallback takes over) without waiting on it.
+    """
+    return await provider_health.report(db)
+
+def encode_cursor(task: Task) -> str:
+    raw = json.dumps([task.created_at.isoformat(), task.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        created_at, task_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created_at), task_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
 @router.get("/tasks", response_model=List[TaskSchema])
-def list_tasks(skip: int = 0, limit: int = 20, db: Session = Depends(get_db)):
+async def list_tasks(
+    request: Request,
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    status: Optional[List[str]] = Query(None),
+    style: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
     """
-    Returns the history of tasks for the Gallery.
+    Returns the history of tasks for the Gallery, newest first.
+
+    Keyset pagination: pass the `X-Next-Cursor` header of one page as
+    `?cursor=` to get the next, so deep pages cost the same as the first.
+    Filter with `?status=` (repeatable) and `?style=`. Unchanged pages
+    answer `If-None-Match` with 304.
     """
-    tasks = db.query(Task).order_by(Task.created_at.desc()).offset(skip).limit(limit).all()
-    return tasks
+    query = select(Task)
+    if status:
+        query = query.where(Task.status.in_(status))
+    if style:
+        query = query.where(Task.style == style)
+    if cursor:
+        created_at, task_id = decode_cursor(cursor)
+        query = query.where(or_(
+            Task.created_at < created_at,
+            and_(Task.created_at == created_at, Task.id < task_id),
+        ))
+
+    tasks = (await db.execute(query.order_by(Task.created_at.desc(), Task.id.desc()).limit(limit))).scalars().all()
+    next_cursor = encode_cursor(tasks[-1]) if len(tasks) == limit else None
+
+    page = [TaskSchema.model_validate(t).model_dump(mode="json") for t in tasks]
+    etag = '"' + hashlib.sha1(json.dumps([page, next_cursor], sort_keys=True).encode()).hexdigest() + '"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+        headers["Link"] = f'<{request.url.include_query_params(cursor=next_cursor)}>; rel="next"'
+
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return page
 
 @router.get("/tasks/{task_id}")
-def get_status(task_id: str, db: Session = Depends(get_db)):
+async def get_status(task_id: str):
     """
     Returns status of a specific task (used for polling).
+    Served from the task state registry; the database is only read on a miss.
+    """
+    task = task_states.get(task_id)
+    if task is None:
+        async with AsyncSessionLocal() as db:
+            task = await db.get(Task, task_id)
+        if not task:
+            raise HTTPException(status_code=404, detail="Task not found")
+        task_states.remember(task)
+
+    return task_event(task) # final_output: Frontend needs this to show the video
+
+@router.get("/tasks/{task_id}/events")
+async def task_events(task_id: str):
+    """
+    Server-Sent Events stream of stage/progress changes for one task.
+    Sends the current state first and closes after COMPLETED/FAILED.
     """
-    task = db.query(Task).filter(Task.id == task_id).first()
+    # Short-lived session: don't hold a connection for the lifetime of the stream
+    async with AsyncSessionLocal() as db:
+        task = await db.get(Task, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    
-    return {
-        "id": task.id,
-        "status": task.status,
-        "final_output": task.final_output # Frontend needs this to show the video
-    }
\ No newline at end of file
+    current = task_event(task)
+
+    async def stream():
+        yield f"data: {json.dumps(current)}\n\n"
+        if is_terminal(current["status"]):
+            return
+        with event_bus.subscribe([task_id]) as queue:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=settings.EVENTS_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"data: {json.dumps(event)}\n\n"
+                if is_terminal(event["status"]):
+                    return
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.websocket("/ws/tasks")
+async def tasks_socket(ws: WebSocket):
+    """
+    Multiplexed task events for pages watching many tasks (e.g. the gallery).
+    Client sends {"subscribe": [ids]} / {"unsubscribe": [ids]}; server pushes events.
+    """
+    await ws.accept()
+    queue: asyncio.Queue = asyncio.Queue()
+    watched: set = set()
+
+    async def pump():
+        while True:
+            await ws.send_json(await queue.get())
+
+    sender = asyncio.create_task(pump())
+    try:
+        while True:
+            msg = await ws.receive_json()
+            added = set(msg.get("subscribe", [])) - watched
+            removed = set(msg.get("unsubscribe", [])) & watched
+            event_bus.remove(queue, removed)
+            event_bus.add(queue, added)
+            watched = (watched | added) - removed
+    except (WebSocketDisconnect, ValueError):
+        pass
+    finally:
+        sender.cancel()
+        event_bus.remove(queue, watched)
+
+# --- ADMIN ---
+
+@router.delete("/admin/cache/refine")
+async def invalidate_refine_cache(prompt: Optional[str] = None, style: Optional[str] = None):
+    """
+    Invalidates cached Gemini refinements: one prompt (every style, or only
+    `style`), or everything.
+    Workers drop their in-memory copies within REFINE_CACHE_MEMORY_TTL_SECONDS.
+    """
+    deleted = await refine_cache.invalidate(prompt, style)
+    return {"invalidated": deleted}
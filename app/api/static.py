@@ -0,0 +1,41 @@
+import asyncio
+from pathlib import Path
+from urllib.parse import parse_qs
+from fastapi.staticfiles import StaticFiles
+from app.core.config import settings
+from app.services.storage import touch
+
+class ImmutableStaticFiles(StaticFiles):
+    """
+    Per-task posters/previews. A retry rewrites them under the same name, so
+    only versioned URLs (?v=..., see TaskSchema) are cached as immutable;
+    bare URLs are revalidated (cheap 304s via ETag/Last-Modified).
+    """
+
+    async def get_response(self, path, scope):
+        response = await super().get_response(path, scope)
+        if response.status_code == 200:
+            if "v" in parse_qs(scope.get("query_string", b"").decode("latin-1")):
+                response.headers["Cache-Control"] = f"public, max-age={settings.THUMB_CACHE_MAX_AGE}, immutable"
+            else:
+                response.headers["Cache-Control"] = "no-cache"
+        return response
+
+class TrackedStaticFiles(StaticFiles):
+    """
+    Generated videos. Opening an MP4 or an HLS playlist records a view
+    (atime), which the storage janitor uses for LRU eviction. Segments are
+    not tracked: the playlist request already counted. Files are named by
+    task id and rewritten by retries (and the fast preview), so browsers
+    always revalidate.
+    """
+
+    async def get_response(self, path, scope):
+        response = await super().get_response(path, scope)
+        if response.status_code in (200, 206):
+            response.headers["Cache-Control"] = "no-cache"
+        if response.status_code in (200, 206) and path.endswith((".mp4", ".m3u8")):
+            full_path, _ = await asyncio.to_thread(self.lookup_path, path)
+            if full_path:
+                await asyncio.to_thread(touch, Path(full_path))
+        return response
@@ -0,0 +1,132 @@
+"""
+Prometheus instrumentation, exposed on GET /metrics.
+
+With separate worker processes (python -m app.worker), point
+METRICS_MULTIPROC_DIR at a shared, initially empty directory so the API
+process reports the sum of every worker. It must be set before
+prometheus_client is imported, hence the env dance below.
+"""
+import asyncio
+import os
+import time
+from app.core.config import settings
+
+if settings.METRICS_MULTIPROC_DIR:
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", str(settings.METRICS_MULTIPROC_DIR))
+    settings.METRICS_MULTIPROC_DIR.mkdir(parents=True, exist_ok=True)
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+
+# Seconds, from a cached TTS hit up to a long Veo render
+_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+STAGE_SECONDS = Histogram(
+    "foundry_stage_seconds", "Wall time of one pipeline stage",
+    ["stage"], buckets=_BUCKETS,
+)
+TASK_SECONDS = Histogram(
+    "foundry_task_seconds", "Wall time of a whole task",
+    ["outcome"], buckets=_BUCKETS,
+)
+VEO_WAIT_SECONDS = Histogram(
+    "foundry_veo_wait_seconds", "Time spent polling a Veo operation until done",
+    buckets=_BUCKETS,
+)
+VEO_POLLS = Counter(
+    "foundry_veo_polls_total", "Veo operation status calls by result",
+    ["result"],
+)
+VEO_PENDING = Gauge(
+    "foundry_veo_pending_operations", "Veo operations tracked by the shared poller",
+    multiprocess_mode="livesum",
+)
+PROVIDER_CALLS = Counter(
+    "foundry_provider_calls_total", "Guarded provider calls by result (ok, retry, error, short_circuit)",
+    ["provider", "result"],
+)
+BREAKER_OPEN = Gauge(
+    "foundry_provider_breaker_open", "1 while a provider's circuit breaker is open in some process",
+    ["provider"], multiprocess_mode="max",
+)
+CLIP_REUSE = Counter(
+    "foundry_clip_reuse_total", "Video generations by how the raw clip was obtained",
+    ["result"],  # rendered, hit (stored clip), coalesced (same process), attached (another worker's render)
+)
+TTS_SECONDS = Histogram(
+    "foundry_tts_seconds", "Speech synthesis time per script",
+    ["provider", "path"], buckets=_BUCKETS,
+)
+TTS_HEDGES = Counter(
+    "foundry_tts_hedges_total", "Hedged premium TTS requests by the provider whose track was used",
+    ["winner"],
+)
+CACHE_LOOKUPS = Counter(
+    "foundry_cache_lookups_total", "Cache reads by result",
+    ["cache", "result"],  # cache: refine, audio, clip; result: hit, miss
+)
+CACHE_EVICTIONS = Counter(
+    "foundry_cache_evictions_total", "Entries dropped to keep an on-disk cache within its budget",
+    ["cache"],
+)
+TASK_STATE_READS = Counter(
+    "foundry_task_state_reads_total", "Task status reads served by the task state registry",
+    ["result"],  # hit, miss (database read), stale (expired record, database read)
+)
+DB_COMMIT_SECONDS = Histogram(
+    "foundry_db_commit_seconds", "Orchestrator commit latency",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5),
+)
+IN_FLIGHT = Gauge(
+    "foundry_stage_in_flight", "Jobs currently inside a stage",
+    ["stage"], multiprocess_mode="livesum",
+)
+QUEUE_DEPTH = Gauge(
+    "foundry_queue_depth", "QUEUED tasks waiting for a worker",
+    multiprocess_mode="max",
+)
+LOOP_LAG_SECONDS = Histogram(
+    "foundry_event_loop_lag_seconds", "How late the event loop woke a sampling timer",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+TASK_FAILURES = Counter(
+    "foundry_task_failures_total", "Failed tasks by the stage they died in and error type",
+    ["stage", "error"],
+)
+
+class Timer:
+    """Observes the elapsed seconds of a `with` block into a histogram and keeps them in `.elapsed`."""
+
+    def __init__(self, histogram, **labels):
+        self.metric = histogram.labels(**labels) if labels else histogram
+        self.elapsed = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self._start
+        self.metric.observe(self.elapsed)
+        return False
+
+async def watch_loop_lag(interval: float = 0.25):
+    """Samples event-loop responsiveness until cancelled. Anything blocking the loop shows up here."""
+    loop = asyncio.get_running_loop()
+    while True:
+        start = loop.time()
+        await asyncio.sleep(interval)
+        LOOP_LAG_SECONDS.observe(max(0.0, loop.time() - start - interval))
+
+def render() -> tuple:
+    """(body, content type) for the /metrics response."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+def mark_process_dead(pid: int):
+    """Drops a finished worker's live gauges from the shared directory."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(pid)
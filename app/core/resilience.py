@@ -0,0 +1,267 @@
+"""
+Shared resilience layer for outbound provider calls (Gemini/Veo, ElevenLabs,
+EdgeTTS).
+
+Each provider gets one ProviderGuard per process that combines:
+  - a token bucket (sustained calls/second with a burst allowance)
+  - bounded concurrency
+  - retries with exponential backoff and full jitter for transient errors
+  - a circuit breaker: after repeated failures, or one "hard" failure such as
+    401/402, calls fail instantly with CircuitOpenError until a cool-down
+    passes and a single trial call succeeds
+
+    result = await guard("elevenlabs").call(lambda: synth(text, path))
+
+Callers that have a fallback check `guard(name).available` first and skip
+straight to it while the breaker is open. Their guards also never retry a
+timeout (see _FALLBACK): falling back is faster than waiting out another one.
+"""
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from app.core.config import settings
+from app.core.metrics import BREAKER_OPEN, PROVIDER_CALLS
+
+logger = logging.getLogger("Foundry.Resilience")
+
+TRANSIENT_STATUS = {408, 425, 429, 500, 502, 503, 504}
+REJECTED_STATUS = {429, 503}   # Request never started; safe to retry even when not idempotent
+HARD_STATUS = {401, 402, 403}  # Credentials / credits: retrying won't help, open the breaker now
+TRANSIENT_ERRORS = {
+    "TransportError", "TimeoutException",                  # httpx
+    "ClientConnectionError", "ServerTimeoutError", "WSServerHandshakeError",  # aiohttp (edge_tts)
+    "ConnectionClosed", "InvalidHandshake",                # websockets
+}
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose breaker is open."""
+
+class ProviderHTTPError(Exception):
+    """A provider answered with a non-success status."""
+
+    def __init__(self, status: int, detail: str = ""):
+        super().__init__(f"HTTP {status}: {detail[:200]}" if detail else f"HTTP {status}")
+        self.status = status
+
+def status_of(error: BaseException) -> Optional[int]:
+    """HTTP status carried by an SDK/httpx error, if any."""
+    for attr in ("status", "code", "status_code"):
+        value = getattr(error, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(error, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+TIMEOUT_ERRORS = {"TimeoutException", "ServerTimeoutError"}  # httpx, aiohttp
+
+def is_timeout(error: BaseException) -> bool:
+    if status_of(error) == 408 or isinstance(error, asyncio.TimeoutError):
+        return True
+    return bool(TIMEOUT_ERRORS & {cls.__name__ for cls in type(error).__mro__})
+
+def is_transient(error: BaseException, idempotent: bool = True) -> bool:
+    status = status_of(error)
+    if status is not None:
+        return status in (TRANSIENT_STATUS if idempotent else REJECTED_STATUS)
+    if not idempotent:
+        return False
+    # Timeouts and dropped connections (asyncio, httpx, aiohttp, websockets)
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    return bool(TRANSIENT_ERRORS & {cls.__name__ for cls in type(error).__mro__})
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `burst`. acquire() waits for a token."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        if self.rate <= 0:
+            return  # Unlimited
+        async with self._lock:  # FIFO: waiters are served in arrival order
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class CircuitBreaker:
+    """closed -> open after `threshold` consecutive failures -> half_open after `reset_seconds` -> closed on success."""
+
+    def __init__(self, name: str, threshold: int, reset_seconds: float):
+        self.name = name
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.last_error: Optional[str] = None
+        self._trial = False
+        self.listeners: List[Callable[["CircuitBreaker"], None]] = []
+
+    @property
+    def retry_at(self) -> Optional[float]:
+        """Wall-clock time the breaker lets a trial call through (open only)."""
+        if self.state != "open":
+            return None
+        return time.time() + max(0.0, self.opened_at + self.reset_seconds - time.monotonic())
+
+    def allow(self) -> bool:
+        if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self._transition("half_open")
+        if self.state == "half_open":
+            if self._trial:
+                return False  # One probe at a time
+            self._trial = True
+            return True
+        return self.state == "closed"
+
+    def success(self):
+        self._trial = False
+        self.failures = 0
+        if self.state != "closed":
+            self._transition("closed")
+
+    def failure(self, error: BaseException, hard: bool = False):
+        self._trial = False
+        self.failures += 1
+        self.last_error = f"{type(error).__name__}: {error}"[:300]
+        if self.state == "half_open" or hard or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+            if self.state != "open":
+                self._transition("open")
+
+    def release(self):
+        """A half-open probe ended without a verdict (e.g. cancelled)."""
+        self._trial = False
+
+    def _transition(self, state: str):
+        self.state = state
+        BREAKER_OPEN.labels(provider=self.name).set(1 if state == "open" else 0)
+        log = logger.warning if state == "open" else logger.info
+        log(f"⚡ {self.name} circuit {state}" + (f" ({self.last_error})" if state == "open" else ""))
+        for listener in self.listeners:
+            try:
+                listener(self)
+            except Exception as e:
+                logger.warning(f"⚠️ Breaker listener failed: {e}")
+
+    def snapshot(self) -> dict:
+        return {
+            "state": self.state, "failures": self.failures,
+            "last_error": self.last_error, "retry_at": self.retry_at,
+        }
+
+@dataclass
+class RetryPolicy:
+    attempts: int = 3
+    base_seconds: float = 0.5
+    max_seconds: float = 8.0
+
+    def delay(self, attempt: int) -> float:
+        """Full jitter: uniform(0, min(max, base * 2^attempt))."""
+        return random.uniform(0, min(self.max_seconds, self.base_seconds * 2 ** attempt))
+
+class ProviderGuard:
+    def __init__(self, name: str, rate: float, burst: int, concurrency: int,
+                 retry: RetryPolicy, breaker: CircuitBreaker, retry_timeouts: bool = True):
+        self.name = name
+        self.retry_timeouts = retry_timeouts
+        self.bucket = TokenBucket(rate, burst)
+        self.limit = asyncio.Semaphore(max(1, concurrency))
+        self.retry = retry
+        self.breaker = breaker
+
+    @property
+    def available(self) -> bool:
+        """False while the breaker is open (cheap; does not claim the half-open probe)."""
+        if self.breaker.state != "open":
+            return True
+        return time.monotonic() - self.breaker.opened_at >= self.breaker.reset_seconds
+
+    async def call(self, fn: Callable[[], Awaitable[Any]], idempotent: bool = True) -> Any:
+        """
+        Runs `fn()` under the rate limit, concurrency cap and breaker, retrying
+        transient failures. Non-idempotent calls are only retried when the
+        provider clearly rejected them (429/503); timeouts only when
+        `retry_timeouts`.
+        """
+        attempt = 0
+        while True:
+            if not self.breaker.allow():
+                PROVIDER_CALLS.labels(provider=self.name, result="short_circuit").inc()
+                raise CircuitOpenError(f"{self.name} circuit open ({self.breaker.last_error})")
+            try:
+                await self.bucket.acquire()
+                async with self.limit:
+                    result = await fn()
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except Exception as e:
+                status = status_of(e)
+                transient = is_transient(e, idempotent) and (self.retry_timeouts or not is_timeout(e))
+                counts = transient or status is None or status >= 500 or status in HARD_STATUS
+                if counts:  # 4xx other than auth/credits is the caller's fault, not the provider's
+                    self.breaker.failure(e, hard=status in HARD_STATUS)
+                else:
+                    self.breaker.release()
+                if not transient or attempt + 1 >= self.retry.attempts or self.breaker.state == "open":
+                    PROVIDER_CALLS.labels(provider=self.name, result="error").inc()
+                    raise
+                PROVIDER_CALLS.labels(provider=self.name, result="retry").inc()
+                delay = self.retry.delay(attempt)
+                logger.info(f"🔁 {self.name}: {e!r}, retry {attempt + 1}/{self.retry.attempts - 1} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+                attempt += 1
+                continue
+            self.breaker.success()
+            PROVIDER_CALLS.labels(provider=self.name, result="ok").inc()
+            return result
+
+# (rate/s, burst, concurrency) per provider; read lazily so env overrides apply
+_LIMITS: Dict[str, Callable[[], tuple]] = {
+    "genai": lambda: (settings.GENAI_RATE_PER_SECOND, settings.GENAI_BURST, settings.GENAI_MAX_CONCURRENCY),
+    "elevenlabs": lambda: (settings.ELEVENLABS_RATE_PER_SECOND, settings.ELEVENLABS_BURST, settings.ELEVENLABS_MAX_PARALLEL),
+    "edgetts": lambda: (settings.EDGETTS_RATE_PER_SECOND, settings.EDGETTS_BURST, settings.EDGETTS_MAX_PARALLEL),
+}
+
+# Callers fall back to another provider, so a timeout is handed to them at once
+_FALLBACK = {"elevenlabs"}
+
+_guards: Dict[str, ProviderGuard] = {}
+_listeners: List[Callable[[CircuitBreaker], None]] = []
+
+def guard(name: str) -> ProviderGuard:
+    """The process-wide guard for `name`, created on first use."""
+    existing = _guards.get(name)
+    if existing is None:
+        rate, burst, concurrency = _LIMITS[name]()
+        breaker = CircuitBreaker(name, settings.BREAKER_FAILURE_THRESHOLD, settings.BREAKER_RESET_SECONDS)
+        breaker.listeners.extend(_listeners)
+        retry = RetryPolicy(settings.RETRY_ATTEMPTS, settings.RETRY_BASE_SECONDS, settings.RETRY_MAX_SECONDS)
+        existing = _guards[name] = ProviderGuard(
+            name, rate, burst, concurrency, retry, breaker, retry_timeouts=name not in _FALLBACK,
+        )
+    return existing
+
+def on_breaker_change(listener: Callable[[CircuitBreaker], None]):
+    """Registers `listener(breaker)` for every state change of every provider's breaker."""
+    _listeners.append(listener)
+    for g in _guards.values():
+        g.breaker.listeners.append(listener)
+
+def breaker_states() -> Dict[str, dict]:
+    return {name: guard(name).breaker.snapshot() for name in _LIMITS}
@@ -1,9 +1,59 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.sql.elements import TextClause
 from app.db.session import engine, Base
 from app.db import models
 
+def default_sql(column) -> str:
+    """SQL for a column's server_default: a plain string, text(), or an expression such as func.now()."""
+    arg = column.server_default.arg
+    if isinstance(arg, str):
+        return "'" + arg.replace("'", "''") + "'"
+    if isinstance(arg, TextClause):
+        return arg.text
+    return f"({arg.compile(dialect=engine.dialect, compile_kwargs={'literal_binds': True})})"
+
+def upgrade_schema():
+    """
+    create_all() only creates missing tables, so an existing app.db never
+    picks up columns/indexes added later. Add them in place.
+    """
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing = {col["name"] for col in inspector.get_columns(table.name)}
+        with engine.begin() as conn:
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=engine.dialect)}"
+                if column.server_default is not None:
+                    ddl += f" DEFAULT {default_sql(column)}"
+                conn.execute(text(ddl))
+
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+def normalize_timestamps():
+    """
+    Rows written by SQLite's CURRENT_TIMESTAMP lack the microseconds that
+    SQLAlchemy stores, which breaks exact (created_at, id) cursor comparisons.
+    Pad them once to the same fixed-width format.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+    with engine.begin() as conn:
+        conn.execute(text(
+            "UPDATE tasks SET created_at = created_at || '.000000' "
+            "WHERE created_at IS NOT NULL AND length(created_at) = 19"
+        ))
+
 def init_db():
     Base.metadata.create_all(bind=engine)
+    upgrade_schema()
+    normalize_timestamps()
     print("✅ Database Tables Created.")
 
 if __name__ == "__main__":
-    init_db()
\ No newline at end of file
+    init_db()
@@ -1,9 +1,19 @@
-from sqlalchemy import Column, String, Integer, Boolean, DateTime
+from datetime import datetime, timezone
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, Float, Index, text
 from sqlalchemy.sql import func
 from app.db.session import Base
 
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Keyset pagination for the gallery: ORDER BY created_at DESC, id DESC (+ filters)
+        Index("ix_tasks_created_at_id", "created_at", "id"),
+        Index("ix_tasks_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_tasks_style_created_at_id", "style", "created_at", "id"),
+    )
 
     id = Column(String, primary_key=True, index=True)
     
@@ -12,14 +22,70 @@ class Task(Base):
     monologue = Column(String, nullable=True)  # <--- Ensure this exists
     style = Column(String, default="cinematic")
     is_paid_voice = Column(Boolean, default=False)
+    fresh_video = Column(Boolean, default=False)  # Render even if an identical clip is stored
+    batch_id = Column(String, nullable=True, index=True)  # Set for POST /generate/batch submissions
     
     # Process Status
     status = Column(String, default="QUEUED")  # QUEUED, PROCESSING, COMPLETED, FAILED
+    stage = Column(String, default="QUEUED")    # Pipeline stage, see app.services.events.STAGES
+    progress = Column(Float, default=0.0)       # 0-100
+    
+    # Queue Lease (owned by app.services.queue)
+    attempts = Column(Integer, default=0, server_default=text("0"))
+    worker_id = Column(String, nullable=True)          # Worker currently holding the lease
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True)
+    heartbeat_at = Column(DateTime(timezone=True), nullable=True)
     
     # File Artifacts
     video_path = Column(String, nullable=True) # Raw video
+    veo_operation = Column(String, nullable=True)  # In-flight Veo render, resumed after a worker restart
     audio_path = Column(String, nullable=True) # Raw audio
+    audio_provider_used = Column(String, nullable=True)  # elevenlabs, edgetts or mock (premium jobs may fall back)
     final_output = Column(String, nullable=True) # Stitched Result
+    hls_manifest = Column(String, nullable=True) # HLS master playlist (adaptive playback)
+    preview_output = Column(String, nullable=True)  # Low-res MP4 playable before the final encode finishes
+    poster_path = Column(String, nullable=True)       # JPEG still for the gallery
+    animated_preview = Column(String, nullable=True)  # Short looping WebP/GIF
+
+    # Final media metadata (ffprobe, after stitching)
+    duration_seconds = Column(Float, nullable=True)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    bitrate_kbps = Column(Integer, nullable=True)
+    file_size_bytes = Column(Integer, nullable=True)
+    has_audio = Column(Boolean, nullable=True)
+    expired_at = Column(DateTime(timezone=True), nullable=True)  # Outputs evicted by the storage janitor
+
+    # Stage timings in seconds (video and audio overlap; see app/core/metrics.py)
+    refine_seconds = Column(Float, nullable=True)
+    video_seconds = Column(Float, nullable=True)
+    audio_seconds = Column(Float, nullable=True)
+    stitch_seconds = Column(Float, nullable=True)
+    total_seconds = Column(Float, nullable=True)
     
     # Metadata
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    # Set client-side (microsecond precision) so keyset cursors compare exactly
+    created_at = Column(DateTime(timezone=True), default=utcnow, server_default=func.now())
+
+class RefineCacheEntry(Base):
+    """Persistent tier of the Gemini prompt-refinement cache (app/providers/refine_cache.py)."""
+    __tablename__ = "refine_cache"
+
+    key = Column(String, primary_key=True)  # sha256(normalized prompt, style, model)
+    prompt = Column(String, nullable=False)
+    style = Column(String, nullable=False)
+    model = Column(String, nullable=False)
+    refined = Column(String, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+class ProviderHealth(Base):
+    """Last circuit-breaker transition per provider per process (app/services/provider_health.py)."""
+    __tablename__ = "provider_health"
+
+    provider = Column(String, primary_key=True)
+    process = Column(String, primary_key=True)  # host:pid
+    state = Column(String, nullable=False)       # closed, open, half_open
+    failures = Column(Integer, default=0)
+    last_error = Column(String, nullable=True)
+    retry_at = Column(DateTime(timezone=True), nullable=True)  # Open breakers let a trial call through from here
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
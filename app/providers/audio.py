@@ -1,93 +1,295 @@
-import edge_tts
-import httpx
 import logging
 import asyncio
 import os
+import re
+import textwrap
+import zlib
 from pathlib import Path
+from typing import List, Optional
 from app.core.config import settings
+from app.core.metrics import TTS_HEDGES, TTS_SECONDS, Timer
+from app.core.resilience import CircuitOpenError, ProviderHTTPError, guard
+from app.core.singleflight import SingleFlight
+from app.providers.audio_cache import audio_cache
+from app.providers.http_pool import http_pool, write_stream
+from app.providers.registry import providers
+from app.services.media_engine import MediaEngineError, media_engine
 
 logger = logging.getLogger("Foundry.Audio")
 
+def _load_edge_tts():
+    import edge_tts
+    import edge_tts.communicate
+
+    if settings.EDGETTS_WSS_URL:
+        edge_tts.communicate.WSS_URL = settings.EDGETTS_WSS_URL  # Local stand-in (benchmarks/)
+    return edge_tts
+
+providers.register("edgetts", _load_edge_tts, required=lambda: not settings.USE_MOCK_AUDIO)
+
+EDGE_VOICE = "en-US-ChristopherNeural"
+ELEVEN_VOICE_ID = "21m00Tcm4TlvDq8ikWAM"  # 'Rachel' (American, Female, Calm)
+ELEVEN_MODEL = "eleven_monolingual_v1"
+ELEVEN_VOICE_SETTINGS = {"stability": 0.5, "similarity_boost": 0.5}
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+")
+
+def split_script(text: str, max_chars: int) -> List[str]:
+    """
+    Splits a long script into sentence-aligned chunks of at most `max_chars`.
+    Besides filling up, a chunk also ends after an "anchor" sentence (chosen by
+    a hash of its text), so boundaries follow content rather than position:
+    editing one sentence re-renders its own chunk, not everything after it.
+    Scripts that already fit come back untouched as a single chunk.
+    """
+    if len(text) <= max_chars:
+        return [text]
+
+    sentences: List[str] = []
+    for sentence in _SENTENCE_END.split(" ".join(text.split())):
+        sentences += textwrap.wrap(sentence, max_chars)  # Run-on sentences; words past the bound (URLs) are cut
+
+    chunks, current = [], ""
+    for sentence in sentences:
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current} {sentence}".strip()
+        if len(current) >= max_chars // 4 and zlib.crc32(sentence.encode("utf-8")) % 3 == 0:
+            chunks.append(current)
+            current = ""
+    if current:
+        chunks.append(current)
+    return chunks
+
+def _succeeded(job: asyncio.Future) -> bool:
+    return not job.cancelled() and job.exception() is None and bool(job.result())
+
 class AudioProvider:
-    async def generate(self, text: str, output_path: Path, force_premium: bool = False) -> bool:
+    def __init__(self):
+        self._flight = SingleFlight()
+
+    async def generate(self, text: str, output_path: Path, force_premium: bool = False) -> Optional[str]:
         """
         Smart Audio Generation Strategy:
         1. Check Mock Mode.
         2. If Premium Requested -> Try ElevenLabs.
            -> If ElevenLabs fails (API error or No Key), FALLBACK to EdgeTTS.
+           -> While its circuit breaker is open, go straight to EdgeTTS.
+           -> With TTS_HEDGE_ENABLED, EdgeTTS also starts if ElevenLabs is slow.
         3. If Free Requested (or Fallback active) -> Run EdgeTTS.
+        Long scripts are synthesized as parallel sentence chunks, each cached
+        on its own, and joined into one track.
+
+        Returns the provider that produced the track ("elevenlabs", "edgetts",
+        "mock"), or None if none could.
         """
         # 1. Mock Mode
         if settings.USE_MOCK_AUDIO:
             logger.info("🚧 MOCK AUDIO: Generating dummy file.")
             with open(output_path, "wb") as f: f.write(b"mock_bytes")
-            return True
+            return "mock"
 
         if not text or not text.strip():
             logger.warning("⚠️ Audio skipped: No text provided.")
-            return False
+            return None
 
         # 2. Premium Strategy (ElevenLabs)
         if force_premium:
-            if settings.ELEVENLABS_API_KEY:
+            if settings.ELEVENLABS_API_KEY and not guard("elevenlabs").available:
+                logger.warning("⚡ ElevenLabs circuit is open. Going straight to EdgeTTS.")
+            elif settings.ELEVENLABS_API_KEY and settings.TTS_HEDGE_ENABLED:
+                winner = await self._hedged(text, output_path)
+                if winner:
+                    return winner
+                logger.warning("⚠️ No hedged track. Triggering Fail-Safe (EdgeTTS)...")
+            elif settings.ELEVENLABS_API_KEY:
                 logger.info("💎 Attempting ElevenLabs generation...")
-                success = await self._elevenlabs(text, output_path)
-                if success:
-                    return True
+                if await self._premium(text, output_path):
+                    return "elevenlabs"
                 logger.warning("⚠️ ElevenLabs failed. Triggering Fail-Safe (EdgeTTS)...")
             else:
                 logger.warning("⚠️ Premium requested but ELEVENLABS_API_KEY is missing in .env. Falling back to Free.")
 
         # 3. Standard/Fallback Strategy (EdgeTTS)
-        return await self._edgetts(text, output_path)
+        if await self._free(text, output_path, "fallback" if force_premium else "primary"):
+            return "edgetts"
+        return None
 
-    async def _edgetts(self, text: str, path: Path) -> bool:
-        """Helper for Free Audio"""
+    async def _premium(self, text: str, path: Path, shared: bool = True) -> bool:
+        with Timer(TTS_SECONDS, provider="elevenlabs", path="primary"):
+            return await self._synthesize(
+                "elevenlabs", ELEVEN_VOICE_ID,
+                {"model_id": ELEVEN_MODEL, "voice_settings": ELEVEN_VOICE_SETTINGS},
+                text, path, self._elevenlabs, shared,
+            )
+
+    async def _free(self, text: str, path: Path, role: str, shared: bool = True) -> bool:
+        with Timer(TTS_SECONDS, provider="edgetts", path=role):
+            return await self._synthesize("edgetts", EDGE_VOICE, {}, text, path, self._edgetts, shared)
+
+    async def _hedged(self, text: str, output_path: Path) -> Optional[str]:
+        """
+        ElevenLabs first; if it hasn't finished after TTS_HEDGE_AFTER_SECONDS,
+        EdgeTTS starts alongside. Premium wins whenever it succeeds, including up
+        to TTS_HEDGE_GRACE_SECONDS after EdgeTTS is ready; otherwise EdgeTTS does.
+        The loser is cancelled and its partial file removed.
+
+        Both legs bypass the single-flight (shared=False): a shielded shared
+        synthesis would outlive the cancel, keep billing, and write its
+        scratch file after cleanup. They still read and fill the TTS cache.
+        """
+        paths = {
+            "elevenlabs": output_path.with_name(f"{output_path.stem}.elevenlabs{output_path.suffix}"),
+            "edgetts": output_path.with_name(f"{output_path.stem}.edgetts{output_path.suffix}"),
+        }
+        logger.info("💎 Attempting ElevenLabs generation (hedged)...")
+        jobs = {"elevenlabs": asyncio.ensure_future(self._premium(text, paths["elevenlabs"], shared=False))}
+        winner = None
         try:
-            logger.info(f"🎤 EdgeTTS: Generating '{text[:15]}...'")
-            communicate = edge_tts.Communicate(text, "en-US-ChristopherNeural")
-            await communicate.save(str(path))
-            
-            if path.exists() and path.stat().st_size > 0:
-                logger.info(f"✅ EdgeTTS Success ({path.stat().st_size} bytes)")
-                return True
-            logger.error("❌ EdgeTTS file was created but is empty.")
+            done, _ = await asyncio.wait(jobs.values(), timeout=settings.TTS_HEDGE_AFTER_SECONDS)
+            if done:  # Answered before the hedge deadline; the usual fallback rules apply
+                winner = "elevenlabs" if _succeeded(jobs["elevenlabs"]) else None
+                return winner
+
+            logger.info(f"🏁 ElevenLabs slower than {settings.TTS_HEDGE_AFTER_SECONDS:g}s. Hedging with EdgeTTS...")
+            jobs["edgetts"] = asyncio.ensure_future(self._free(text, paths["edgetts"], "hedge", shared=False))
+            pending, grace_until = set(jobs.values()), None
+            loop = asyncio.get_running_loop()
+            while pending and winner != "elevenlabs":
+                timeout = max(0.0, grace_until - loop.time()) if grace_until is not None else None
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break  # Grace window over; keep EdgeTTS
+                if jobs["elevenlabs"] in done and _succeeded(jobs["elevenlabs"]):
+                    winner = "elevenlabs"
+                elif jobs["edgetts"] in done and _succeeded(jobs["edgetts"]):
+                    winner = "edgetts"
+                    grace_until = loop.time() + settings.TTS_HEDGE_GRACE_SECONDS
+            return winner
+        finally:
+            losers = [job for job in jobs.values() if not job.done()]
+            for job in losers:
+                job.cancel()
+            await asyncio.gather(*losers, return_exceptions=True)  # Every leg has stopped writing after this
+            if winner:
+                os.replace(paths[winner], output_path)
+            if "edgetts" in jobs:
+                TTS_HEDGES.labels(winner=winner or "none").inc()
+            for path in paths.values():
+                path.unlink(missing_ok=True)
+
+    async def _synthesize(self, provider: str, voice: str, params: dict, text: str, path: Path, synth,
+                          shared: bool = True) -> bool:
+        """One request for short scripts; bounded parallel chunks + a stream-copy join for long ones."""
+        synth = self._guarded(provider, synth)
+        chunks = split_script(text, settings.TTS_CHUNK_CHARS)
+        if len(chunks) == 1:
+            return await self._cached(provider, voice, params, text, path, synth, shared)
+
+        logger.info(f"🧩 {provider}: synthesizing {len(chunks)} chunks in parallel")
+        parts = [settings.TEMP_DIR / f"{path.stem}.part{i:03d}.mp3" for i in range(len(chunks))]
+        try:
+            results = await asyncio.gather(*(
+                self._cached(provider, voice, params, chunk, part, synth, shared)
+                for chunk, part in zip(chunks, parts)
+            ))
+            if not all(results):
+                logger.error(f"❌ {provider}: {results.count(False)}/{len(chunks)} chunks failed.")
+                return False
+            await media_engine.concat_audio(parts, path)
+            return True
+        except MediaEngineError as e:
+            logger.error(f"❌ Could not join audio chunks: {e}")
             return False
-        except Exception as e:
-            logger.error(f"❌ EdgeTTS Critical Failure: {e}")
+        finally:
+            for part in parts:
+                part.unlink(missing_ok=True)
+
+    def _guarded(self, provider: str, synth):
+        """
+        Runs `synth` under the provider's resilience guard (rate limit, concurrency
+        cap, retries, circuit breaker; see app/core/resilience.py). Failures become False.
+        """
+        async def run(text: str, path: Path) -> bool:
+            try:
+                return await guard(provider).call(lambda: synth(text, path))
+            except CircuitOpenError as e:
+                logger.warning(f"⚡ {provider} skipped: {e}")
+            except Exception as e:
+                logger.error(f"❌ {provider} failed: {e!r}")
             return False
+        return run
+
+    async def _cached(self, provider: str, voice: str, params: dict, text: str, path: Path, synth,
+                      shared: bool = True) -> bool:
+        """
+        Serves `synth(text, path)` from the TTS cache, filling it on a miss.
+        Concurrent `shared` misses for the same key synthesize once; the others
+        copy the result. Unshared misses synthesize on their own, so cancelling
+        the caller cancels the request.
+        """
+        if not settings.AUDIO_CACHE_ENABLED:
+            return await synth(text, path)
+
+        key = audio_cache.key(text, voice, provider, params)
+        if await asyncio.to_thread(audio_cache.fetch, key, path):
+            return True
+
+        if not shared:
+            return await self._synth_and_store(key, text, path, synth)
+        ok = await self._flight.do(key, lambda: self._synth_and_store(key, text, path, synth))
+        if ok and not path.exists():  # Someone else's synthesis; take our copy from the cache
+            ok = await asyncio.to_thread(audio_cache.fetch, key, path)
+        return ok
+
+    async def _synth_and_store(self, key: str, text: str, path: Path, synth) -> bool:
+        ok = await synth(text, path)
+        if ok:
+            try:
+                await asyncio.to_thread(audio_cache.store, key, path)
+            except OSError as e:
+                logger.warning(f"⚠️ Could not cache audio: {e}")
+        return ok
+
+    async def _edgetts(self, text: str, path: Path) -> bool:
+        """Helper for Free Audio. Raises on failure so the guard can retry / count it."""
+        edge_tts = providers.get("edgetts")
+        if edge_tts is None:
+            raise RuntimeError("edge_tts is not available")
+        logger.info(f"🎤 EdgeTTS: Generating '{text[:15]}...'")
+        communicate = edge_tts.Communicate(text, EDGE_VOICE)
+        await communicate.save(str(path))
+
+        if path.exists() and path.stat().st_size > 0:
+            logger.info(f"✅ EdgeTTS Success ({path.stat().st_size} bytes)")
+            return True
+        raise RuntimeError("EdgeTTS file was created but is empty")
 
     async def _elevenlabs(self, text: str, path: Path) -> bool:
-        """Helper for Paid Audio"""
-        # Voice ID: 'Rachel' (American, Female, Calm)
-        url = "https://api.elevenlabs.io/v1/text-to-speech/21m00Tcm4TlvDq8ikWAM"
+        """Helper for Paid Audio. Raises on failure so the guard can retry / count it."""
+        url = f"{settings.ELEVENLABS_BASE_URL}/v1/text-to-speech/{ELEVEN_VOICE_ID}"
         headers = {
             "xi-api-key": settings.ELEVENLABS_API_KEY,
             "Content-Type": "application/json"
         }
         payload = {
             "text": text,
-            "model_id": "eleven_monolingual_v1",
-            "voice_settings": {"stability": 0.5, "similarity_boost": 0.5}
+            "model_id": ELEVEN_MODEL,
+            "voice_settings": ELEVEN_VOICE_SETTINGS
         }
-        
-        try:
-            async with httpx.AsyncClient() as client:
-                resp = await client.post(url, json=payload, headers=headers, timeout=30.0)
-                
-                if resp.status_code == 200:
-                    with open(path, "wb") as f: f.write(resp.content)
-                    logger.info(f"✅ ElevenLabs Success ({len(resp.content)} bytes)")
-                    return True
-                elif resp.status_code == 401:
-                    logger.error("❌ ElevenLabs Error: Invalid API Key (401). Check .env!")
-                elif resp.status_code == 402:
-                    logger.error("❌ ElevenLabs Error: Out of Credits (402).")
-                else:
-                    logger.error(f"❌ ElevenLabs API Error {resp.status_code}: {resp.text}")
-                return False
-        except Exception as e:
-            logger.error(f"❌ ElevenLabs Connection Error: {e}")
-            return False
 
-audio_provider = AudioProvider()
\ No newline at end of file
+        async with http_pool.client("elevenlabs").stream("POST", url, json=payload, headers=headers) as resp:
+            if resp.status_code == 200:
+                size = await write_stream(path, resp.aiter_bytes(settings.DOWNLOAD_CHUNK_BYTES))
+                logger.info(f"✅ ElevenLabs Success ({size} bytes)")
+                return True
+
+            await resp.aread()
+            if resp.status_code == 401:
+                logger.error("❌ ElevenLabs Error: Invalid API Key (401). Check .env!")
+            elif resp.status_code == 402:
+                logger.error("❌ ElevenLabs Error: Out of Credits (402).")
+            raise ProviderHTTPError(resp.status_code, resp.text)
+
+audio_provider = AudioProvider()
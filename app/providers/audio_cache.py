@@ -0,0 +1,106 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import uuid
+from pathlib import Path
+from typing import Optional
+from app.core.config import settings
+from app.core.metrics import CACHE_EVICTIONS, CACHE_LOOKUPS
+
+logger = logging.getLogger("Foundry.AudioCache")
+
+class AudioCache:
+    """
+    Content-addressed on-disk cache of synthesized speech.
+
+    Entries live at <root>/<key[:2]>/<key>.mp3, where key is a hash of
+    (text, voice, provider, settings). Reading an entry bumps its mtime, so
+    eviction (oldest mtime first) is LRU across every worker sharing the dir.
+    """
+
+    SUFFIX = ".mp3"
+    LABEL = "Audio"
+
+    def __init__(self, root: Path = settings.AUDIO_CACHE_DIR, max_bytes: int = settings.AUDIO_CACHE_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._size: Optional[int] = None  # Lazily measured, then tracked on store()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text: str, voice: str, provider: str, params: Optional[dict] = None) -> str:
+        blob = json.dumps(
+            {"text": text.strip(), "voice": voice, "provider": provider, "params": params or {}},
+            sort_keys=True, ensure_ascii=False,
+        )
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}{self.SUFFIX}"
+
+    def fetch(self, key: str, dest: Path) -> bool:
+        """Materializes a cached entry at `dest` (hard link, else copy). Returns False on a miss."""
+        src = self._path(key)
+        try:
+            os.utime(src)  # LRU touch; raises if the entry is gone
+            dest.unlink(missing_ok=True)
+            try:
+                os.link(src, dest)
+            except OSError:  # Cross-device or no hard links: fall back to a copy
+                shutil.copyfile(src, dest)
+        except FileNotFoundError:
+            CACHE_LOOKUPS.labels(cache=self.LABEL.lower(), result="miss").inc()
+            return False
+        CACHE_LOOKUPS.labels(cache=self.LABEL.lower(), result="hit").inc()
+        logger.info(f"♻️ {self.LABEL} cache hit {key[:10]}")
+        return True
+
+    def store(self, key: str, src: Path):
+        """Copies a freshly synthesized file into the cache."""
+        dest = self._path(key)
+        if dest.exists():
+            return
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dest.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dest)  # Atomic: readers never see a partial entry
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._measure()
+            else:
+                self._size += dest.stat().st_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        for path in self.root.glob(f"*/*{self.SUFFIX}"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:  # Evicted by another worker mid-scan
+                continue
+            yield path, st
+
+    def _measure(self) -> int:
+        return sum(st.st_size for _, st in self._entries())
+
+    def _evict(self):
+        """Drops least-recently-used entries until the cache is 90% of its budget."""
+        entries = sorted(self._entries(), key=lambda e: e[1].st_mtime)
+        size = sum(st.st_size for _, st in entries)
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        for path, st in entries:
+            if size <= target:
+                break
+            path.unlink(missing_ok=True)
+            size -= st.st_size
+            evicted += 1
+        self._size = size
+        CACHE_EVICTIONS.labels(cache=self.LABEL.lower()).inc(evicted)
+        logger.info(f"🧹 {self.LABEL} cache trimmed to {size} bytes ({evicted} evicted)")
+
+audio_cache = AudioCache()
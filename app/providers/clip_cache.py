@@ -0,0 +1,84 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Optional
+from app.core.config import settings
+from app.providers.audio_cache import AudioCache
+
+logger = logging.getLogger("Foundry.ClipCache")
+
+class ClipStore(AudioCache):
+    """
+    Content-addressed store of raw Veo clips, keyed by (refined prompt, model,
+    generation config). Same layout and LRU eviction as the TTS cache.
+
+    Renders take minutes, so besides finished clips the store also holds
+    claims: <key>.claim marks a key being rendered (and names its Veo
+    operation), so a worker in another process waits for that clip instead of
+    starting its own render.
+    """
+
+    SUFFIX = ".mp4"
+    LABEL = "Clip"
+
+    def __init__(self, root: Path = settings.CLIP_CACHE_DIR, max_bytes: int = settings.CLIP_CACHE_MAX_BYTES):
+        super().__init__(root, max_bytes)
+
+    @staticmethod
+    def key(prompt: str, model: str, config: Optional[dict] = None) -> str:
+        blob = json.dumps(
+            {"prompt": " ".join(prompt.split()), "model": model, "config": config or {}},
+            sort_keys=True, ensure_ascii=False,
+        )
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    # --- Cross-process claims ---
+
+    def _claim_path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.claim"
+
+    def claim(self, key: str) -> bool:
+        """Takes the right to render `key`. False if another live render holds it."""
+        path = self._claim_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        for _ in range(2):
+            try:
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return True
+            except FileExistsError:
+                try:
+                    if time.time() - path.stat().st_mtime < settings.VEO_RENDER_TIMEOUT_SECONDS:
+                        return False
+                    path.unlink()  # Left behind by a crashed worker; take it over
+                except FileNotFoundError:
+                    pass
+        return False
+
+    def set_operation(self, key: str, name: str):
+        """Publishes the Veo operation behind a claim."""
+        path = self._claim_path(key)
+        tmp = path.with_suffix(".claim.tmp")
+        tmp.write_text(name)
+        os.replace(tmp, path)
+
+    def claimed(self, key: str) -> bool:
+        """A live render (claim younger than VEO_RENDER_TIMEOUT_SECONDS) holds `key`."""
+        try:
+            return time.time() - self._claim_path(key).stat().st_mtime < settings.VEO_RENDER_TIMEOUT_SECONDS
+        except FileNotFoundError:
+            return False
+
+    def operation(self, key: str) -> Optional[str]:
+        """The operation another process is rendering `key` with, once it has one."""
+        try:
+            return self._claim_path(key).read_text().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def release(self, key: str):
+        self._claim_path(key).unlink(missing_ok=True)
+
+clip_store = ClipStore()
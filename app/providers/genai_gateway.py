@@ -0,0 +1,92 @@
+import asyncio
+import logging
+from pathlib import Path
+from typing import Any, Optional
+from app.core.config import settings
+from app.core.resilience import guard
+from app.providers.http_pool import http_pool, write_bytes, write_stream
+from app.providers.registry import providers
+
+logger = logging.getLogger("Foundry.GenAI")
+
+VEO_CONFIG = {"number_of_videos": 1}  # GenerateVideosConfig for every render (part of the clip cache key)
+
+def _build_client():
+    """The google-genai stack takes seconds to import, so it only loads here."""
+    from google import genai
+    from google.genai import types
+
+    if settings.GENAI_BASE_URL:
+        return genai.Client(
+            api_key=settings.GEMINI_API_KEY or "local",
+            http_options=types.HttpOptions(base_url=settings.GENAI_BASE_URL),
+        )
+    return genai.Client(vertexai=True, project=settings.PROJECT_ID, location=settings.LOCATION)
+
+providers.register("genai", _build_client, required=lambda: bool(settings.GEMINI_API_KEY or not settings.USE_MOCK_VEO))
+
+class GenAIGateway:
+    """
+    Non-blocking access to Gemini / Veo, shared by VisualProvider and VideoProvider.
+
+    Every call goes through the SDK's async client (`client.aio`) and the
+    "genai" resilience guard (rate limit, concurrency cap, retries, breaker;
+    see app/core/resilience.py), and is wrapped in a per-call timeout, so a
+    slow round trip only delays the job that made it, never the event loop.
+    """
+
+    @property
+    def client(self):
+        """Built on first use (see app/providers/registry.py); None if it could not be."""
+        return providers.get("genai")
+
+    @property
+    def available(self) -> bool:
+        """A client exists and the breaker is not open (callers fall back without waiting)."""
+        return self.client is not None and guard("genai").available
+
+    async def _call(self, make_coro, timeout: Optional[float], idempotent: bool = True) -> Any:
+        """`make_coro()` builds a fresh SDK coroutine per attempt."""
+        limit = timeout or settings.GENAI_TIMEOUT_SECONDS
+        return await guard("genai").call(lambda: asyncio.wait_for(make_coro(), timeout=limit), idempotent=idempotent)
+
+    async def generate_text(self, model: str, contents: str, timeout: Optional[float] = None) -> str:
+        resp = await self._call(lambda: self.client.aio.models.generate_content(model=model, contents=contents), timeout)
+        return resp.text.strip()
+
+    async def start_video(self, model: str, prompt: str, timeout: Optional[float] = None):
+        from google.genai import types
+        return await self._call(
+            lambda: self.client.aio.models.generate_videos(
+                model=model, prompt=prompt, config=types.GenerateVideosConfig(**VEO_CONFIG)
+            ),
+            timeout,
+            idempotent=False,  # A retried timeout could start (and bill) a second render
+        )
+
+    async def get_operation(self, operation, timeout: Optional[float] = None):
+        return await self._call(lambda: self.client.aio.operations.get(operation), timeout)
+
+    def resume_video(self, name: str):
+        """An operation handle for a render started earlier (e.g. before a worker restart)."""
+        from google.genai import types
+        return types.GenerateVideosOperation(name=name)
+
+    async def save_video(self, video, path: Path) -> int:
+        """
+        Writes a generated Veo video to disk without blocking the loop.
+        Download URIs are streamed in chunks through the shared HTTP pool, so
+        memory stays bounded regardless of clip size; inline bytes (Vertex
+        default) are written in chunks and released.
+        """
+        uri = getattr(video, "uri", None) or ""
+        if uri.startswith(("http://", "https://")):
+            headers = {"x-goog-api-key": settings.GEMINI_API_KEY} if settings.GEMINI_API_KEY else {}
+            async with http_pool.client("veo").stream("GET", uri, headers=headers, follow_redirects=True) as resp:
+                resp.raise_for_status()
+                return await write_stream(path, resp.aiter_bytes(settings.DOWNLOAD_CHUNK_BYTES))
+        if video.video_bytes:
+            return await write_bytes(path, video.video_bytes)
+        raise ValueError(f"Veo returned no downloadable video (uri={uri or 'none'})")
+
+genai_gateway = GenAIGateway()
@@ -0,0 +1,81 @@
+import asyncio
+import logging
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Optional
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger("Foundry.HTTP")
+
+class HttpPool:
+    """
+    One shared, lifecycle-managed httpx.AsyncClient per provider.
+
+    Clients keep connections alive (and speak HTTP/2 when `h2` is installed)
+    instead of paying a TCP/TLS handshake per call. Close them with aclose()
+    on shutdown. httpx itself is only imported when the first client is built.
+    """
+
+    def __init__(self):
+        self._clients: Dict[str, "httpx.AsyncClient"] = {}
+
+    def client(self, name: str) -> "httpx.AsyncClient":
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._build()
+            self._clients[name] = client
+        return client
+
+    def _build(self) -> "httpx.AsyncClient":
+        import httpx  # Deferred: most processes never open a provider connection
+
+        limits = httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_KEEPALIVE_CONNECTIONS,
+        )
+        timeout = httpx.Timeout(settings.HTTP_TIMEOUT_SECONDS)
+        try:
+            return httpx.AsyncClient(limits=limits, timeout=timeout, http2=settings.HTTP2_ENABLED)
+        except ImportError:
+            logger.warning("⚠️ HTTP/2 needs the `h2` package (pip install 'httpx[http2]'). Using HTTP/1.1.")
+            return httpx.AsyncClient(limits=limits, timeout=timeout)
+
+    async def aclose(self):
+        clients, self._clients = list(self._clients.values()), {}
+        await asyncio.gather(*(c.aclose() for c in clients), return_exceptions=True)
+
+async def write_stream(path: Path, chunks: AsyncIterator[bytes]) -> int:
+    """
+    Writes an async byte stream to `path` without blocking the loop.
+    Only one chunk is held in memory at a time; the file appears atomically.
+    """
+    part = path.with_name(path.name + ".part")
+    fh = await asyncio.to_thread(open, part, "wb")
+    written = 0
+    try:
+        async for chunk in chunks:
+            await asyncio.to_thread(fh.write, chunk)
+            written += len(chunk)
+    except BaseException:
+        await asyncio.to_thread(fh.close)
+        part.unlink(missing_ok=True)
+        raise
+    await asyncio.to_thread(fh.close)
+    os.replace(part, path)
+    return written
+
+async def write_bytes(path: Path, data: bytes, chunk_size: Optional[int] = None) -> int:
+    """Writes an in-memory payload in chunks off the event loop."""
+    size = chunk_size or settings.DOWNLOAD_CHUNK_BYTES
+    view = memoryview(data)
+
+    async def _chunks():
+        for offset in range(0, len(view), size):
+            yield view[offset:offset + size]
+
+    return await write_stream(path, _chunks())
+
+http_pool = HttpPool()
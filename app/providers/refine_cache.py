@@ -0,0 +1,123 @@
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Awaitable, Callable, Optional, Tuple
+from sqlalchemy import delete, select
+from app.core.config import settings
+from app.core.metrics import CACHE_LOOKUPS
+from app.core.singleflight import SingleFlight
+from app.db.models import RefineCacheEntry, utcnow
+from app.db.session import AsyncSessionLocal
+
+logger = logging.getLogger("Foundry.RefineCache")
+
+class RefineCache:
+    """
+    Two-tier memo of Gemini prompt refinements.
+
+    1. In-process LRU (short TTL, so an admin invalidation reaches every worker quickly).
+    2. `refine_cache` table (long TTL, shared by all processes).
+
+    Concurrent misses for the same key are coalesced into a single model call.
+    """
+
+    def __init__(self):
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._flight = SingleFlight()
+
+    @staticmethod
+    def normalize(prompt: str) -> str:
+        return " ".join(prompt.split()).casefold()
+
+    def key(self, prompt: str, style: str, model: str) -> str:
+        blob = "\x1f".join([self.normalize(prompt), style.strip().casefold(), model])
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    async def get_or_refine(self, prompt: str, style: str, refine: Callable[[], Awaitable[str]]) -> str:
+        """Returns the cached refinement, or runs `refine()` once for everyone waiting on it."""
+        model = settings.GEMINI_MODEL
+        key = self.key(prompt, style, model)
+
+        cached = self._memory_get(key)
+        if cached is not None:
+            CACHE_LOOKUPS.labels(cache="refine", result="hit").inc()
+            return cached
+
+        return await self._flight.do(key, lambda: self._load_or_refine(key, prompt, style, model, refine))
+
+    async def _load_or_refine(self, key, prompt, style, model, refine) -> str:
+        stored = await self._db_get(key)
+        if stored is not None:
+            CACHE_LOOKUPS.labels(cache="refine", result="hit").inc()
+            self._memory_put(key, stored)
+            return stored
+
+        CACHE_LOOKUPS.labels(cache="refine", result="miss").inc()
+        refined = await refine()
+        self._memory_put(key, refined)
+        try:
+            await self._db_put(key, prompt, style, model, refined)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not persist refinement: {e}")
+        return refined
+
+    async def invalidate(self, prompt: Optional[str] = None, style: Optional[str] = None) -> int:
+        """
+        Drops a prompt's entries (one style, or every style it was refined
+        with), or the whole cache. Returns rows deleted.
+        """
+        async with AsyncSessionLocal() as db:
+            stmt = delete(RefineCacheEntry)
+            if prompt is not None:
+                if style is not None:
+                    styles = [style]
+                else:  # Keys are hashes: try every style the table has seen
+                    styles = (await db.execute(select(RefineCacheEntry.style).distinct())).scalars().all()
+                keys = [self.key(prompt, s, settings.GEMINI_MODEL) for s in styles]
+                stmt = stmt.where(RefineCacheEntry.key.in_(keys))
+                for key in keys:
+                    self._memory.pop(key, None)
+            else:
+                self._memory.clear()
+            deleted = (await db.execute(stmt)).rowcount
+            await db.commit()
+            return deleted
+
+    # --- Tiers ---
+
+    def _memory_get(self, key: str) -> Optional[str]:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        refined, expires = entry
+        if expires < time.monotonic():
+            del self._memory[key]
+            return None
+        self._memory.move_to_end(key)
+        return refined
+
+    def _memory_put(self, key: str, refined: str):
+        self._memory[key] = (refined, time.monotonic() + settings.REFINE_CACHE_MEMORY_TTL_SECONDS)
+        self._memory.move_to_end(key)
+        while len(self._memory) > settings.REFINE_CACHE_SIZE:
+            self._memory.popitem(last=False)
+
+    async def _db_get(self, key: str) -> Optional[str]:
+        cutoff = utcnow() - timedelta(seconds=settings.REFINE_CACHE_TTL_SECONDS)
+        async with AsyncSessionLocal() as db:
+            return (await db.execute(
+                select(RefineCacheEntry.refined)
+                .where(RefineCacheEntry.key == key, RefineCacheEntry.created_at >= cutoff)
+            )).scalar_one_or_none()
+
+    async def _db_put(self, key: str, prompt: str, style: str, model: str, refined: str):
+        async with AsyncSessionLocal() as db:
+            await db.merge(RefineCacheEntry(
+                key=key, prompt=prompt, style=style, model=model,
+                refined=refined, created_at=utcnow(),
+            ))
+            await db.commit()
+
+refine_cache = RefineCache()
@@ -0,0 +1,82 @@
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger("Foundry.Providers")
+
+@dataclass
+class ProviderEntry:
+    factory: Callable[[], Any]
+    required: Callable[[], bool]
+    instance: Any = None
+    built: bool = False
+    error: Optional[str] = None
+    build_seconds: Optional[float] = None
+
+class ProviderRegistry:
+    """
+    Builds provider clients (and imports their SDKs) on first use instead of
+    at import time, so the API and workers start fast and without credentials.
+
+    A factory that raises is remembered as failed and `get()` returns None,
+    the same "client unavailable" signal the providers already handle.
+    `readiness()` reports which required providers could be built.
+    """
+
+    def __init__(self):
+        self._entries: Dict[str, ProviderEntry] = {}
+        self._lock = threading.Lock()  # Factories may run from to_thread() and the loop at once
+
+    def register(self, name: str, factory: Callable[[], Any], required: Callable[[], bool] = lambda: True):
+        self._entries[name] = ProviderEntry(factory, required)
+
+    def get(self, name: str) -> Any:
+        entry = self._entries[name]
+        if entry.built:
+            return entry.instance
+        with self._lock:
+            if not entry.built:
+                started = time.perf_counter()
+                try:
+                    entry.instance = entry.factory()
+                    logger.info(f"🔌 Provider '{name}' ready")
+                except Exception as e:
+                    entry.error = f"{type(e).__name__}: {e}"
+                    logger.warning(f"⚠️ Provider '{name}' unavailable ({e}). (Okay if running mocks)")
+                entry.build_seconds = round(time.perf_counter() - started, 3)
+                entry.built = True
+        return entry.instance
+
+    async def warm(self):
+        """Builds every required provider off the event loop (startup hook)."""
+        for name, entry in self._entries.items():
+            if entry.required():
+                await asyncio.to_thread(self.get, name)
+
+    def readiness(self) -> Dict[str, dict]:
+        report = {}
+        for name, entry in self._entries.items():
+            required = entry.required()
+            if not entry.built:
+                state = "pending" if required else "idle"
+            else:
+                state = "failed" if entry.error else "ready"
+            report[name] = {
+                "required": required, "state": state,
+                "error": entry.error, "build_seconds": entry.build_seconds,
+            }
+        return report
+
+    @property
+    def ready(self) -> bool:
+        return all(r["state"] == "ready" for r in self.readiness().values() if r["required"])
+
+    def reset(self, name: str):
+        """Forgets a built (or failed) client so the next get() rebuilds it."""
+        with self._lock:
+            self._entries[name] = ProviderEntry(self._entries[name].factory, self._entries[name].required)
+
+providers = ProviderRegistry()
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import random
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from app.core.config import settings
+from app.core.metrics import VEO_PENDING, VEO_POLLS, VEO_WAIT_SECONDS, Timer
+from app.core.resilience import CircuitOpenError
+from app.providers.genai_gateway import genai_gateway
+
+logger = logging.getLogger("Foundry.VeoPoller")
+
+@dataclass
+class PendingOperation:
+    operation: Any
+    future: asyncio.Future
+    started: float                 # loop.time() when we began tracking it
+    deadline: float
+    next_check: float = 0.0
+    delay: float = 0.0
+    errors: int = 0
+    waiters: int = 0
+    resumed: bool = False          # Started before a restart; its true age is unknown
+
+class OperationPoller:
+    """
+    One loop per process polls every outstanding Veo operation.
+
+    Instead of each job sleeping a fixed interval, checks are spread around
+    the expected render time: the gap halves as an operation approaches it
+    (so finished clips are picked up within ~VEO_POLL_SECONDS), then backs
+    off towards VEO_POLL_MAX_SECONDS if it runs long. Every gap is jittered
+    so jobs submitted together don't poll in lockstep. The expectation
+    follows observed render times.
+    """
+
+    def __init__(self, gateway=genai_gateway):
+        self.gateway = gateway
+        self.expected = settings.VEO_EXPECTED_SECONDS
+        self._pending: Dict[str, PendingOperation] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop_task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def wait(self, operation, resumed: bool = False, deadline: Optional[float] = None):
+        """Returns `operation` once done. Waiting on an operation already tracked shares its result."""
+        loop = asyncio.get_running_loop()
+        pending = self._pending.get(operation.name)
+        if pending is None:
+            now = loop.time()
+            pending = PendingOperation(
+                operation=operation, future=loop.create_future(), started=now,
+                deadline=now + (deadline or settings.VEO_RENDER_TIMEOUT_SECONDS), resumed=resumed,
+            )
+            self._schedule(pending, now)
+            self._pending[operation.name] = pending
+            VEO_PENDING.inc()
+            self._ensure_loop()
+
+        pending.waiters += 1
+        try:
+            with Timer(VEO_WAIT_SECONDS):
+                return await asyncio.shield(pending.future)
+        finally:
+            pending.waiters -= 1
+            if pending.waiters == 0 and not pending.future.done():
+                self._drop(operation.name)  # Every job waiting on it was cancelled
+
+    # --- Scheduling ---
+
+    def _schedule(self, pending: PendingOperation, now: float):
+        if pending.resumed and pending.delay == 0.0:
+            delay = 0.0  # Check straight away; it may have finished while we were down
+        else:
+            remaining = self.expected - (now - pending.started)
+            if remaining > 0:
+                delay = max(settings.VEO_POLL_SECONDS, remaining / 2)
+            else:
+                delay = min(settings.VEO_POLL_MAX_SECONDS, max(pending.delay, settings.VEO_POLL_SECONDS) * 1.5)
+            delay *= random.uniform(1 - settings.VEO_POLL_JITTER, 1 + settings.VEO_POLL_JITTER)
+        pending.delay = max(delay, 1e-3)
+        pending.next_check = min(now + delay, pending.deadline)
+        if self._wakeup:
+            self._wakeup.set()
+
+    def _ensure_loop(self):
+        if self._loop_task is None or self._loop_task.done():
+            self._wakeup = asyncio.Event()
+            self._loop_task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while self._pending:
+            now = loop.time()
+            due = [p for p in self._pending.values() if p.next_check <= now]
+            if due:
+                await asyncio.gather(*(self._check(p) for p in due))
+                continue
+            self._wakeup.clear()
+            soonest = min(p.next_check for p in self._pending.values())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=soonest - now)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _check(self, pending: PendingOperation):
+        name = pending.operation.name
+        loop = asyncio.get_running_loop()
+        if loop.time() >= pending.deadline:
+            self._finish(name, error=asyncio.TimeoutError(f"Veo operation {name} still running at the deadline"))
+            return
+        try:
+            operation = await self.gateway.get_operation(pending.operation)
+        except CircuitOpenError:
+            # The render itself is unaffected; check back once the breaker may have closed
+            VEO_POLLS.labels(result="skipped").inc()
+            pending.next_check = min(loop.time() + settings.VEO_POLL_MAX_SECONDS, pending.deadline)
+            return
+        except Exception as e:
+            VEO_POLLS.labels(result="error").inc()
+            pending.errors += 1
+            if pending.errors >= settings.VEO_POLL_MAX_ERRORS:
+                self._finish(name, error=e)
+                return
+            pending.delay = min(settings.VEO_POLL_MAX_SECONDS, max(pending.delay, settings.VEO_POLL_SECONDS) * 2)
+            pending.next_check = loop.time() + pending.delay * random.uniform(1, 1 + settings.VEO_POLL_JITTER)
+            logger.warning(f"⚠️ Veo status call failed ({e!r}); retrying in {pending.delay:.1f}s")
+            return
+
+        pending.errors = 0
+        if not operation.done:
+            VEO_POLLS.labels(result="running").inc()
+            pending.operation = operation
+            self._schedule(pending, loop.time())
+            return
+
+        VEO_POLLS.labels(result="done").inc()
+        if not pending.resumed:
+            rendered = loop.time() - pending.started
+            self.expected = 0.8 * self.expected + 0.2 * rendered  # EWMA of observed render times
+        self._finish(name, result=operation)
+
+    def _finish(self, name: str, result=None, error: Optional[BaseException] = None):
+        pending = self._drop(name)
+        if pending is None or pending.future.done():
+            return
+        if error is not None:
+            pending.future.set_exception(error)
+        else:
+            pending.future.set_result(result)
+
+    def _drop(self, name: str) -> Optional[PendingOperation]:
+        pending = self._pending.pop(name, None)
+        if pending is not None:
+            VEO_PENDING.dec()
+        return pending
+
+veo_poller = OperationPoller()
@@ -1,39 +1,27 @@
-import time
 import asyncio
 from pathlib import Path
-from google import genai
-from google.genai import types
 from app.core.config import settings
 from app.core.logging import setup_logging
+from app.providers.genai_gateway import genai_gateway
+from app.providers.veo_poller import veo_poller
 
 logger = setup_logging("Foundry-Video")
 
 class VideoProvider:
     def __init__(self):
-        # Initialize only if not mocking (or needed for Gemini)
-        try:
-            self.client = genai.Client(
-                vertexai=True,
-                project=settings.PROJECT_ID,
-                location=settings.LOCATION
-            )
-        except Exception:
-            logger.warning("Could not init VertexAI Client. (Okay if running mocks)")
+        # Shares the non-blocking client with VisualProvider
+        self.gateway = genai_gateway
 
-    def refine_prompt(self, raw_prompt: str, style: str) -> str:
+    async def refine_prompt(self, raw_prompt: str, style: str) -> str:
         # We allow Gemini to run even in Mock Veo mode, unless API key is missing
-        if not settings.GEMINI_API_KEY:
+        if not settings.GEMINI_API_KEY or not self.gateway.available:
              return f"Refined ({style}): {raw_prompt}"
              
         try:
             sys_msg = f"Convert to detailed visual description for AI Video. Style: {style}. Under 40 words."
-            response = self.client.models.generate_content(
-                model=settings.GEMINI_MODEL_ID,
-                contents=f"{sys_msg}\nInput: {raw_prompt}"
-            )
-            return response.text.strip()
+            return await self.gateway.generate_text(settings.GEMINI_MODEL, f"{sys_msg}\nInput: {raw_prompt}")
         except Exception as e:
-            logger.error(f"Gemini Error: {e}")
+            logger.error(f"Gemini Error: {e!r}")
             return raw_prompt
 
     async def generate_video(self, prompt: str, output_path: Path) -> bool:
@@ -47,27 +35,19 @@ class VideoProvider:
 
         try:
             logger.info("🎥 Sending request to Veo...")
-            operation = self.client.models.generate_videos(
-                model=settings.VEO_MODEL_ID,
-                prompt=prompt,
-                config=types.GenerateVideosConfig(number_of_videos=1)
-            )
+            operation = await self.gateway.start_video(settings.VEO_MODEL, prompt)
             
-            # Polling
-            while not operation.done:
-                logger.info("...rendering video...")
-                await asyncio.sleep(10)
-                operation = self.client.operations.get(operation)
+            # Polling (shared with every other in-flight render)
+            logger.info("...rendering video...")
+            operation = await veo_poller.wait(operation)
 
             if operation.result.generated_videos:
-                video_bytes = operation.result.generated_videos[0].video.video_bytes
-                with open(output_path, "wb") as f:
-                    f.write(video_bytes)
+                await self.gateway.save_video(operation.result.generated_videos[0].video, output_path)
                 return True
             return False
 
         except Exception as e:
-            logger.error(f"Veo Error: {e}")
+            logger.error(f"Veo Error: {e!r}")
             return False
 
-video_service = VideoProvider()
\ No newline at end of file
+video_service = VideoProvider()
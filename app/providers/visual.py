@@ -1,50 +1,164 @@
 import asyncio
 import logging
 from pathlib import Path
-from google import genai
-from google.genai import types
+from typing import Awaitable, Callable, Optional
 from app.core.config import settings
+from app.core.metrics import CLIP_REUSE
+from app.core.resilience import status_of
+from app.core.singleflight import SingleFlight
+from app.providers.clip_cache import clip_store
+from app.providers.genai_gateway import VEO_CONFIG, genai_gateway
+from app.providers.refine_cache import refine_cache
+from app.providers.veo_poller import veo_poller
 
 logger = logging.getLogger("Foundry.Visual")
 
 class VisualProvider:
     def __init__(self):
-        self.client = None
-        if settings.GEMINI_API_KEY or not settings.USE_MOCK_VEO:
-            try:
-                self.client = genai.Client(vertexai=True, project=settings.PROJECT_ID, location=settings.LOCATION)
-            except: pass
+        self.gateway = genai_gateway
+        self.enabled = bool(settings.GEMINI_API_KEY or not settings.USE_MOCK_VEO)
+        self._flight = SingleFlight()
 
     async def refine(self, prompt: str, style: str) -> str:
-        if not self.client: return prompt
+        if not (self.enabled and self.gateway.available): return prompt
         try:
-            resp = self.client.models.generate_content(
-                model=settings.GEMINI_MODEL,
-                contents=f"Visual description for AI Video. Style: {style}. Under 40 words.\nInput: {prompt}"
-            )
-            return resp.text.strip()
-        except: return prompt
-
-    async def generate_video(self, prompt: str, path: Path) -> bool:
+            if settings.REFINE_CACHE_ENABLED:
+                return await refine_cache.get_or_refine(prompt, style, lambda: self._refine_remote(prompt, style))
+            return await self._refine_remote(prompt, style)
+        except Exception as e:
+            logger.warning(f"Gemini refine failed ({e!r}). Using raw prompt.")
+            return prompt
+
+    async def _refine_remote(self, prompt: str, style: str) -> str:
+        return await self.gateway.generate_text(
+            settings.GEMINI_MODEL,
+            f"Visual description for AI Video. Style: {style}. Under 40 words.\nInput: {prompt}"
+        )
+
+    async def generate_video(
+        self, prompt: str, path: Path,
+        resume: Optional[str] = None,
+        on_started: Optional[Callable[[Optional[str]], Awaitable[None]]] = None,
+        fresh: bool = False,
+    ) -> bool:
+        """
+        Renders `prompt` to `path`. `on_started(name)` is awaited with the Veo
+        operation name as soon as it exists, so the caller can persist it; a
+        retry then passes it back as `resume` and picks the same render up
+        instead of paying for a new one.
+
+        Identical renders are shared through the clip store: a stored clip is
+        reused, and concurrent requests attach to the render already in
+        flight, in this process or another worker. A `fresh` request (A/B
+        take) shares nothing: it always pays for its own render.
+        """
         if settings.USE_MOCK_VEO:
             logger.info("🚧 MOCK VEO: Simulating...")
             await asyncio.sleep(3)
             with open(path, "wb") as f: f.write(b"mock")
             return True
 
+        if not settings.CLIP_CACHE_ENABLED:
+            return await self._render(prompt, path, resume, on_started)
+
+        key = clip_store.key(prompt, settings.VEO_MODEL, VEO_CONFIG)
+        if fresh:
+            return await self._render_and_store(key, prompt, path, resume, on_started)
+        if await asyncio.to_thread(clip_store.fetch, key, path):
+            CLIP_REUSE.labels(result="hit").inc()
+            return True
+
+        if key in self._flight:
+            logger.info(f"🔗 Identical render {key[:10]} already in flight. Attaching.")
+            CLIP_REUSE.labels(result="coalesced").inc()
+        ok = await self._flight.do(key, lambda: self._render_shared(key, prompt, path, resume, on_started))
+        if ok and not path.exists():  # Someone else's render; take our copy from the store
+            ok = await asyncio.to_thread(clip_store.fetch, key, path)
+        return ok
+
+    async def _render_shared(self, key: str, prompt: str, path: Path, resume, on_started) -> bool:
+        """
+        Renders once across workers: the claim holder renders, others wait for
+        its clip. If that render ends without one, waiters compete for the
+        claim again, so exactly one of them retries.
+        """
+        while True:
+            owned = await asyncio.to_thread(clip_store.claim, key)
+            if owned or resume:  # A resumed task already has its own render
+                break
+            if await self._await_claimed(key, path, on_started):
+                return True
+
+        async def started(name: Optional[str]):
+            if owned and name:
+                await asyncio.to_thread(clip_store.set_operation, key, name)
+            if on_started:
+                await on_started(name)
+
         try:
-            op = self.client.models.generate_videos(
-                model=settings.VEO_MODEL, prompt=prompt, config=types.GenerateVideosConfig(number_of_videos=1)
-            )
-            while not op.done:
-                await asyncio.sleep(5)
-                op = self.client.operations.get(op)
-            
-            if op.result.generated_videos:
-                with open(path, "wb") as f: f.write(op.result.generated_videos[0].video.video_bytes)
+            return await self._render_and_store(key, prompt, path, resume, started)
+        finally:
+            if owned:
+                await asyncio.to_thread(clip_store.release, key)
+
+    async def _render_and_store(self, key: str, prompt: str, path: Path, resume, on_started) -> bool:
+        ok = await self._render(prompt, path, resume, on_started)
+        if ok:
+            try:
+                await asyncio.to_thread(clip_store.store, key, path)
+            except OSError as e:
+                logger.warning(f"⚠️ Could not store clip: {e}")
+        return ok
+
+    async def _await_claimed(self, key: str, path: Path, on_started) -> bool:
+        """
+        Waits for another worker's render of `key` to land in the store (no Veo
+        calls of our own). False if it ends without a clip.
+        """
+        logger.info(f"🔗 Identical render {key[:10]} in progress in another worker. Waiting for it.")
+        CLIP_REUSE.labels(result="attached").inc()
+        recorded = False
+        while await asyncio.to_thread(clip_store.claimed, key):
+            name = None if recorded else await asyncio.to_thread(clip_store.operation, key)
+            if name and on_started:
+                await on_started(name)  # A restart of this task resumes the same render
+                recorded = True
+            await asyncio.sleep(settings.VEO_POLL_SECONDS)
+        return await asyncio.to_thread(clip_store.fetch, key, path)
+
+    async def _render(self, prompt: str, path: Path, resume, on_started) -> bool:
+        spent = False  # The recorded operation is gone or finished without a video: not worth resuming
+        try:
+            op = None
+            if resume:
+                try:
+                    logger.info(f"♻️ Resuming Veo operation {resume}")
+                    op = await veo_poller.wait(self.gateway.resume_video(resume), resumed=True)
+                except Exception as e:
+                    if status_of(e) != 404:
+                        raise  # Poll/transport trouble: the render may still be running; resume it next attempt
+                    logger.warning(f"⚠️ Veo operation {resume} not found. Starting a new render.")
+                    spent = True
+                if op is not None and not (op.result and op.result.generated_videos):
+                    logger.warning(f"⚠️ Veo operation {resume} finished without a video. Starting a new render.")
+                    op, spent = None, True
+            if op is None:
+                op = await self.gateway.start_video(settings.VEO_MODEL, prompt)
+                CLIP_REUSE.labels(result="rendered").inc()
+                spent = False
+                if on_started:
+                    await on_started(op.name)
+                op = await veo_poller.wait(op)
+
+            if op.result and op.result.generated_videos:
+                # A failed download keeps the name: the next attempt fetches the finished clip
+                await self.gateway.save_video(op.result.generated_videos[0].video, path)
                 return True
+            spent = True
         except Exception as e:
-            logger.error(f"Veo Failed: {e}")
+            logger.error(f"Veo Failed: {e!r}")
+        if spent and on_started:
+            await on_started(None)
         return False
 
-visual_provider = VisualProvider()
\ No newline at end of file
+visual_provider = VisualProvider()
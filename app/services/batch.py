@@ -0,0 +1,80 @@
+import logging
+import uuid
+from typing import Iterable, List, Optional
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.models import Task
+from app.services.events import is_terminal
+
+logger = logging.getLogger("Foundry.Batch")
+
+class BatchService:
+    """
+    Campaign-sized submissions.
+
+    submit() inserts a whole batch in one transaction, collapsing identical
+    items into one task (fresh_video items are takes of their own). Every task is QUEUED at once; work shared between
+    tasks (same refinement, TTS script or clip) is deduplicated by the
+    refine/audio/clip caches and their single-flight guards, so no task
+    waits on another one to start.
+    """
+
+    @staticmethod
+    def dedup_key(item, position: int) -> tuple:
+        if item.fresh_video:
+            return ("fresh", position)  # A/B takes: never collapsed, even with an identical item
+        return (item.prompt.strip(), item.style, (item.monologue or "").strip(), bool(item.use_paid_voice))
+
+    async def submit(self, db: AsyncSession, items: Iterable) -> dict:
+        batch_id = str(uuid.uuid4())
+        task_ids: List[str] = []
+        by_key = {}
+        rows = []
+
+        for position, item in enumerate(items):
+            key = self.dedup_key(item, position)
+            if key not in by_key:
+                by_key[key] = str(uuid.uuid4())
+                rows.append({
+                    "id": by_key[key],
+                    "prompt": item.prompt,
+                    "monologue": item.monologue,
+                    "style": item.style,
+                    "is_paid_voice": item.use_paid_voice,
+                    "fresh_video": item.fresh_video,
+                    "batch_id": batch_id,
+                    "status": "QUEUED",
+                    "stage": "QUEUED",
+                    "progress": 0.0,
+                })
+            task_ids.append(by_key[key])
+
+        await db.execute(insert(Task), rows)  # One bulk INSERT, one commit
+        await db.commit()
+        logger.info(f"📦 Batch {batch_id[:8]}: {len(task_ids)} items -> {len(rows)} tasks")
+        return {"batch_id": batch_id, "task_ids": task_ids, "unique": len(rows)}
+
+    async def status(self, db: AsyncSession, batch_id: str) -> Optional[dict]:
+        rows = (await db.execute(
+            select(Task.status, func.count(), func.avg(Task.progress))
+            .where(Task.batch_id == batch_id)
+            .group_by(Task.status)
+        )).all()
+        if not rows:
+            return None
+
+        counts = {status: count for status, count, _ in rows}
+        total = sum(counts.values())
+        progress = sum(
+            count * (100.0 if is_terminal(status) else (avg or 0.0))
+            for status, count, avg in rows
+        ) / total
+        return {
+            "batch_id": batch_id,
+            "total": total,
+            "counts": counts,
+            "progress": round(progress, 1),
+            "done": all(is_terminal(status) for status in counts),
+        }
+
+batch_service = BatchService()
@@ -0,0 +1,112 @@
+import asyncio
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Set
+from sqlalchemy import select
+from app.core.config import settings
+from app.db.models import Task
+from app.db.session import AsyncSessionLocal
+from app.services.storage import media_url
+from app.services.task_state import is_terminal, task_states
+
+logger = logging.getLogger("Foundry.Events")
+
+# Pipeline stages, in order. Published by Orchestrator.process_task.
+STAGES = ["QUEUED", "REFINING", "GENERATING_VIDEO", "GENERATING_AUDIO", "PREVIEW", "STITCHING", "THUMBNAILS", "COMPLETED", "FAILED"]
+
+def task_event(task: Task) -> dict:
+    expired = getattr(task, "expired_at", None) is not None  # Files evicted; same rule as TaskSchema.video_url
+    return {
+        "id": task.id,
+        "status": task.status,
+        "stage": task.stage,
+        "progress": task.progress or 0,
+        "final_output": None if expired else task.final_output,
+        "preview_output_url": None if expired else media_url(task.preview_output),
+        "expired": expired,
+    }
+
+class TaskEventBus:
+    """
+    In-process pub/sub of task state changes for SSE / WebSocket clients.
+
+    Events published in this process (embedded worker) are delivered
+    immediately. Jobs running in separate worker processes are picked up by a
+    relay that reads *only the watched* task rows once per EVENTS_POLL_SECONDS,
+    one query no matter how many clients are listening.
+    Identical consecutive snapshots are never re-sent.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._last: Dict[str, dict] = {}
+        self._relay: Optional[asyncio.Task] = None
+
+    def publish(self, event: dict):
+        task_id = event["id"]
+        if self._last.get(task_id) == event:
+            return
+        self._last[task_id] = event
+        for queue in self._subscribers.get(task_id, ()):
+            queue.put_nowait(event)
+        if not self._subscribers.get(task_id):
+            self._last.pop(task_id, None)  # Nobody watching; don't grow
+
+    @contextmanager
+    def subscribe(self, task_ids: Iterable[str]):
+        """Yields a queue receiving events for `task_ids` until the block exits."""
+        queue: asyncio.Queue = asyncio.Queue()
+        ids = set(task_ids)
+        self.add(queue, ids)
+        try:
+            yield queue
+        finally:
+            self.remove(queue, ids)
+
+    def add(self, queue: asyncio.Queue, task_ids: Iterable[str]):
+        for task_id in task_ids:
+            self._subscribers.setdefault(task_id, set()).add(queue)
+            if task_id in self._last:  # Late joiners start from the latest known state
+                queue.put_nowait(self._last[task_id])
+        self._ensure_relay()
+
+    def remove(self, queue: asyncio.Queue, task_ids: Iterable[str]):
+        for task_id in task_ids:
+            queues = self._subscribers.get(task_id)
+            if queues is None:
+                continue
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[task_id]
+                self._last.pop(task_id, None)
+
+    # --- Cross-process relay ---
+
+    def _ensure_relay(self):
+        if self._subscribers and (self._relay is None or self._relay.done()):
+            self._relay = asyncio.create_task(self._relay_loop())
+
+    async def _relay_loop(self):
+        while self._subscribers:
+            try:
+                for event in await self._snapshot(list(self._subscribers)):
+                    self.publish(event)
+            except Exception as e:
+                logger.warning(f"⚠️ Event relay read failed: {e}")
+            await asyncio.sleep(settings.EVENTS_POLL_SECONDS)
+
+    @staticmethod
+    async def _snapshot(task_ids: List[str]) -> List[dict]:
+        """Current state of `task_ids`: from the task state registry, the rest in one query."""
+        states = {task_id: task_states.get(task_id) for task_id in task_ids}
+        events = [task_event(s) for s in states.values() if s is not None]
+        missing = [task_id for task_id, s in states.items() if s is None]
+        if missing:
+            async with AsyncSessionLocal() as db:
+                rows = await db.execute(select(Task).where(Task.id.in_(missing)))
+                for task in rows.scalars():
+                    task_states.remember(task)
+                    events.append(task_event(task))
+        return events
+
+event_bus = TaskEventBus()
@@ -1,35 +1,456 @@
+import asyncio
+import contextlib
+import inspect
+import json
+import math
+import os
+import shutil
 import subprocess
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from app.core.config import settings
 from app.core.logging import setup_logging
 
 logger = setup_logging("Foundry-FFmpeg")
 
+ProgressCallback = Callable[[float], Any]  # May be a coroutine function
+
+HLS_MASTER = "master.m3u8"
+FFPROBE = ["ffprobe", "-v", "error", "-print_format", "json", "-show_format", "-show_streams"]
+
+class MediaEngineError(Exception):
+    """FFmpeg/FFprobe exited non-zero. Carries the tail of stderr."""
+
+    def __init__(self, returncode: int, stderr: str):
+        self.returncode = returncode
+        self.stderr = stderr
+        tail = stderr.strip().splitlines()[-5:]
+        super().__init__(f"ffmpeg exited {returncode}: {' | '.join(tail) or 'no stderr'}")
+
+@dataclass
+class MediaInfo:
+    """What ffprobe tells us about a file (first video / audio stream)."""
+    duration: Optional[float] = None
+    video_codec: Optional[str] = None
+    pix_fmt: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    audio_codec: Optional[str] = None
+    bit_rate: Optional[int] = None      # Container average, bits/s
+
+    @classmethod
+    def from_ffprobe(cls, data: dict) -> "MediaInfo":
+        """Reads `ffprobe -print_format json -show_format -show_streams` output."""
+        info = cls()
+        fmt = data.get("format", {})
+        try:
+            info.duration = float(fmt.get("duration"))
+        except (TypeError, ValueError):
+            pass
+        try:
+            info.bit_rate = int(fmt.get("bit_rate"))
+        except (TypeError, ValueError):
+            pass
+        for stream in data.get("streams", []):
+            if stream.get("codec_type") == "video" and info.video_codec is None:
+                info.video_codec = stream.get("codec_name")
+                info.pix_fmt = stream.get("pix_fmt")
+                info.width = stream.get("width")
+                info.height = stream.get("height")
+            elif stream.get("codec_type") == "audio" and info.audio_codec is None:
+                info.audio_codec = stream.get("codec_name")
+        return info
+
+    @property
+    def has_video(self) -> bool:
+        return self.video_codec is not None
+
+    @property
+    def has_audio(self) -> bool:
+        return self.audio_codec is not None
+
+    @property
+    def copyable_video(self) -> bool:
+        """Can be stream-copied into a browser-playable MP4 as is."""
+        return self.video_codec == "h264" and self.pix_fmt == "yuv420p" and bool(self.duration)
+
+def probe_file(path: Path, timeout: float = 30) -> MediaInfo:
+    """Blocking MediaEngine.probe, for scripts and process pools."""
+    try:
+        out = subprocess.run([*FFPROBE, str(path)], capture_output=True, timeout=timeout).stdout
+        return MediaInfo.from_ffprobe(json.loads(out or b"{}"))
+    except (OSError, ValueError, subprocess.TimeoutExpired):
+        return MediaInfo()
+
+@dataclass
+class Rendition:
+    """One HLS ladder rung."""
+    height: int
+    video_kbps: int
+
+def hls_ladder(spec: str = None, source_height: Optional[int] = None) -> List[Rendition]:
+    """
+    Parses "height:kbps,..." (settings.HLS_LADDER), tallest first.
+    Rungs taller than the source are dropped; a source shorter than every
+    rung still gets one rendition at its own height.
+    """
+    rungs = sorted(
+        (Rendition(*map(int, item.split(":"))) for item in (spec or settings.HLS_LADDER).split(",") if item.strip()),
+        key=lambda r: r.height, reverse=True,
+    )
+    if not source_height:
+        return rungs
+    fitting = [r for r in rungs if r.height <= source_height]
+    return fitting or [Rendition(source_height, rungs[-1].video_kbps)]
+
+@dataclass(frozen=True)
+class EncodeProfile:
+    """libx264 settings for one output tier."""
+    preset: str
+    crf: int
+    threads: int = 0   # 0 = x264 decides
+    nice: int = 0      # Added to the FFmpeg process' niceness (POSIX)
+
+    def x264(self) -> List[str]:
+        args = ["-c:v", "libx264", "-preset", self.preset, "-crf", str(self.crf)]
+        return args + ["-threads", str(self.threads)] if self.threads else args
+
+def encode_profile(tier: str) -> EncodeProfile:
+    """"preview": fast low-res first playable. "final": gallery quality, run at lower priority."""
+    if tier == "preview":
+        return EncodeProfile(settings.PREVIEW_RENDER_PRESET, settings.PREVIEW_RENDER_CRF, settings.PREVIEW_RENDER_THREADS)
+    return EncodeProfile(settings.FINAL_PRESET, settings.FINAL_CRF, settings.FINAL_THREADS, settings.FINAL_NICE)
+
 class MediaEngine:
-    def stitch_av(self, video_path: Path, audio_path: Path, output_path: Path):
+    """
+    Single FFmpeg execution layer.
+    Jobs run as asyncio subprocesses (never blocking the loop), capped at one
+    encode per CPU core, with progress parsed from `-progress pipe:1`.
+    Final encodes (which run niced) may only fill max_jobs - reserved of the
+    slots, so a fast preview never queues behind them.
+    """
+
+    def __init__(self, max_jobs: int = 0):
+        self.max_jobs = max_jobs or settings.FFMPEG_MAX_JOBS or os.cpu_count() or 1
+        reserved = settings.FFMPEG_PREVIEW_RESERVED_JOBS or max(1, self.max_jobs // 4)
+        self.reserved = min(reserved, self.max_jobs - 1)  # A single slot is shared
+        self._slots = asyncio.Semaphore(self.max_jobs)
+        self._final_slots = asyncio.Semaphore(self.max_jobs - self.reserved)
+        self.progress: Dict[str, float] = {}  # job name -> 0.0..1.0 while running
+
+    async def run(
+        self,
+        args: List[str],
+        job: str,
+        duration: Optional[float] = None,
+        on_progress: Optional[ProgressCallback] = None,
+        tier: Optional[str] = None,
+    ):
         """
-        Merges Audio and Video. 
-        Loops the video to match audio duration.
+        Runs `ffmpeg <args>` and waits for it.
+        `duration` (seconds of output) turns out_time into a 0..1 fraction.
+        `tier` ("preview" / "final") picks the slots it may use and its process priority.
+        Raises MediaEngineError with stderr on a non-zero exit.
         """
-        cmd = [
-            "ffmpeg",
-            "-stream_loop", "-1",
-            "-i", str(video_path),
-            "-i", str(audio_path),
-            "-shortest",
+        cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-nostats", "-progress", "pipe:1", *args]
+        nice = encode_profile(tier).nice if tier else 0
+
+        async with (self._final_slots if tier == "final" else contextlib.nullcontext()), self._slots:
+            proc = await asyncio.create_subprocess_exec(
+                *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+            )
+            if nice:
+                self._renice(proc.pid, nice)
+            # Drain stderr concurrently so a chatty encoder can never fill the pipe and stall.
+            stderr_task = asyncio.create_task(proc.stderr.read())
+            self.progress[job] = 0.0
+            try:
+                async for raw in proc.stdout:
+                    key, _, value = raw.decode(errors="replace").strip().partition("=")
+                    if key == "out_time_us" and duration:
+                        fraction = self._fraction(value, duration)
+                    elif key == "progress" and value == "end":
+                        fraction = 1.0
+                    else:
+                        continue
+                    if fraction is None or fraction == self.progress.get(job):
+                        continue
+                    self.progress[job] = fraction
+                    if on_progress:
+                        result = on_progress(fraction)
+                        if inspect.isawaitable(result):
+                            await result
+                returncode = await proc.wait()
+                stderr = (await stderr_task).decode(errors="replace")
+            finally:
+                # Cancelled, or a progress callback / pipe read failed: never leave the encoder holding a slot
+                if proc.returncode is None:
+                    proc.kill()
+                    await proc.wait()
+                stderr_task.cancel()
+                self.progress.pop(job, None)
+
+        if returncode != 0:
+            raise MediaEngineError(returncode, stderr)
+
+    @staticmethod
+    def _renice(pid: int, nice: int):
+        """
+        Lowers a running encoder's priority. Done from the parent after spawn:
+        preexec_fn is unsafe in a process with threads (asyncio.to_thread).
+        """
+        if not hasattr(os, "setpriority"):
+            return  # Not POSIX
+        try:
+            current = os.getpriority(os.PRIO_PROCESS, pid)
+            os.setpriority(os.PRIO_PROCESS, pid, min(19, current + nice))
+        except OSError as e:
+            logger.debug(f"Could not renice ffmpeg {pid}: {e}")
+
+    async def probe(self, path: Path) -> MediaInfo:
+        """Codec, pixel format and duration via ffprobe. Empty MediaInfo if unreadable."""
+        proc = await asyncio.create_subprocess_exec(
+            *FFPROBE, str(path),
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        )
+        out, _ = await proc.communicate()
+        try:
+            return MediaInfo.from_ffprobe(json.loads(out or b"{}"))
+        except ValueError:
+            return MediaInfo()
+
+    async def stitch_av(
+        self,
+        video_path: Path,
+        audio_path: Path,
+        output_path: Path,
+        on_progress: Optional[ProgressCallback] = None,
+        hls_dir: Optional[Path] = None,
+    ) -> Optional[Path]:
+        """
+        Merges Audio and Video into a faststart MP4.
+        Loops the video to match audio duration, picking the cheapest valid path:
+        1. No audio -> copy the clip as is.
+        2. H.264/yuv420p clip -> stream-copy N loops via a concat list, trimmed to the audio.
+        3. Anything else -> full libx264 re-encode.
+        With `hls_dir`, the same FFmpeg pass also writes an HLS ladder there and
+        the master playlist path is returned. If the ladder fails, the MP4 is
+        retried on its own and None is returned.
+        """
+        if hls_dir is not None:
+            try:
+                return await self._stitch(video_path, audio_path, output_path, on_progress, hls_dir)
+            except MediaEngineError as e:
+                logger.warning(f"⚠️ HLS ladder failed ({e}). Retrying MP4 only.")
+                shutil.rmtree(hls_dir, ignore_errors=True)
+        await self._stitch(video_path, audio_path, output_path, on_progress, None)
+        return None
+
+    async def _stitch(self, video_path, audio_path, output_path, on_progress, hls_dir) -> Optional[Path]:
+        has_audio = audio_path.exists() and os.path.getsize(audio_path) > 100
+
+        if not has_audio:
+            logger.warning("⚠️ Audio missing/empty. Creating silent video.")
+            video = await self.probe(video_path) if hls_dir else MediaInfo()
+            ladder, hls = self._hls_outputs(hls_dir, video.height, audio=None, end=[])
+            args = [
+                "-i", str(video_path),
+                *ladder,
+                "-c", "copy", "-movflags", "+faststart", "-y", str(output_path),
+                *hls,
+            ]
+            await self.run(args, job=output_path.name, duration=video.duration, on_progress=on_progress, tier="final")
+            return self._manifest(hls_dir)
+
+        video, audio = await asyncio.gather(self.probe(video_path), self.probe(audio_path))
+
+        if video.copyable_video and audio.duration:
+            await self._remux_loop(video_path, video, audio_path, audio, output_path, on_progress, hls_dir)
+        else:
+            logger.info(f"🎞️ Re-encoding Audio + Video ({video.video_codec}/{video.pix_fmt}): {output_path.name}")
+            # -shortest alone overshoots by seconds with a looped input: cut at the audio length
+            end = ["-t", f"{audio.duration:.3f}"] if audio.duration else ["-shortest"]
+            ladder, hls = self._hls_outputs(hls_dir, video.height, audio="1:a:0", end=end)
+            args = [
+                *ladder,
+                "-stream_loop", "-1",   # Loop video
+                "-i", str(video_path),  # Input 0
+                "-i", str(audio_path),  # Input 1
+                *end,                   # Stop when audio ends
+                "-map", "0:v:0",
+                "-map", "1:a:0",
+                *encode_profile("final").x264(),  # Re-encode video
+                "-c:a", "aac",          # Encode audio
+                "-b:a", "192k",
+                "-pix_fmt", "yuv420p",
+                "-movflags", "+faststart",
+                "-y",
+                str(output_path),
+                *hls,
+            ]
+            await self.run(args, job=output_path.name, duration=audio.duration, on_progress=on_progress, tier="final")
+        return self._manifest(hls_dir)
+
+    async def _remux_loop(self, video_path, video: MediaInfo, audio_path, audio: MediaInfo, output_path, on_progress, hls_dir=None):
+        """Stream-copies ceil(audio/video) loops of the clip and cuts the tail at the audio length."""
+        loops = max(1, math.ceil(audio.duration / video.duration))
+        logger.info(f"🎞️ Remuxing {loops}x loop + audio (no re-encode): {output_path.name}")
+
+        concat_list = settings.TEMP_DIR / f"{output_path.stem}.concat.txt"
+        concat_list.write_text(self._concat_entry(video_path) * loops)
+
+        audio_codec = ["-c:a", "copy"] if audio.audio_codec == "aac" else ["-c:a", "aac", "-b:a", "192k"]
+        trim = ["-t", f"{audio.duration:.3f}"]
+        ladder, hls = self._hls_outputs(hls_dir, video.height, audio="1:a:0", end=trim)
+        args = [
+            "-f", "concat", "-safe", "0", "-i", str(concat_list),  # Input 0: looped clip
+            "-i", str(audio_path),                                 # Input 1
+            *ladder,
             "-map", "0:v:0",
             "-map", "1:a:0",
-            "-c:v", "libx264", 
-            "-c:a", "aac",
-            "-y", 
+            "-c:v", "copy",
+            *audio_codec,
+            *trim,                                                 # Trimmed tail
+            "-movflags", "+faststart",
+            "-y",
+            str(output_path),
+            *hls,                                                  # Ladder: the only re-encode
+        ]
+        try:
+            await self.run(args, job=output_path.name, duration=audio.duration, on_progress=on_progress, tier="final")
+        finally:
+            concat_list.unlink(missing_ok=True)
+
+    async def render_fast_preview(self, video_path: Path, audio_path: Path, output_path: Path):
+        """
+        First playable: the clip looped under the audio like the final stitch,
+        but scaled down to PREVIEW_RENDER_HEIGHT and encoded with the preview
+        profile, so it is ready in seconds.
+        """
+        has_audio = audio_path.exists() and os.path.getsize(audio_path) > 100
+        height = settings.PREVIEW_RENDER_HEIGHT
+        if has_audio:
+            audio = await self.probe(audio_path)
+            duration = audio.duration
+            inputs = [
+                "-stream_loop", "-1", "-i", str(video_path),
+                "-i", str(audio_path),
+                "-shortest", "-map", "0:v:0", "-map", "1:a:0",
+                "-c:a", "aac", "-b:a", f"{settings.PREVIEW_RENDER_AUDIO_KBPS}k",
+            ]
+        else:
+            duration = (await self.probe(video_path)).duration
+            inputs = ["-i", str(video_path), "-an"]
+        args = [
+            *inputs,
+            "-vf", f"scale=-2:'min({height},ih)'",
+            *encode_profile("preview").x264(),
+            "-pix_fmt", "yuv420p",
+            "-movflags", "+faststart",
+            "-y",
+            str(output_path),
+        ]
+        await self.run(args, job=output_path.name, duration=duration, tier="preview")
+
+    async def render_previews(self, video_path: Path, poster_path: Path, preview_path: Path,
+                              duration: Optional[float] = None):
+        """
+        Gallery artwork in one decode: a JPEG poster and a short looping
+        animated preview (WebP or GIF by extension), both taken from just
+        after the opening frame.
+        """
+        start = min(1.0, duration / 10) if duration else 0.0
+        animated = (
+            ["-c:v", "libwebp", "-lossless", "0", "-quality", "60", "-loop", "0"]
+            if preview_path.suffix == ".webp" else ["-loop", "0"]
+        )
+        args = [
+            "-ss", f"{start:.2f}", "-t", str(settings.PREVIEW_SECONDS),
+            "-i", str(video_path),
+            "-filter_complex",
+            f"[0:v]split=2[p][a];"
+            f"[p]scale={settings.POSTER_WIDTH}:-2[poster];"
+            f"[a]fps={settings.PREVIEW_FPS},scale={settings.PREVIEW_WIDTH}:-2[anim]",
+            "-map", "[poster]", "-frames:v", "1", "-q:v", "4", "-y", str(poster_path),
+            "-map", "[anim]", "-an", *animated, "-y", str(preview_path),
+        ]
+        await self.run(args, job=poster_path.name)
+
+    def _hls_outputs(self, hls_dir: Optional[Path], source_height: Optional[int],
+                     audio: Optional[str], end: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        (filter args, output args) adding an HLS ladder of input 0's video
+        (plus `audio` for every rung) as a second output of the same command.
+        Keyframes are forced on segment boundaries so every rung switches cleanly.
+        """
+        if hls_dir is None:
+            return [], []
+        rungs = hls_ladder(source_height=source_height)
+        hls_dir.mkdir(parents=True, exist_ok=True)
+
+        split = f"[0:v]split={len(rungs)}" + "".join(f"[s{i}]" for i in range(len(rungs)))
+        scales = ";".join(f"[s{i}]scale=-2:{r.height}[v{i}]" for i, r in enumerate(rungs))
+        filters = ["-filter_complex", f"{split};{scales}"]
+
+        args: List[str] = []
+        for i, r in enumerate(rungs):
+            args += ["-map", f"[v{i}]"]
+            args += [f"-b:v:{i}", f"{r.video_kbps}k", f"-maxrate:v:{i}", f"{int(r.video_kbps * 1.1)}k",
+                     f"-bufsize:v:{i}", f"{r.video_kbps * 2}k"]
+        if audio:
+            args += ["-map", audio] * len(rungs) + ["-c:a", "aac", "-b:a", "128k", "-ac", "2"]
+        seconds = settings.HLS_SEGMENT_SECONDS
+        stream_map = " ".join(f"v:{i},a:{i}" if audio else f"v:{i}" for i in range(len(rungs)))
+        args += [
+            "-c:v", "libx264", "-preset", settings.HLS_PRESET, "-pix_fmt", "yuv420p",
+            "-force_key_frames", f"expr:gte(t,n_forced*{seconds})", "-sc_threshold", "0",
+            *end,
+            "-f", "hls",
+            "-hls_time", str(seconds),
+            "-hls_playlist_type", "vod",
+            "-hls_flags", "independent_segments",
+            "-hls_segment_filename", str(hls_dir / "v%v" / "seg_%03d.ts"),
+            "-master_pl_name", HLS_MASTER,
+            "-var_stream_map", stream_map,
+            "-y",
+            str(hls_dir / "v%v" / "index.m3u8"),
+        ]
+        return filters, args
+
+    @staticmethod
+    def _manifest(hls_dir: Optional[Path]) -> Optional[Path]:
+        if hls_dir is None:
+            return None
+        master = hls_dir / HLS_MASTER
+        return master if master.exists() else None
+
+    async def concat_audio(self, parts: List[Path], output_path: Path):
+        """Joins same-codec audio files end to end, stream-copied (no re-encode, no gaps)."""
+        concat_list = settings.TEMP_DIR / f"{output_path.stem}.parts.txt"
+        concat_list.write_text("".join(self._concat_entry(part) for part in parts))
+        args = [
+            "-f", "concat", "-safe", "0", "-i", str(concat_list),
+            "-map", "0:a:0",
+            "-c", "copy",
+            "-y",
             str(output_path)
         ]
-        
         try:
-            logger.info(f"🎞️ Stitching media: {output_path.name}")
-            subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            return True
-        except subprocess.CalledProcessError as e:
-            logger.error(f"FFmpeg Error: {e}")
-            return False
-
-media_engine = MediaEngine()
\ No newline at end of file
+            await self.run(args, job=output_path.name)
+        finally:
+            concat_list.unlink(missing_ok=True)
+
+    @staticmethod
+    def _concat_entry(path: Path) -> str:
+        return "file '{}'\n".format(str(path.resolve()).replace("'", "'\\''"))
+
+    @staticmethod
+    def _fraction(out_time_us: str, duration: float) -> Optional[float]:
+        try:
+            seconds = int(out_time_us) / 1_000_000
+        except ValueError:  # "N/A" before the first frame
+            return None
+        return round(min(max(seconds / duration, 0.0), 1.0), 2)
+
+media_engine = MediaEngine()
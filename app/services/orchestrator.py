@@ -1,14 +1,18 @@
 import asyncio
-import subprocess
 import logging
-import os
 import shutil
-from sqlalchemy.orm import Session
+import time
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
+from app.core.metrics import DB_COMMIT_SECONDS, IN_FLIGHT, STAGE_SECONDS, TASK_FAILURES, TASK_SECONDS, Timer
 from app.providers.audio import audio_provider
 from app.providers.visual import visual_provider
+from app.services.media_engine import media_engine
+from app.services.storage import discard, task_dir
+from app.services.events import event_bus, is_terminal, task_event
+from app.services.task_state import task_states
 from app.db.models import Task
-from app.db.session import SessionLocal
+from app.db.session import AsyncSessionLocal
 
 logger = logging.getLogger("Foundry.Orchestrator")
 
@@ -20,37 +24,54 @@ class Orchestrator:
         2. Uses the Monologue (or Prompt fallback) for Audio.
         3. Stitches them together.
         """
-        db: Session = SessionLocal()
-        task = db.query(Task).filter(Task.id == task_id).first()
-        
-        if not task:
-            logger.error(f"Task {task_id} not found in DB.")
-            return
+        async with AsyncSessionLocal() as db:
+            task = await db.get(Task, task_id)
+
+            if not task:
+                logger.error(f"Task {task_id} not found in DB.")
+                return
+
+            await self._run(db, task)
+
+    async def _run(self, db: AsyncSession, task: Task):
+        task_id = task.id
+        started = time.perf_counter()
 
         try:
             # --- 1. UPDATE STATUS ---
             logger.info(f"🚀 Starting Task {task_id}")
             task.status = "PROCESSING"
-            db.commit()
+            await self._report(db, task, "REFINING", 5)
             
             # Define Paths
             raw_vid = settings.TEMP_DIR / f"{task_id}_raw.mp4"
             audio = settings.TEMP_DIR / f"{task_id}.mp3"
-            final = settings.OUTPUT_DIR / f"{task_id}_final.mp4" # <--- This is where the gallery looks
+            final = task_dir(task_id) / f"{task_id}_final.mp4" # <--- This is where the gallery looks
 
             # --- 2. PREPARE CONTENT ---
             # A. Refine Visuals
-            refined_visual = await visual_provider.refine(task.prompt, task.style)
+            refined_visual = await self._timed(task, "refine", visual_provider.refine(task.prompt, task.style))
             logger.info(f"✨ Visual Refined: {refined_visual}")
 
             # B. Prepare Audio Script
             audio_script = task.monologue if task.monologue and task.monologue.strip() else task.prompt
 
             # --- 3. PARALLEL GENERATION ---
-            v_ok, a_ok = await asyncio.gather(
-                visual_provider.generate_video(refined_visual, raw_vid),
-                audio_provider.generate(audio_script, audio, task.is_paid_voice)
-            )
+            await self._report(db, task, "GENERATING_VIDEO", 15)
+            video_job = asyncio.ensure_future(self._timed(task, "video", visual_provider.generate_video(
+                refined_visual, raw_vid,
+                resume=task.veo_operation,
+                on_started=lambda name: self._remember_operation(db, task, name),
+                fresh=bool(task.fresh_video),
+            )))
+            audio_job = asyncio.ensure_future(self._timed(task, "audio", audio_provider.generate(audio_script, audio, task.is_paid_voice)))
+            try:
+                v_ok = await video_job
+                if not audio_job.done():
+                    await self._report(db, task, "GENERATING_AUDIO", 50)
+                task.audio_provider_used = await audio_job
+            finally:
+                audio_job.cancel()  # No-op once finished; stops orphaned TTS if video failed
 
             if not v_ok:
                 raise Exception("Video Generation Failed")
@@ -70,43 +91,103 @@ class Orchestrator:
                 
                 task.final_output = str(final)
             else:
-                self._stitch(raw_vid, audio, final)
-                task.status = "COMPLETED"
+                if settings.PREVIEW_RENDER_ENABLED:
+                    await self._preview(db, task, raw_vid, audio)
+                await self._report(db, task, "STITCHING", 60)
+                hls_dir = task_dir(task_id) / f"{task_id}_hls" if settings.HLS_ENABLED else None
+                manifest = await self._timed(task, "stitch", media_engine.stitch_av(
+                    raw_vid, audio, final,
+                    on_progress=lambda f: self._report(db, task, "STITCHING", 60 + 35 * f, step=5),
+                    hls_dir=hls_dir,
+                ))
                 task.final_output = str(final)
+                task.hls_manifest = str(manifest) if manifest else None
+
+                # --- 5. GALLERY METADATA & PREVIEWS ---
+                await self._report(db, task, "THUMBNAILS", 96)
+                await self._describe(task, final)
+                task.status = "COMPLETED"
+
+            task.stage, task.progress = "COMPLETED", 100
+            discard(raw_vid, audio)  # Failed jobs keep theirs for debugging until TEMP_TTL_SECONDS
 
         except Exception as e:
             logger.error(f"❌ Task Failed: {e}")
+            TASK_FAILURES.labels(stage=task.stage or "UNKNOWN", error=type(e).__name__).inc()
             task.status = "FAILED"
+            task.stage = "FAILED"
         finally:
-            db.commit()
-            db.close()
+            task.total_seconds = round(time.perf_counter() - started, 3)
+            outcome = "failed" if task.status == "FAILED" else "completed" if is_terminal(task.status) else "interrupted"
+            TASK_SECONDS.labels(outcome=outcome).observe(task.total_seconds)
+            await self._commit(db)
+            self._publish(task)
+
+    async def _preview(self, db: AsyncSession, task: Task, raw_vid, audio):
+        """Renders the fast low-res cut so the user can watch it during the final encode. Never fails the task."""
+        await self._report(db, task, "PREVIEW", 55)
+        preview = task_dir(task.id) / f"{task.id}_preview.mp4"
+        try:
+            with Timer(STAGE_SECONDS, stage="preview"):
+                await media_engine.render_fast_preview(raw_vid, audio, preview)
+            task.preview_output = str(preview)  # Published with the STITCHING report that follows
+        except Exception as e:
+            logger.warning(f"⚠️ Fast preview skipped for {task.id}: {e}")
 
-    def _stitch(self, video, audio, output):
+    async def _describe(self, task: Task, final):
+        """Stores media metadata, poster and animated preview. Never fails the task."""
+        try:
+            with Timer(STAGE_SECONDS, stage="thumbnails"):
+                info = await media_engine.probe(final)
+                task.duration_seconds = info.duration
+                task.width, task.height = info.width, info.height
+                task.file_size_bytes = final.stat().st_size
+                bit_rate = info.bit_rate or (task.file_size_bytes * 8 / info.duration if info.duration else None)
+                task.bitrate_kbps = int(bit_rate // 1000) if bit_rate else None
+                task.has_audio = info.has_audio
+
+                if settings.PREVIEWS_ENABLED:
+                    thumbs = task_dir(task.id, settings.THUMB_DIR)
+                    poster = thumbs / f"{task.id}.jpg"
+                    preview = thumbs / f"{task.id}.{settings.PREVIEW_FORMAT}"
+                    await media_engine.render_previews(final, poster, preview, info.duration)
+                    task.poster_path, task.animated_preview = str(poster), str(preview)
+        except Exception as e:
+            logger.warning(f"⚠️ Gallery previews skipped for {task.id}: {e}")
+
+    async def _timed(self, task: Task, stage: str, coro):
+        """Awaits one stage, recording its duration on the task and in the stage histogram."""
+        timer = Timer(STAGE_SECONDS, stage=stage)
+        try:
+            with IN_FLIGHT.labels(stage=stage).track_inprogress(), timer:
+                return await coro
+        finally:
+            setattr(task, f"{stage}_seconds", round(timer.elapsed, 3))
+
+    async def _remember_operation(self, db: AsyncSession, task: Task, name):
+        """Persists the Veo operation so a requeued attempt resumes it rather than rendering again."""
+        task.veo_operation = name
+        await self._commit(db)
+
+    async def _commit(self, db: AsyncSession):
+        with Timer(DB_COMMIT_SECONDS):
+            await db.commit()
+
+    async def _report(self, db: AsyncSession, task: Task, stage: str, progress: float, step: float = 0):
         """
-        Merges Audio and Video using FFmpeg.
+        Persists and publishes a stage/progress change.
+        With `step`, progress updates smaller than `step` points are skipped.
         """
-        has_audio = audio.exists() and os.path.getsize(audio) > 100
-
-        if not has_audio:
-            logger.warning("⚠️ Audio missing/empty. Creating silent video.")
-            cmd = ["ffmpeg", "-i", str(video), "-c", "copy", "-y", str(output)]
-        else:
-            logger.info("🎞️ Stitching Audio + Video...")
-            cmd = [
-                "ffmpeg",
-                "-stream_loop", "-1",   # Loop video
-                "-i", str(video),       # Input 0
-                "-i", str(audio),       # Input 1
-                "-shortest",            # Stop when audio ends
-                "-c:v", "libx264",      # Re-encode video
-                "-c:a", "aac",          # Encode audio
-                "-b:a", "192k",
-                "-pix_fmt", "yuv420p",
-                "-y",
-                str(output)
-            ]
-        
-        # Run FFmpeg
-        subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
-
-orchestrator = Orchestrator()
\ No newline at end of file
+        progress = round(progress, 1)
+        if task.stage == stage and abs(progress - (task.progress or 0)) < max(step, 0.1):
+            return
+        task.stage, task.progress = stage, progress
+        await self._commit(db)
+        self._publish(task)
+
+    def _publish(self, task: Task):
+        """Write-through to the task state registry, then to live subscribers."""
+        task_states.put(task)
+        event_bus.publish(task_event(task))
+
+orchestrator = Orchestrator()
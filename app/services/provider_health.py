@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Set
+from sqlalchemy import and_, delete, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.resilience import CircuitBreaker, breaker_states, on_breaker_change
+from app.db.models import ProviderHealth, utcnow
+from app.db.session import AsyncSessionLocal
+
+logger = logging.getLogger("Foundry.ProviderHealth")
+
+_SEVERITY = {"closed": 0, "half_open": 1, "open": 2}
+
+def _aware(value: datetime) -> datetime:
+    return value.replace(tzinfo=value.tzinfo or timezone.utc)
+
+def _process_gone(process: str) -> bool:
+    """True for a host:pid of this host that is no longer running."""
+    host, _, pid = process.rpartition(":")
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        pass  # Exists, owned by someone else
+    return False
+
+class ProviderHealthRecorder:
+    """
+    Breakers live in each worker process; this records every transition in
+    `provider_health` so the API can report them (GET /api/v1/providers).
+    Writes happen only on transitions, never on the call path, so rows of
+    dead processes (same host) and transitions older than
+    PROVIDER_HEALTH_STALE_SECONDS are pruned when reported, unless the
+    breaker is still inside its open window.
+    """
+
+    def __init__(self):
+        self.process = f"{socket.gethostname()}:{os.getpid()}"
+        self._writes: Set[asyncio.Task] = set()
+        self._installed = False
+
+    def install(self):
+        if not self._installed:
+            self.process = f"{socket.gethostname()}:{os.getpid()}"  # After any fork/spawn
+            on_breaker_change(self._on_change)
+            self._installed = True
+
+    def _on_change(self, breaker: CircuitBreaker):
+        try:
+            write = asyncio.get_running_loop().create_task(self._record(breaker.name, breaker.snapshot()))
+        except RuntimeError:
+            return  # No loop (sync caller); the in-process view still has it
+        self._writes.add(write)
+        write.add_done_callback(self._writes.discard)
+
+    async def _record(self, provider: str, snapshot: dict):
+        retry_at = snapshot["retry_at"]
+        try:
+            async with AsyncSessionLocal() as db:
+                await db.merge(ProviderHealth(
+                    provider=provider, process=self.process,
+                    state=snapshot["state"], failures=snapshot["failures"], last_error=snapshot["last_error"],
+                    retry_at=datetime.fromtimestamp(retry_at, tz=timezone.utc) if retry_at else None,
+                    updated_at=utcnow(),
+                ))
+                await db.commit()
+        except Exception as e:
+            logger.warning(f"⚠️ Could not record {provider} breaker state: {e}")
+
+    async def report(self, db: AsyncSession) -> Dict[str, dict]:
+        """Worst state per provider across processes, plus each process' last transition."""
+        now = utcnow()
+        stale_before = now - timedelta(seconds=settings.PROVIDER_HEALTH_STALE_SECONDS)
+        rows: Dict[str, List[dict]] = {}
+        pruned = []
+        for row in (await db.execute(select(ProviderHealth))).scalars():
+            state = row.state
+            retry_at = _aware(row.retry_at) if row.retry_at else None
+            still_open = state == "open" and retry_at is not None and retry_at > now
+            if row.process != self.process and (
+                _process_gone(row.process) or (_aware(row.updated_at) < stale_before and not still_open)
+            ):
+                pruned.append((row.provider, row.process))
+                continue
+            if state == "open" and retry_at and retry_at <= now:
+                state = "half_open"  # Cool-down over (or the process is gone); next call is a trial
+            rows.setdefault(row.provider, []).append({
+                "process": row.process, "state": state, "failures": row.failures,
+                "last_error": row.last_error, "retry_at": retry_at, "updated_at": row.updated_at,
+            })
+
+        if pruned:
+            await db.execute(delete(ProviderHealth).where(or_(
+                *(and_(ProviderHealth.provider == p, ProviderHealth.process == proc) for p, proc in pruned)
+            )))
+            await db.commit()
+
+        local = breaker_states()  # This process' guards, recorded or not
+        report = {}
+        for provider in sorted(set(rows) | set(local)):
+            processes = rows.get(provider, [])
+            states = [p["state"] for p in processes]
+            if not any(p["process"] == self.process for p in processes):
+                states.append(local.get(provider, {}).get("state", "closed"))
+            report[provider] = {
+                "state": max(states, key=_SEVERITY.__getitem__, default="closed"),
+                "processes": processes,
+            }
+        return report
+
+provider_health = ProviderHealthRecorder()
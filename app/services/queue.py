@@ -0,0 +1,122 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import or_, and_, case, update, select, func
+from app.core.config import settings
+from app.db.models import Task, utcnow
+from app.db.session import AsyncSessionLocal
+
+logger = logging.getLogger("Foundry.Queue")
+
+class TaskQueue:
+    """
+    Durable job queue backed by the `tasks` table.
+
+    A worker claims a task by taking a lease on it (status -> PROCESSING,
+    worker_id, lease_expires_at). The lease is extended by heartbeats while
+    the job runs. If a worker dies, its lease expires and the task becomes
+    claimable again, up to QUEUE_MAX_ATTEMPTS.
+    """
+
+    def _claimable(self, now: datetime):
+        return or_(
+            Task.status == "QUEUED",
+            and_(
+                Task.status == "PROCESSING",
+                or_(Task.lease_expires_at.is_(None), Task.lease_expires_at < now),
+            ),
+        )
+
+    async def claim(self, worker_id: str) -> Optional[str]:
+        """Leases the oldest claimable task to `worker_id`. Returns its id, or None."""
+        async with AsyncSessionLocal() as db:
+            now = utcnow()
+            await self._fail_exhausted(db, now)
+
+            candidates = (await db.execute(
+                select(Task.id)
+                .where(self._claimable(now))
+                .order_by(Task.created_at, Task.id)
+                .limit(5)
+            )).scalars().all()
+
+            for task_id in candidates:
+                # Compare-and-set: only one worker can win the row.
+                result = await db.execute(
+                    update(Task)
+                    .where(Task.id == task_id, self._claimable(now))
+                    .values(
+                        status="PROCESSING",
+                        worker_id=worker_id,
+                        lease_expires_at=now + timedelta(seconds=settings.QUEUE_LEASE_SECONDS),
+                        heartbeat_at=now,
+                        attempts=func.coalesce(Task.attempts, 0) + 1,
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+                if result.rowcount == 1:
+                    return task_id
+            return None
+
+    async def heartbeat(self, task_id: str, worker_id: str) -> bool:
+        """Extends the lease. Returns False if the lease was lost to another worker."""
+        async with AsyncSessionLocal() as db:
+            now = utcnow()
+            result = await db.execute(
+                update(Task)
+                .where(Task.id == task_id, Task.worker_id == worker_id, Task.status == "PROCESSING")
+                .values(
+                    lease_expires_at=now + timedelta(seconds=settings.QUEUE_LEASE_SECONDS),
+                    heartbeat_at=now,
+                )
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+            return result.rowcount == 1
+
+    async def release(self, task_id: str, worker_id: str):
+        """Drops the lease once the orchestrator has written a final status."""
+        await self._update_owned(task_id, worker_id, {"worker_id": None, "lease_expires_at": None})
+
+    async def requeue(self, task_id: str, worker_id: str):
+        """Hands an interrupted task back to the queue (e.g. on worker shutdown)."""
+        await self._update_owned(task_id, worker_id, {
+            "status": "QUEUED",
+            "worker_id": None,
+            "lease_expires_at": None,
+            "attempts": case((Task.attempts > 0, Task.attempts - 1), else_=0),  # Shutdown is not a failed attempt
+        })
+
+    async def depth(self) -> int:
+        """Number of tasks waiting for a worker."""
+        async with AsyncSessionLocal() as db:
+            return (await db.execute(select(func.count()).select_from(Task).where(Task.status == "QUEUED"))).scalar_one()
+
+    async def _update_owned(self, task_id: str, worker_id: str, values: dict):
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(Task)
+                .where(Task.id == task_id, Task.worker_id == worker_id)
+                .values(values)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+    async def _fail_exhausted(self, db, now: datetime):
+        """Stops retrying tasks whose lease expired too many times."""
+        result = await db.execute(
+            update(Task)
+            .where(
+                Task.status == "PROCESSING",
+                or_(Task.lease_expires_at.is_(None), Task.lease_expires_at < now),
+                func.coalesce(Task.attempts, 0) >= settings.QUEUE_MAX_ATTEMPTS,
+            )
+            .values(status="FAILED", worker_id=None, lease_expires_at=None)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            logger.warning(f"⚠️ Gave up on {result.rowcount} task(s) after {settings.QUEUE_MAX_ATTEMPTS} attempts.")
+        await db.commit()
+
+task_queue = TaskQueue()
@@ -0,0 +1,219 @@
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import insert, select, update
+from app.core.config import settings
+from app.db.models import Task, utcnow
+from app.db.session import SessionLocal
+from app.services.media_engine import HLS_MASTER, probe_file
+from app.services.task_state import task_states
+
+logger = logging.getLogger("Foundry.Reconcile")
+
+FINAL_SUFFIX = "_final.mp4"
+PROBE_CHUNK = 16  # Videos per pool task; also bounds how long a stop waits for in-flight probes
+
+class ReconcileStopped(Exception):
+    """The stop event was set; nothing after the last finished step was written."""
+
+def _describe(path: str) -> Optional[dict]:
+    """Row values for a recovered video (runs in a worker process). None if it was deleted since the scan."""
+    info = probe_file(Path(path))
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:  # E.g. evicted by the storage janitor
+        return None
+    bit_rate = info.bit_rate or (st.st_size * 8 / info.duration if info.duration else None)
+    return {
+        "duration_seconds": info.duration,
+        "width": info.width,
+        "height": info.height,
+        "bitrate_kbps": int(bit_rate // 1000) if bit_rate else None,
+        "file_size_bytes": st.st_size,
+        "has_audio": info.has_audio,
+        "created_at": datetime.fromtimestamp(st.st_mtime, tz=timezone.utc),
+    }
+
+def _describe_many(paths: List[str]) -> List[dict]:
+    return [_describe(path) for path in paths]
+
+def _batches(items: List, size: int) -> Iterable[List]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+class GalleryReconciler:
+    """
+    Brings the `tasks` table and OUTPUT_DIR back in line.
+
+    - Videos on disk without a row are restored as COMPLETED placeholders
+      (metadata probed in parallel, rows bulk-inserted in batches).
+    - Rows whose video is gone are marked expired; rows whose video is back
+      are un-expired.
+
+    A checkpoint remembers each directory's mtime and the videos it held, so
+    later runs only list directories that changed since.
+
+    `stop` (a threading.Event) is checked while probing, between insert
+    batches and between steps;
+    once set, queued probes are cancelled and the run ends without writing.
+    """
+
+    def __init__(self, checkpoint: Path = None):
+        self.checkpoint = checkpoint or settings.RECONCILE_CHECKPOINT
+
+    def run(self, full: bool = False, reverse: bool = True, stop: Optional[threading.Event] = None) -> dict:
+        stop = stop or threading.Event()
+        manifest = {} if full else self._load_checkpoint()
+        on_disk, manifest, rescanned = self._scan(manifest)
+
+        with SessionLocal() as db:
+            rows = db.execute(select(Task.id, Task.final_output, Task.expired_at.is_not(None))).all()  # One query
+            known = {task_id: expired for task_id, _, expired in rows}
+
+            missing = sorted(on_disk.keys() - known.keys())
+            restored = self._restore(db, missing, on_disk, stop) if missing else 0
+
+            gone = back = []
+            if stop.is_set():
+                raise ReconcileStopped()
+            if reverse:
+                # Only finished rows can lose a file; re-check each so a job that finished mid-scan isn't flagged
+                gone = [
+                    task_id for task_id, output, was_expired in rows
+                    if output and not was_expired and task_id not in on_disk and not os.path.exists(output)
+                ]
+                back = [i for i, was_expired in known.items() if was_expired and i in on_disk]
+                self._set_expired(db, gone, utcnow())
+                self._set_expired(db, back, None)
+            db.commit()
+        for task_id in gone + back:
+            task_states.discard(task_id)  # After the commit, so a poll in between can't re-cache the old row
+
+        self._save_checkpoint(manifest)
+        summary = {
+            "videos": len(on_disk), "dirs_rescanned": rescanned,
+            "restored": restored, "expired": len(gone), "revived": len(back),
+        }
+        logger.info(f"🗂️ Gallery reconciled: {summary}")
+        return summary
+
+    # --- Disk ---
+
+    def _scan(self, manifest: Dict[str, dict]):
+        """Returns ({task_id: path}, new manifest, directories listed)."""
+        root = settings.OUTPUT_DIR
+        dirs = {"": root}
+        previous_root = manifest.get("")
+        if previous_root and previous_root["mtime_ns"] == root.stat().st_mtime_ns:
+            dirs.update({name: root / name for name in manifest if name})
+        else:
+            dirs.update({e.name: Path(e.path) for e in os.scandir(root) if e.is_dir() and len(e.name) == 2})
+
+        on_disk: Dict[str, Path] = {}
+        fresh: Dict[str, dict] = {}
+        rescanned = 0
+        for name, path in dirs.items():
+            try:
+                mtime = path.stat().st_mtime_ns
+            except FileNotFoundError:
+                continue
+            entry = manifest.get(name)
+            if entry is None or entry["mtime_ns"] != mtime:
+                ids = [e.name[:-len(FINAL_SUFFIX)] for e in os.scandir(path) if e.name.endswith(FINAL_SUFFIX)]
+                entry = {"mtime_ns": mtime, "ids": ids}
+                rescanned += 1
+            fresh[name] = entry
+            for task_id in entry["ids"]:
+                on_disk[task_id] = path / f"{task_id}{FINAL_SUFFIX}"
+        return on_disk, fresh, rescanned
+
+    def _load_checkpoint(self) -> Dict[str, dict]:
+        try:
+            data = json.loads(self.checkpoint.read_text())
+            return data["dirs"] if str(settings.OUTPUT_DIR) == data.get("root") else {}
+        except (OSError, ValueError, KeyError):
+            return {}
+
+    def _save_checkpoint(self, manifest: Dict[str, dict]):
+        self.checkpoint.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.checkpoint.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"root": str(settings.OUTPUT_DIR), "dirs": manifest}))
+        os.replace(tmp, self.checkpoint)
+
+    # --- DB ---
+
+    def _probe(self, paths: List[str], stop: threading.Event) -> List[Optional[dict]]:
+        """Metadata for `paths`, probed in parallel processes. Raises ReconcileStopped once `stop` is set."""
+        workers = settings.RECONCILE_PROBE_WORKERS or os.cpu_count() or 1
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            futures = [pool.submit(_describe_many, chunk) for chunk in _batches(paths, PROBE_CHUNK)]
+            pending = set(futures)
+            while pending:
+                if stop.is_set():
+                    raise ReconcileStopped()
+                _, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            return [meta for future in futures for meta in future.result()]
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)  # On stop: drops queued chunks, waits for running ones
+
+    def _restore(self, db, task_ids: List[str], on_disk: Dict[str, Path], stop: threading.Event) -> int:
+        logger.info(f"🎥 Restoring {len(task_ids)} videos missing from the DB...")
+        paths = [str(on_disk[i]) for i in task_ids]
+        described = self._probe(paths, stop)
+
+        rows = []
+        for task_id, path, meta in zip(task_ids, paths, described):
+            if meta is None:
+                logger.info(f"⏭️ {path} vanished before it was probed, skipping")
+                continue
+            hls = Path(path).parent / f"{task_id}_hls" / HLS_MASTER
+            rows.append({
+                "id": task_id,
+                # The original prompt/monologue are lost with the row; keep placeholders
+                "prompt": "[Restored from Archive]",
+                "monologue": "[Metadata Lost]",
+                "style": "Unknown",
+                "is_paid_voice": False,
+                "status": "COMPLETED",
+                "stage": "COMPLETED",
+                "progress": 100.0,
+                "final_output": path,
+                "hls_manifest": str(hls) if hls.exists() else None,
+                **meta,
+            })
+        for batch in _batches(rows, settings.RECONCILE_BATCH_SIZE):
+            if stop.is_set():
+                raise ReconcileStopped()  # Caller rolls back the batches already sent
+            db.execute(insert(Task), batch)
+        return len(rows)
+
+    def _set_expired(self, db, task_ids: List[str], value) -> int:
+        for batch in _batches(task_ids, settings.RECONCILE_BATCH_SIZE):
+            db.execute(
+                update(Task).where(Task.id.in_(batch)).values(expired_at=value)
+                .execution_options(synchronize_session=False)
+            )
+        return len(task_ids)
+
+async def reconcile_in_background():
+    """Startup hook: reconciles off the event loop so serving isn't held up. Cancelling stops the run."""
+    stop = threading.Event()
+    try:
+        await asyncio.to_thread(gallery_reconciler.run, stop=stop)
+    except asyncio.CancelledError:
+        stop.set()  # The thread cancels queued probes and returns without writing
+        raise
+    except ReconcileStopped:
+        logger.info("🛑 Gallery reconciliation stopped.")
+    except Exception as e:
+        logger.warning(f"⚠️ Gallery reconciliation failed: {e}")
+
+gallery_reconciler = GalleryReconciler()
@@ -0,0 +1,184 @@
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+from sqlalchemy import update
+from app.core.config import settings
+from app.db.models import Task, utcnow
+from app.db.session import AsyncSessionLocal
+from app.services.task_state import task_states
+
+logger = logging.getLogger("Foundry.Storage")
+
+def shard(task_id: str) -> str:
+    return hashlib.sha1(task_id.encode("utf-8")).hexdigest()[:2]
+
+def task_dir(task_id: str, root: Optional[Path] = None) -> Path:
+    """<root>/<2 hex chars>/ for a task's files (256 shards keep directories short)."""
+    path = (root or settings.OUTPUT_DIR) / shard(task_id)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+def media_url(path: Optional[str], root: Path = settings.OUTPUT_DIR, mount: str = "/videos",
+              version: Optional[int] = None) -> Optional[str]:
+    """
+    Public URL of a file under `root` (OUTPUT_DIR -> /videos, THUMB_DIR -> /thumbs).
+    `version` is appended as ?v=, which /thumbs caches as immutable.
+    """
+    if not path:
+        return None
+    try:
+        relative = Path(path).relative_to(root)
+    except ValueError:  # Legacy rows: flat files, path recorded elsewhere
+        relative = Path(Path(path).name)
+    url = f"{mount}/{relative.as_posix()}"
+    return url if version is None else f"{url}?v={version}"
+
+def touch(path: Path):
+    """Marks a file as just viewed (atime only, so HTTP validators built on mtime stay stable)."""
+    try:
+        os.utime(path, (time.time(), path.stat().st_mtime))
+    except OSError:
+        pass
+
+def discard(*paths: Path):
+    for path in paths:
+        path.unlink(missing_ok=True)
+
+@dataclass
+class OutputGroup:
+    """Everything OUTPUT_DIR holds for one task: the MP4s (final and preview) and its HLS ladder."""
+    task_id: str
+    size: int = 0
+    last_access: float = 0.0
+    last_modified: float = 0.0
+    paths: List[Path] = field(default_factory=list)
+
+class StorageJanitor:
+    """
+    Keeps local_storage bounded:
+
+    1. TEMP_DIR files untouched for TEMP_TTL_SECONDS (failed or abandoned
+       jobs) are deleted. Successful jobs clean up after themselves.
+    2. When OUTPUT_DIR exceeds OUTPUT_QUOTA_BYTES, whole task outputs are
+       evicted least-recently-viewed first (the /videos mount bumps atime)
+       down to 90% of the quota, and the tasks are marked expired so the
+       gallery can say so instead of serving a 404.
+    """
+
+    def __init__(self):
+        self.evictions = 0
+
+    async def run(self):
+        while True:
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.warning(f"⚠️ Storage sweep failed: {e}")
+            await asyncio.sleep(settings.JANITOR_INTERVAL_SECONDS)
+
+    async def sweep(self) -> dict:
+        removed = await asyncio.to_thread(self._sweep_temp)
+        evicted = await asyncio.to_thread(self._enforce_quota)
+        if evicted:
+            await self._mark_expired(evicted)
+        if removed or evicted:
+            logger.info(f"🧹 Storage sweep: {removed} temp files removed, {len(evicted)} outputs expired")
+        return {"temp_removed": removed, "expired": evicted}
+
+    # --- Temp ---
+
+    def _sweep_temp(self) -> int:
+        cutoff = time.time() - settings.TEMP_TTL_SECONDS
+        removed = 0
+        for entry in os.scandir(settings.TEMP_DIR):
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+                    removed += 1
+            except FileNotFoundError:  # Raced with the job that owns it
+                continue
+        return removed
+
+    # --- Outputs ---
+
+    def _scan_outputs(self) -> Dict[str, OutputGroup]:
+        """Groups OUTPUT_DIR (flat legacy files and shards) by task id."""
+        groups: Dict[str, OutputGroup] = {}
+
+        def add(entry: os.DirEntry):
+            name = entry.name
+            if entry.is_dir() and name.endswith("_hls"):
+                files = [e for e in os.scandir(entry.path)]
+                files += [f for d in files if d.is_dir() for f in os.scandir(d.path)]
+                stats = [(f, f.stat()) for f in files if f.is_file()]
+                master = Path(entry.path) / "master.m3u8"
+                access = master.stat().st_atime if master.exists() else 0.0
+                size = sum(st.st_size for _, st in stats)
+                modified = max((st.st_mtime for _, st in stats), default=0.0)
+            elif entry.is_file() and name.endswith(("_final.mp4", "_preview.mp4")):
+                st = entry.stat()
+                access, size, modified = st.st_atime, st.st_size, st.st_mtime
+            else:
+                return
+            group = groups.setdefault(name.split("_", 1)[0], OutputGroup(name.split("_", 1)[0]))
+            group.size += size
+            group.last_access = max(group.last_access, access)
+            group.last_modified = max(group.last_modified, modified)
+            group.paths.append(Path(entry.path))
+
+        for entry in os.scandir(settings.OUTPUT_DIR):
+            try:
+                if entry.is_dir() and len(entry.name) == 2:  # Shard
+                    for child in os.scandir(entry.path):
+                        add(child)
+                else:
+                    add(entry)
+            except FileNotFoundError:
+                continue
+        return groups
+
+    def _enforce_quota(self) -> List[str]:
+        if settings.OUTPUT_QUOTA_BYTES <= 0:
+            return []
+        groups = self._scan_outputs()
+        total = sum(g.size for g in groups.values())
+        if total <= settings.OUTPUT_QUOTA_BYTES:
+            return []
+
+        target = int(settings.OUTPUT_QUOTA_BYTES * 0.9)
+        fresh = time.time() - settings.OUTPUT_MIN_AGE_SECONDS  # Never evict work still being written/served first
+        evicted = []
+        for group in sorted(groups.values(), key=lambda g: g.last_access):
+            if total <= target:
+                break
+            if group.last_modified > fresh:
+                continue
+            for path in group.paths:
+                if path.is_dir():
+                    shutil.rmtree(path, ignore_errors=True)
+                else:
+                    path.unlink(missing_ok=True)
+            total -= group.size
+            evicted.append(group.task_id)
+        self.evictions += len(evicted)
+        return evicted
+
+    async def _mark_expired(self, task_ids: List[str]):
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(Task)
+                .where(Task.id.in_(task_ids))
+                .values(expired_at=utcnow())
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        for task_id in task_ids:
+            task_states.discard(task_id)  # Cached records still point at the deleted files
+
+janitor = StorageJanitor()
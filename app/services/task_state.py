@@ -0,0 +1,198 @@
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+from app.core.config import settings
+from app.core.metrics import TASK_STATE_READS
+
+logger = logging.getLogger("Foundry.TaskState")
+
+def is_terminal(status: Optional[str]) -> bool:
+    return bool(status) and (status.startswith("COMPLETED") or status == "FAILED")
+
+class TaskState:
+    """The fields a status poll returns (see task_event), without an ORM object behind them."""
+    __slots__ = ("id", "status", "stage", "progress", "final_output", "preview_output", "updated_at")
+
+    def __init__(self, id: str, status: Optional[str], stage: Optional[str], progress: Optional[float],
+                 final_output: Optional[str], preview_output: Optional[str], updated_at: float):
+        self.id = id
+        self.status = status
+        self.stage = stage
+        self.progress = progress
+        self.final_output = final_output
+        self.preview_output = preview_output
+        self.updated_at = updated_at
+
+    @classmethod
+    def of(cls, task) -> "TaskState":
+        return cls(task.id, task.status, task.stage, task.progress, task.final_output,
+                   getattr(task, "preview_output", None), time.time())
+
+    @property
+    def terminal(self) -> bool:
+        return is_terminal(self.status)
+
+    def to_list(self) -> list:
+        return [getattr(self, name) for name in self.__slots__]
+
+class MemoryBackend:
+    """This process only. Enough when the API runs the jobs (embedded worker) or for terminal states."""
+
+    def __init__(self, max_entries: int = settings.TASK_STATE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._states: "OrderedDict[str, TaskState]" = OrderedDict()
+
+    def get(self, task_id: str) -> Optional[TaskState]:
+        state = self._states.get(task_id)
+        if state is not None:
+            self._states.move_to_end(task_id)
+        return state
+
+    def put(self, state: TaskState):
+        self._states[state.id] = state
+        self._states.move_to_end(state.id)
+        while len(self._states) > self.max_entries:
+            self._states.popitem(last=False)  # Least recently read/written
+
+    def delete(self, task_id: str):
+        self._states.pop(task_id, None)
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+class FileBackend:
+    """
+    One small JSON file per task in a directory shared by the API and worker
+    processes on a host: a local stand-in for a shared store such as Redis.
+    Writes are atomic (tmp + rename), so readers never see a partial record.
+    """
+
+    PRUNE_EVERY = 256  # Writes between sweeps of records past the terminal TTL
+
+    def __init__(self, root: Path = settings.TASK_STATE_DIR):
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._writes = 0
+
+    def _path(self, task_id: str) -> Path:
+        return self.root / f"{task_id}.json"
+
+    def get(self, task_id: str) -> Optional[TaskState]:
+        try:
+            return TaskState(*json.loads(self._path(task_id).read_bytes()))
+        except FileNotFoundError:
+            return None
+        except (ValueError, TypeError) as e:
+            logger.warning(f"⚠️ Unreadable task state for {task_id}: {e}")
+            return None
+
+    def put(self, state: TaskState):
+        path = self._path(state.id)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(state.to_list()))
+        os.replace(tmp, path)
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self.prune()
+
+    def delete(self, task_id: str):
+        self._path(task_id).unlink(missing_ok=True)
+
+    def prune(self):
+        cutoff = time.time() - settings.TASK_STATE_TERMINAL_TTL_SECONDS
+        for entry in os.scandir(self.root):
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+            except FileNotFoundError:
+                continue
+
+    def __len__(self) -> int:
+        return sum(1 for name in os.listdir(self.root) if name.endswith(".json"))
+
+BACKENDS = {"memory": MemoryBackend, "file": FileBackend}
+
+def backend_name() -> str:
+    """
+    "auto": jobs run in `python -m app.worker` unless the API embeds the
+    worker, and only a shared backend lets the API see what they write.
+    """
+    if settings.TASK_STATE_BACKEND != "auto":
+        return settings.TASK_STATE_BACKEND
+    return "memory" if settings.EMBEDDED_WORKER_CONCURRENCY > 0 else "file"
+
+class TaskStateRegistry:
+    """
+    Write-through cache of task status for GET /api/v1/tasks/{id} and the
+    event relay, so polls don't touch the database.
+
+    The orchestrator, the only writer of stage/progress, puts a record on
+    every change. Active records are refreshed by the worker heartbeat and
+    go stale after QUEUE_LEASE_SECONDS (the lease may have been lost or
+    requeued behind our back); terminal records live for
+    TASK_STATE_TERMINAL_TTL_SECONDS. Stale and missing records fall back to
+    the database.
+    """
+
+    def __init__(self, backend=None):
+        self._backend = backend
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = BACKENDS[backend_name()]()
+        return self._backend
+
+    def get(self, task_id: str) -> Optional[TaskState]:
+        if not settings.TASK_STATE_ENABLED:
+            return None
+        state = self.backend.get(task_id)
+        if state is None:
+            TASK_STATE_READS.labels(result="miss").inc()
+            return None
+        ttl = settings.TASK_STATE_TERMINAL_TTL_SECONDS if state.terminal else settings.QUEUE_LEASE_SECONDS
+        if time.time() - state.updated_at > ttl:
+            TASK_STATE_READS.labels(result="stale").inc()
+            self.backend.delete(task_id)
+            return None
+        TASK_STATE_READS.labels(result="hit").inc()
+        return state
+
+    def put(self, task) -> Optional[TaskState]:
+        """Records the task's current state. Called by whoever is running it."""
+        if not settings.TASK_STATE_ENABLED:
+            return None
+        state = TaskState.of(task)
+        try:
+            self.backend.put(state)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not record state of {task.id}: {e}")
+        return state
+
+    def remember(self, task):
+        """
+        Caches a state read from the database, if it can no longer change.
+        Expired rows are not cached: a record has no room for expired_at.
+        """
+        if is_terminal(task.status) and getattr(task, "expired_at", None) is None:
+            self.put(task)
+
+    def touch(self, task_id: str):
+        """Keeps an active record fresh while its job holds the lease."""
+        if not settings.TASK_STATE_ENABLED:
+            return
+        state = self.backend.get(task_id)
+        if state is not None and not state.terminal:
+            state.updated_at = time.time()
+            self.backend.put(state)
+
+    def discard(self, task_id: str):
+        """Drops a record the database has overtaken (e.g. outputs evicted)."""
+        if settings.TASK_STATE_ENABLED:
+            self.backend.delete(task_id)
+
+task_states = TaskStateRegistry()
@@ -0,0 +1,138 @@
+"""
+Foundry job worker.
+
+Runs the generation pipeline outside the API process:
+
+    python -m app.worker --processes 4 --concurrency 2
+
+Each process leases tasks from the `tasks` table (see app.services.queue)
+and runs up to `--concurrency` of them at once.
+Set METRICS_MULTIPROC_DIR so the API's /metrics includes every worker.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import uuid
+from typing import Dict
+from app.core.config import settings
+from app.core.metrics import mark_process_dead, watch_loop_lag
+from app.core.logging import setup_logging
+from app.db.init_db import init_db
+from app.providers.http_pool import http_pool
+from app.providers.registry import providers
+from app.services.orchestrator import orchestrator
+from app.services.provider_health import provider_health
+from app.services.queue import task_queue
+from app.services.task_state import task_states
+
+logger = setup_logging("Foundry.Worker")
+
+class Worker:
+    def __init__(self, concurrency: int = settings.WORKER_CONCURRENCY):
+        self.concurrency = max(1, concurrency)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.jobs: Dict[str, asyncio.Task] = {}
+        self._stopping = asyncio.Event()
+
+    async def run(self):
+        logger.info(f"👷 Worker {self.worker_id} online ({self.concurrency} slots)")
+        slots = [asyncio.create_task(self._slot()) for _ in range(self.concurrency)]
+        await self._stopping.wait()
+
+        # Interrupted jobs go straight back to the queue instead of waiting for lease expiry
+        for job in list(self.jobs.values()):
+            job.cancel()
+        await asyncio.gather(*slots, return_exceptions=True)
+        logger.info(f"👋 Worker {self.worker_id} stopped")
+
+    def stop(self):
+        self._stopping.set()
+
+    async def _slot(self):
+        while not self._stopping.is_set():
+            task_id = await task_queue.claim(self.worker_id)
+            if not task_id:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=settings.QUEUE_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run_job(task_id)
+
+    async def _run_job(self, task_id: str):
+        job = asyncio.create_task(orchestrator.process_task(task_id))
+        self.jobs[task_id] = job
+        heartbeat = asyncio.create_task(self._heartbeat(task_id, job))
+        try:
+            await job
+            await task_queue.release(task_id, self.worker_id)
+        except asyncio.CancelledError:
+            await task_queue.requeue(task_id, self.worker_id)
+            task_states.discard(task_id)  # Back to QUEUED; polls read that from the database
+        except Exception as e:
+            logger.error(f"❌ Job {task_id} crashed: {e}")
+            await task_queue.release(task_id, self.worker_id)
+        finally:
+            heartbeat.cancel()
+            self.jobs.pop(task_id, None)
+
+    async def _heartbeat(self, task_id: str, job: asyncio.Task):
+        while True:
+            await asyncio.sleep(settings.QUEUE_HEARTBEAT_SECONDS)
+            if not await task_queue.heartbeat(task_id, self.worker_id):
+                logger.warning(f"⚠️ Lease lost for {task_id}. Abandoning job.")
+                job.cancel()
+                return
+            task_states.touch(task_id)
+
+def _run_process(concurrency: int):
+    async def _main():
+        worker = Worker(concurrency)
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, worker.stop)
+        lag_watch = asyncio.create_task(watch_loop_lag())
+        provider_health.install()
+        if settings.PROVIDERS_WARM_ON_STARTUP:
+            await providers.warm()  # Before leasing, so no job pays for SDK imports
+        try:
+            await worker.run()
+        finally:
+            lag_watch.cancel()
+            await http_pool.aclose()
+
+    try:
+        asyncio.run(_main())
+    finally:
+        mark_process_dead(os.getpid())
+
+def main():
+    parser = argparse.ArgumentParser(description="Foundry job worker")
+    parser.add_argument("--processes", type=int, default=settings.WORKER_PROCESSES)
+    parser.add_argument("--concurrency", type=int, default=settings.WORKER_CONCURRENCY)
+    args = parser.parse_args()
+    init_db()
+
+    if args.processes <= 1:
+        _run_process(args.concurrency)
+        return
+
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_run_process, args=(args.concurrency,), daemon=False) for _ in range(args.processes)]
+    for p in procs:
+        p.start()
+
+    # Children get SIGINT from the terminal themselves; forward SIGTERM.
+    signal.signal(signal.SIGTERM, lambda *_: [p.terminate() for p in procs])
+    try:
+        for p in procs:
+            p.join()
+    except KeyboardInterrupt:
+        for p in procs:
+            p.join()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Foundry cold-start budget.
+
+Measures, in fresh interpreters against a throwaway database:
+  - `import main` wall time (median of --runs), and which heavy SDKs it pulled in
+  - process spawn -> first HTTP response from uvicorn (GET /health)
+  - process spawn -> GET /ready answering 200 (schema + provider warm-up)
+
+    python -m benchmarks.cold_start
+    python -m benchmarks.cold_start --import-budget 1.5 --first-request-budget 3
+
+Exits 1 if a budget is exceeded or a deferred SDK is imported by `import main`,
+so CI can run it after every dependency or startup change.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+import httpx
+from benchmarks.run import ROOT, free_port
+
+# Must only load when a provider is first used (see app/providers/registry.py)
+DEFERRED = ["google.genai", "edge_tts", "httpx", "aiohttp", "uvicorn"]
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import main
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (DEFERRED,)
+
+def isolated_env(work: Path) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": f"sqlite+aiosqlite:///{work / 'cold.db'}",
+        "OUTPUT_DIR": str(work / "outputs"),
+        "TEMP_DIR": str(work / "temp"),
+        "THUMB_DIR": str(work / "thumbs"),
+        "AUDIO_CACHE_DIR": str(work / "cache" / "audio"),
+        "CLIP_CACHE_DIR": str(work / "cache" / "clips"),
+        "TASK_STATE_DIR": str(work / "state"),
+        "EMBEDDED_WORKER_CONCURRENCY": "0",
+        "JANITOR_ENABLED": "false",
+    })
+    return env
+
+def measure_import(env: dict, runs: int) -> dict:
+    samples, loaded = [], set()
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", PROBE], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+        result = json.loads(out.stdout.strip().splitlines()[-1])
+        samples.append(result["seconds"])
+        loaded.update(result["loaded"])
+    return {"median": statistics.median(samples), "max": max(samples), "loaded": sorted(loaded)}
+
+def measure_boot(env: dict, timeout: float) -> dict:
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    first = ready = None
+    try:
+        while time.perf_counter() - started < timeout and ready is None:
+            if proc.poll() is not None:
+                sys.exit(f"API exited during startup (code {proc.returncode})")
+            try:
+                if first is None and httpx.get(f"{base}/health", timeout=1).status_code == 200:
+                    first = time.perf_counter() - started
+                if first is not None and httpx.get(f"{base}/ready", timeout=1).status_code == 200:
+                    ready = time.perf_counter() - started
+            except httpx.TransportError:
+                pass
+            time.sleep(0.02)
+        report = httpx.get(f"{base}/ready", timeout=1).json() if first is not None else None
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+    return {"first_request": first, "ready": ready, "report": report}
+
+def main():
+    parser = argparse.ArgumentParser(description="Foundry cold-start budget")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters for the import measurement")
+    parser.add_argument("--import-budget", type=float, default=1.5, help="Max median seconds for `import main`")
+    parser.add_argument("--first-request-budget", type=float, default=3.0, help="Max seconds to the first response")
+    parser.add_argument("--ready-timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory(prefix="foundry-cold-") as tmp:
+        env = isolated_env(Path(tmp))
+        imp = measure_import(env, args.runs)
+        boot = measure_boot(env, args.ready_timeout)
+
+    print(f"📦 import main: median {imp['median']:.3f}s, max {imp['max']:.3f}s (budget {args.import_budget}s)")
+    print(f"🚀 first request: {boot['first_request'] or float('nan'):.3f}s (budget {args.first_request_budget}s)")
+    print(f"✅ ready: {boot['ready'] or float('nan'):.3f}s")
+    if boot["report"]:
+        for name, state in boot["report"]["providers"].items():
+            built = f", built in {state['build_seconds']}s" if state["build_seconds"] is not None else ""
+            print(f"   ↳ {name}: {state['state']} (required={state['required']}{built})")
+
+    if imp["loaded"]:
+        failures.append(f"`import main` loaded deferred modules: {', '.join(imp['loaded'])}")
+    if imp["median"] > args.import_budget:
+        failures.append(f"import took {imp['median']:.3f}s > {args.import_budget}s")
+    if boot["first_request"] is None or boot["first_request"] > args.first_request_budget:
+        failures.append(f"first request took {boot['first_request']}s > {args.first_request_budget}s")
+    if boot["ready"] is None:
+        failures.append(f"/ready never answered 200 within {args.ready_timeout}s")
+
+    for failure in failures:
+        print(f"❌ {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
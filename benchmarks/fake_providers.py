@@ -0,0 +1,153 @@
+"""
+Local stand-ins for Gemini, Veo, ElevenLabs and EdgeTTS.
+
+Speaks just enough of each wire protocol for the real provider code paths
+(google-genai client, pooled HTTP streaming, edge_tts websocket) to run
+unmodified, serving real H.264/mp3 fixtures after a configurable latency,
+with a configurable error rate.
+
+    python -m benchmarks.fake_providers --port 8100 --veo-latency 8 --error-rate 0.02
+
+Point the app at it with:
+    GENAI_BASE_URL=http://127.0.0.1:8100
+    ELEVENLABS_BASE_URL=http://127.0.0.1:8100
+    EDGETTS_WSS_URL=ws://127.0.0.1:8100/edge/v1?TrustedClientToken=local
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse
+from benchmarks.fixtures import build_fixtures
+
+EDGE_FRAME_BYTES = 4096
+
+@dataclass
+class StandInConfig:
+    clip: Path
+    speech: Path
+    gemini_latency: float = 0.5   # Seconds per refine call
+    veo_latency: float = 8.0      # Seconds until a render operation reports done
+    tts_latency: float = 1.0      # Seconds before the first audio byte
+    jitter: float = 0.2           # Latencies vary uniformly by +/- this fraction
+    error_rate: float = 0.0       # Fraction of calls answered with a 503
+
+def create_app(config: StandInConfig) -> FastAPI:
+    app = FastAPI(title="Foundry provider stand-ins")
+    operations: Dict[str, float] = {}  # operation name -> monotonic time it completes (kept after, like Veo)
+
+    def latency(base: float) -> float:
+        return max(0.0, base * random.uniform(1 - config.jitter, 1 + config.jitter))
+
+    def maybe_fail():
+        if random.random() < config.error_rate:
+            raise HTTPException(status_code=503, detail="Injected failure")
+
+    # --- Gemini (generativelanguage v1beta) ---
+
+    @app.post("/v1beta/models/{model}:generateContent")
+    async def generate_content(model: str, request: Request):
+        body = await request.json()
+        await asyncio.sleep(latency(config.gemini_latency))
+        maybe_fail()
+        prompt = body["contents"][0]["parts"][0]["text"]
+        return {
+            "candidates": [{
+                "content": {"role": "model", "parts": [{"text": f"Cinematic shot. {prompt[-120:]}"}]},
+                "finishReason": "STOP",
+            }],
+            "modelVersion": model,
+        }
+
+    # --- Veo long-running operations ---
+
+    @app.post("/v1beta/models/{model}:predictLongRunning")
+    async def predict_long_running(model: str):
+        await asyncio.sleep(latency(config.gemini_latency) / 5)
+        maybe_fail()
+        name = f"models/{model}/operations/{uuid.uuid4().hex}"
+        operations[name] = time.monotonic() + latency(config.veo_latency)
+        return {"name": name}
+
+    @app.get("/v1beta/models/{model}/operations/{op_id}")
+    async def get_operation(model: str, op_id: str, request: Request):
+        name = f"models/{model}/operations/{op_id}"
+        if name not in operations:
+            raise HTTPException(status_code=404, detail="Unknown operation")
+        if time.monotonic() < operations[name]:
+            return {"name": name, "done": False}
+        uri = str(request.url_for("download_clip"))
+        return {
+            "name": name,
+            "done": True,
+            "response": {"generateVideoResponse": {"generatedSamples": [{"video": {"uri": uri}}]}},
+        }
+
+    @app.get("/files/clip.mp4", name="download_clip")
+    async def download_clip():
+        return FileResponse(config.clip, media_type="video/mp4")
+
+    # --- ElevenLabs ---
+
+    @app.post("/v1/text-to-speech/{voice_id}")
+    async def elevenlabs_tts(voice_id: str):
+        await asyncio.sleep(latency(config.tts_latency))
+        maybe_fail()
+        return FileResponse(config.speech, media_type="audio/mpeg")
+
+    # --- EdgeTTS (Bing readaloud websocket) ---
+
+    @app.websocket("/edge/v1")
+    async def edge_tts_socket(websocket: WebSocket):
+        await websocket.accept()
+        try:
+            while "Path:ssml" not in await websocket.receive_text():
+                pass  # speech.config comes first
+            await asyncio.sleep(latency(config.tts_latency))
+            if random.random() < config.error_rate:
+                await websocket.close(code=1011)
+                return
+
+            request_id = uuid.uuid4().hex
+            await websocket.send_text(f"X-RequestId:{request_id}\r\nPath:turn.start\r\n\r\n{{}}")
+            header = f"X-RequestId:{request_id}\r\nContent-Type:audio/mpeg\r\nPath:audio\r\n".encode()
+            audio = config.speech.read_bytes()
+            for offset in range(0, len(audio), EDGE_FRAME_BYTES):
+                chunk = audio[offset:offset + EDGE_FRAME_BYTES]
+                await websocket.send_bytes(len(header).to_bytes(2, "big") + header + chunk)
+            await websocket.send_text(f"X-RequestId:{request_id}\r\nPath:turn.end\r\n\r\n{{}}")
+            await websocket.receive_text()  # Client hangs up after turn.end
+        except WebSocketDisconnect:
+            pass
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Foundry provider stand-ins")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--clip-seconds", type=float, default=8)
+    parser.add_argument("--clip-size", default="1280x720")
+    parser.add_argument("--speech-seconds", type=float, default=20)
+    parser.add_argument("--gemini-latency", type=float, default=0.5)
+    parser.add_argument("--veo-latency", type=float, default=8.0)
+    parser.add_argument("--tts-latency", type=float, default=1.0)
+    parser.add_argument("--jitter", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    clip, speech = build_fixtures(args.clip_seconds, args.clip_size, args.speech_seconds)
+    config = StandInConfig(
+        clip=clip, speech=speech,
+        gemini_latency=args.gemini_latency, veo_latency=args.veo_latency, tts_latency=args.tts_latency,
+        jitter=args.jitter, error_rate=args.error_rate,
+    )
+    uvicorn.run(create_app(config), host="127.0.0.1", port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+Real media for the provider stand-ins, rendered locally with FFmpeg.
+Files are cached by their parameters, so reruns reuse them.
+"""
+import subprocess
+from pathlib import Path
+from typing import Tuple
+
+FIXTURE_DIR = Path(__file__).resolve().parent / ".fixtures"
+
+def build_fixtures(clip_seconds: float = 8, clip_size: str = "1280x720", speech_seconds: float = 20,
+                   root: Path = FIXTURE_DIR) -> Tuple[Path, Path]:
+    """Returns (H.264/yuv420p mp4 clip, 24 kHz mono mp3) shaped like Veo and EdgeTTS output."""
+    root.mkdir(parents=True, exist_ok=True)
+    clip = root / f"clip_{clip_size}_{clip_seconds:g}s.mp4"
+    speech = root / f"speech_{speech_seconds:g}s.mp3"
+
+    if not clip.exists():
+        _ffmpeg([
+            "-f", "lavfi", "-i", f"testsrc2=size={clip_size}:rate=24:duration={clip_seconds}",
+            "-c:v", "libx264", "-preset", "veryfast", "-pix_fmt", "yuv420p",
+            "-movflags", "+faststart", str(clip),
+        ])
+    if not speech.exists():
+        _ffmpeg([
+            "-f", "lavfi", "-i", f"sine=frequency=220:duration={speech_seconds}",
+            "-c:a", "libmp3lame", "-b:a", "48k", "-ar", "24000", "-ac", "1", str(speech),
+        ])
+    return clip, speech
+
+def _ffmpeg(args):
+    subprocess.run(["ffmpeg", "-hide_banner", "-loglevel", "error", "-y", *args], check=True)
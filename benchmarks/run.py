@@ -0,0 +1,333 @@
+"""
+Foundry throughput benchmark.
+
+Boots the provider stand-ins (benchmarks.fake_providers), the API and
+worker processes against a throwaway database and storage dir, then drives
+POST /api/v1/generate at fixed client concurrency levels. Per level it
+reports jobs/min, p50/p95/p99 per stage (from the Task timing columns),
+peak RSS of the API and workers, and event-loop lag (from /metrics).
+
+    python -m benchmarks.run --levels 1 4 16 --jobs 32 --workers 2
+    python -m benchmarks.run --save before.json
+    python -m benchmarks.run --baseline before.json   # exit 1 if jobs/min dropped > 10%
+
+Run it from the repo root before every upgrade. Needs ffmpeg/ffprobe on PATH.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import shutil
+import socket
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+import httpx
+from prometheus_client.parser import text_string_to_metric_families
+
+ROOT = Path(__file__).resolve().parent.parent
+STAGES = ["refine", "video", "audio", "stitch", "total"]
+STYLES = ["cinematic", "anime", "documentary", "noir"]
+SCRIPT = (
+    "Every great story starts with a single frame. Ours starts at dawn, on a quiet coast. "
+    "The lighthouse keeper has kept the lamp burning for forty years, and tonight is the last. "
+)
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+def peak_rss_mb(pid: int) -> Optional[float]:
+    """Resident-set high-water mark (Linux /proc); None elsewhere."""
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+# --- Process stack ---
+
+class Stack:
+    """Stand-ins + API + workers, each a subprocess logging into `work/logs`."""
+
+    def __init__(self, args, work: Path):
+        self.args = args
+        self.work = work
+        self.providers_port = free_port()
+        self.api_port = free_port()
+        self.api_url = f"http://127.0.0.1:{self.api_port}"
+        self.procs: Dict[str, subprocess.Popen] = {}
+        (work / "logs").mkdir(parents=True, exist_ok=True)
+
+    @property
+    def db_path(self) -> Path:
+        return self.work / "bench.db"
+
+    def env(self) -> dict:
+        providers = f"http://127.0.0.1:{self.providers_port}"
+        caches = "true" if self.args.caches else "false"
+        env = dict(os.environ)
+        env.update({
+            "USE_MOCK_VEO": "false",
+            "USE_MOCK_AUDIO": "false",
+            "GENAI_BASE_URL": providers,
+            "GEMINI_API_KEY": "bench",
+            "ELEVENLABS_BASE_URL": providers,
+            "ELEVENLABS_API_KEY": "bench",
+            "EDGETTS_WSS_URL": f"ws://127.0.0.1:{self.providers_port}/edge/v1?TrustedClientToken=bench",
+            "VEO_POLL_SECONDS": str(self.args.veo_poll),
+            "DATABASE_URL": f"sqlite+aiosqlite:///{self.db_path}",
+            "OUTPUT_DIR": str(self.work / "outputs"),
+            "TEMP_DIR": str(self.work / "temp"),
+            "THUMB_DIR": str(self.work / "thumbs"),
+            "TASK_STATE_DIR": str(self.work / "state"),
+            "RECONCILE_CHECKPOINT": str(self.work / "restore_checkpoint.json"),
+            "AUDIO_CACHE_DIR": str(self.work / "cache" / "audio"),
+            "CLIP_CACHE_DIR": str(self.work / "cache" / "clips"),
+            "AUDIO_CACHE_ENABLED": caches,
+            "REFINE_CACHE_ENABLED": caches,
+            "CLIP_CACHE_ENABLED": caches,
+            "METRICS_MULTIPROC_DIR": str(self.work / "metrics"),
+            "EMBEDDED_WORKER_CONCURRENCY": "0",
+            "QUEUE_POLL_SECONDS": "0.2",
+        })
+        return env
+
+    def _spawn(self, name: str, cmd: List[str]):
+        log = open(self.work / "logs" / f"{name}.log", "wb")
+        self.procs[name] = subprocess.Popen(cmd, cwd=ROOT, env=self.env(), stdout=log, stderr=subprocess.STDOUT)
+
+    def start(self):
+        a = self.args
+        self._spawn("providers", [
+            sys.executable, "-m", "benchmarks.fake_providers", "--port", str(self.providers_port),
+            "--clip-seconds", str(a.clip_seconds), "--clip-size", a.clip_size, "--speech-seconds", str(a.speech_seconds),
+            "--gemini-latency", str(a.gemini_latency), "--veo-latency", str(a.veo_latency),
+            "--tts-latency", str(a.tts_latency), "--error-rate", str(a.error_rate),
+        ])
+        self._wait_http(f"http://127.0.0.1:{self.providers_port}/openapi.json", "providers")
+        self._spawn("api", [sys.executable, "-m", "uvicorn", "main:app", "--port", str(self.api_port), "--log-level", "warning"])
+        self._wait_http(f"{self.api_url}/ready", "api")
+        for i in range(a.workers):
+            self._spawn(f"worker{i}", [sys.executable, "-m", "app.worker", "--processes", "1", "--concurrency", str(a.worker_concurrency)])
+
+    def _wait_http(self, url: str, name: str, timeout: float = 60):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.procs[name].poll() is not None:
+                raise RuntimeError(f"{name} exited early, see {self.work / 'logs' / (name + '.log')}")
+            try:
+                if httpx.get(url, timeout=2).status_code < 500:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.3)
+        raise RuntimeError(f"{name} did not come up within {timeout:.0f}s")
+
+    def stop(self):
+        for proc in self.procs.values():
+            if proc.poll() is None:
+                proc.terminate()
+        for proc in self.procs.values():
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    def rss(self) -> dict:
+        workers = [peak_rss_mb(p.pid) for name, p in self.procs.items() if name.startswith("worker")]
+        workers = [w for w in workers if w is not None]
+        return {
+            "api_mb": peak_rss_mb(self.procs["api"].pid),
+            "worker_max_mb": max(workers) if workers else None,
+        }
+
+@contextmanager
+def running_stack(args):
+    work = Path(args.work_dir) if args.work_dir else Path(tempfile.mkdtemp(prefix="foundry-bench-"))
+    stack = Stack(args, work)
+    try:
+        stack.start()
+        yield stack
+    finally:
+        stack.stop()
+        if not args.keep:
+            shutil.rmtree(work, ignore_errors=True)
+        else:
+            print(f"📁 Benchmark files kept in {work}")
+
+# --- Load ---
+
+async def drive(stack: Stack, level: int, jobs: int, args, rng: random.Random) -> List[dict]:
+    """`level` clients submit `jobs` generations between them, each waiting for its job to finish."""
+    pending = list(range(jobs))
+    results: List[dict] = []
+
+    async def client(http: httpx.AsyncClient):
+        while pending:
+            n = pending.pop()
+            payload = {
+                "prompt": f"bench {level}/{n} {rng.random():.6f}: a lighthouse at dusk",
+                "style": rng.choice(STYLES),
+                "monologue": (SCRIPT * math.ceil(args.script_chars / len(SCRIPT)))[:args.script_chars],
+                "use_paid_voice": rng.random() < args.premium_ratio,
+            }
+            started = time.perf_counter()
+            task_id = (await http.post("/api/v1/generate", json=payload)).json()["task_id"]
+            status = "TIMEOUT"
+            while time.perf_counter() - started < args.job_timeout:
+                await asyncio.sleep(args.poll)
+                status = (await http.get(f"/api/v1/tasks/{task_id}")).json()["status"]
+                if status.startswith("COMPLETED") or status == "FAILED":
+                    break
+            results.append({"id": task_id, "status": status, "e2e": time.perf_counter() - started})
+
+    async with httpx.AsyncClient(base_url=stack.api_url, timeout=30) as http:
+        await asyncio.gather(*(client(http) for _ in range(level)))
+    return results
+
+def stage_timings(db_path: Path, ids: List[str]) -> Dict[str, List[float]]:
+    columns = ", ".join(f"{s}_seconds" for s in STAGES)
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute(
+            f"SELECT {columns} FROM tasks WHERE status LIKE 'COMPLETED%' AND id IN ({','.join('?' * len(ids))})", ids
+        ).fetchall()
+    return {stage: [r[i] for r in rows if r[i] is not None] for i, stage in enumerate(STAGES)}
+
+def loop_lag_buckets(api_url: str) -> Dict[float, float]:
+    text = httpx.get(f"{api_url}/metrics", timeout=10).text
+    for family in text_string_to_metric_families(text):
+        if family.name == "foundry_event_loop_lag_seconds":
+            return {float(s.labels["le"]): s.value for s in family.samples if s.name.endswith("_bucket")}
+    return {}
+
+def lag_p99(before: Dict[float, float], after: Dict[float, float]) -> Optional[float]:
+    """Upper bound of the bucket holding the 99th percentile of samples taken during the level."""
+    delta = sorted((le, after[le] - before.get(le, 0)) for le in after)
+    if not delta or delta[-1][1] <= 0:
+        return None
+    for le, count in delta:
+        if count >= 0.99 * delta[-1][1]:
+            return le
+    return None
+
+async def run_levels(args) -> List[dict]:
+    rng = random.Random(args.seed)
+    report = []
+    with running_stack(args) as stack:
+        for level in args.levels:
+            lag_before = loop_lag_buckets(stack.api_url)
+            started = time.perf_counter()
+            results = await drive(stack, level, args.jobs, args, rng)
+            elapsed = time.perf_counter() - started
+
+            ok = [r for r in results if r["status"].startswith("COMPLETED")]
+            timings = stage_timings(stack.db_path, [r["id"] for r in results])
+            timings["e2e"] = [r["e2e"] for r in ok]
+            report.append({
+                "level": level,
+                "jobs": len(results),
+                "completed": len(ok),
+                "failed": len(results) - len(ok),
+                "elapsed_s": round(elapsed, 2),
+                "jobs_per_min": round(len(ok) / elapsed * 60, 2),
+                "stages": {
+                    stage: {f"p{q}": percentile(values, q) for q in (50, 95, 99)}
+                    for stage, values in timings.items()
+                },
+                "peak_rss": stack.rss(),
+                "loop_lag_p99_s": lag_p99(lag_before, loop_lag_buckets(stack.api_url)),
+            })
+            print_level(report[-1])
+    return report
+
+# --- Output ---
+
+def _fmt(value: Optional[float]) -> str:
+    return f"{value:8.2f}" if value is not None else "       -"
+
+def print_level(r: dict):
+    print(f"\n== {r['level']} clients: {r['completed']} ok / {r['failed']} failed in {r['elapsed_s']}s "
+          f"-> {r['jobs_per_min']} jobs/min")
+    print(f"   {'stage':<8}{'p50':>8}{'p95':>8}{'p99':>8}")
+    for stage, q in r["stages"].items():
+        print(f"   {stage:<8}{_fmt(q['p50'])}{_fmt(q['p95'])}{_fmt(q['p99'])}")
+    rss, lag = r["peak_rss"], r["loop_lag_p99_s"]
+    print(f"   peak RSS: api {_fmt(rss['api_mb']).strip()} MB, worker {_fmt(rss['worker_max_mb']).strip()} MB"
+          f" | loop lag p99 <= {lag if lag is not None else '-'} s")
+
+def compare(report: List[dict], baseline_path: Path, tolerance: float) -> bool:
+    """True if no level lost more than `tolerance` of its baseline jobs/min."""
+    baseline = {r["level"]: r for r in json.loads(baseline_path.read_text())["levels"]}
+    ok = True
+    print(f"\n== vs {baseline_path.name}")
+    for r in report:
+        base = baseline.get(r["level"])
+        if not base or not base["jobs_per_min"]:
+            continue
+        change = r["jobs_per_min"] / base["jobs_per_min"] - 1
+        regressed = change < -tolerance
+        ok &= not regressed
+        print(f"   {r['level']:>3} clients: {base['jobs_per_min']} -> {r['jobs_per_min']} jobs/min "
+              f"({change:+.1%}){'  ❌ REGRESSION' if regressed else ''}")
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description="Foundry end-to-end throughput benchmark")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 4, 16], help="Concurrent clients per run")
+    parser.add_argument("--jobs", type=int, default=16, help="Jobs submitted per level")
+    parser.add_argument("--workers", type=int, default=2, help="Worker processes")
+    parser.add_argument("--worker-concurrency", type=int, default=4)
+    parser.add_argument("--premium-ratio", type=float, default=0.5, help="Share of jobs using ElevenLabs")
+    parser.add_argument("--script-chars", type=int, default=1200, help="Monologue length")
+    parser.add_argument("--caches", action="store_true", help="Keep refine/TTS/clip caches on (off measures cold paths)")
+    # Stand-in shape
+    parser.add_argument("--gemini-latency", type=float, default=0.5)
+    parser.add_argument("--veo-latency", type=float, default=8.0)
+    parser.add_argument("--tts-latency", type=float, default=1.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--clip-seconds", type=float, default=8)
+    parser.add_argument("--clip-size", default="1280x720")
+    parser.add_argument("--speech-seconds", type=float, default=20)
+    parser.add_argument("--veo-poll", type=float, default=1.0, help="VEO_POLL_SECONDS for the workers")
+    # Harness
+    parser.add_argument("--poll", type=float, default=0.25, help="Client status poll interval")
+    parser.add_argument("--job-timeout", type=float, default=600)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--work-dir", help="Defaults to a fresh temp dir")
+    parser.add_argument("--keep", action="store_true", help="Keep DB, outputs and logs afterwards")
+    parser.add_argument("--save", type=Path, help="Write the report as JSON")
+    parser.add_argument("--baseline", type=Path, help="Compare jobs/min against a saved report")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    missing = [tool for tool in ("ffmpeg", "ffprobe") if not shutil.which(tool)]
+    if missing:
+        sys.exit(f"{' and '.join(missing)} not found on PATH")
+
+    report = asyncio.run(run_levels(args))
+    if args.save:
+        args.save.write_text(json.dumps({"args": {k: str(v) for k, v in vars(args).items()}, "levels": report}, indent=2))
+        print(f"\n💾 Saved {args.save}")
+    if args.baseline and not compare(report, args.baseline, args.tolerance):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,62 @@
-import uvicorn
+import asyncio
+import mimetypes
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, Response
 
 from app.core.config import settings
+from app.core import metrics
 from app.api.routes import router
+from app.api.static import ImmutableStaticFiles, TrackedStaticFiles
 from app.db.init_db import init_db
+from app.providers.http_pool import http_pool
+from app.providers.registry import providers
+from app.services.provider_health import provider_health
+from app.services.queue import task_queue
+from app.services.reconcile import reconcile_in_background
+from app.services.storage import janitor
 
-# Initialize DB (Creates app.db if missing)
-init_db()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Initialize DB (Creates app.db if missing). Importing this module stays side-effect free.
+    app.state.schema_ready = False
+    await asyncio.to_thread(init_db)
+    app.state.schema_ready = True
+    warmup = asyncio.create_task(providers.warm()) if settings.PROVIDERS_WARM_ON_STARTUP else None
+    provider_health.install()
+    # Jobs normally run in `python -m app.worker`; an embedded worker is a dev convenience.
+    lag_watch = asyncio.create_task(metrics.watch_loop_lag())
+    sweeper = asyncio.create_task(janitor.run()) if settings.JANITOR_ENABLED else None
+    reconcile = asyncio.create_task(reconcile_in_background()) if settings.RECONCILE_ON_STARTUP else None
+    worker, worker_task = None, None
+    if settings.EMBEDDED_WORKER_CONCURRENCY > 0:
+        from app.worker import Worker
+        worker = Worker(settings.EMBEDDED_WORKER_CONCURRENCY)
+        worker_task = asyncio.create_task(worker.run())
+    yield
+    if worker:
+        worker.stop()
+        await worker_task
+    lag_watch.cancel()
+    if warmup:
+        warmup.cancel()
+    if sweeper:
+        sweeper.cancel()
+    if reconcile:
+        reconcile.cancel()  # Sets its stop event: queued probes are cancelled, nothing more is written
+    await http_pool.aclose()
 
-app = FastAPI(title=settings.PROJECT_NAME)
+app = FastAPI(title=settings.PROJECT_NAME, lifespan=lifespan)
 
 # Mounts
+mimetypes.add_type("application/vnd.apple.mpegurl", ".m3u8")  # HLS playlists / segments under /videos
+mimetypes.add_type("video/mp2t", ".ts")
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
-app.mount("/videos", StaticFiles(directory=settings.OUTPUT_DIR), name="videos")
+app.mount("/videos", TrackedStaticFiles(directory=settings.OUTPUT_DIR), name="videos")
+app.mount("/thumbs", ImmutableStaticFiles(directory=settings.THUMB_DIR), name="thumbs")
 
 # Templates
 templates = Jinja2Templates(directory="app/templates")
@@ -23,6 +64,25 @@ templates = Jinja2Templates(directory="app/templates")
 # API Router
 app.include_router(router, prefix="/api/v1")
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    metrics.QUEUE_DEPTH.set(await task_queue.depth())
+    body, content_type = metrics.render()
+    return Response(content=body, media_type=content_type)
+
+@app.get("/health", include_in_schema=False)
+async def health():
+    """Liveness: the process is serving."""
+    return {"status": "ok"}
+
+@app.get("/ready", include_in_schema=False)
+async def ready(request: Request):
+    """Readiness: schema is in place and every provider this config needs has been built."""
+    schema = getattr(request.app.state, "schema_ready", False)
+    ok = schema and providers.ready
+    body = {"ready": ok, "schema": schema, "providers": providers.readiness()}
+    return JSONResponse(body, status_code=200 if ok else 503)
+
 # --- WEB PAGE ROUTES ---
 
 @app.get("/", response_class=HTMLResponse)
@@ -35,12 +95,15 @@ async def create_page(request: Request):
 
 @app.get("/gallery", response_class=HTMLResponse)
 async def gallery_page(request: Request):
-    return templates.TemplateResponse("gallery.html", {"request": request})
+    return templates.TemplateResponse("gallery.html", {"request": request, "hls_js": settings.HLS_JS_URL})
 
 @app.get("/database", response_class=HTMLResponse)
 async def database_page(request: Request):
     return templates.TemplateResponse("database.html", {"request": request})
 
 if __name__ == "__main__":
+    import uvicorn
     print(f"🚀 FOUNDRY PRO IS LIVE | http://localhost:8000")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    if settings.EMBEDDED_WORKER_CONCURRENCY <= 0:
+        print("👷 Jobs are processed by workers: python -m app.worker")
+    uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -1,62 +1,34 @@
+import argparse
 import os
 import sys
-from pathlib import Path
 
 # Fix imports to allow running from root directory
 sys.path.append(os.getcwd())
 
-from app.db.session import SessionLocal
-from app.db.models import Task
 from app.core.config import settings
+from app.db.init_db import init_db
+from app.services.reconcile import gallery_reconciler
 
-def restore_orphaned_videos():
+def restore_orphaned_videos(full: bool = False, reverse: bool = True) -> dict:
     """
     Scans the local_storage/outputs folder for video files
     and adds them back to the database if they are missing.
+    Also flags rows whose video has disappeared (see app/services/reconcile.py).
     """
-    db = SessionLocal()
-    output_dir = settings.OUTPUT_DIR
-    
-    # 1. Find all generated videos
-    # Pattern is usually: {uuid}_final.mp4
-    video_files = list(output_dir.glob("*_final.mp4"))
-    
-    print(f"📂 Scanning {output_dir}...")
-    print(f"🎥 Found {len(video_files)} video files in storage.")
+    init_db()
+    print(f"📂 Scanning {settings.OUTPUT_DIR}{' (full rescan)' if full else ''}...")
+    summary = gallery_reconciler.run(full=full, reverse=reverse)
 
-    restored_count = 0
-    
-    for file_path in video_files:
-        # Extract ID from filename (e.g., "abc-123_final.mp4" -> "abc-123")
-        filename = file_path.name
-        task_id = filename.replace("_final.mp4", "")
-        
-        # 2. Check if this task already exists in DB
-        exists = db.query(Task).filter(Task.id == task_id).first()
-        
-        if not exists:
-            print(f"   ↳ Restoring missing task: {task_id[:8]}...")
-            
-            # 3. Create a Recovery Record
-            # Since we lost the original prompt/monologue when deleting the DB,
-            # we set placeholders.
-            recovered_task = Task(
-                id=task_id,
-                prompt="[Restored from Archive]", 
-                monologue="[Metadata Lost]",
-                style="Unknown",
-                status="COMPLETED",
-                final_output=str(file_path),
-                is_paid_voice=False
-            )
-            db.add(recovered_task)
-            restored_count += 1
-    
-    db.commit()
-    db.close()
-    
+    print(f"🎥 Found {summary['videos']} video files in storage ({summary['dirs_rescanned']} directories rescanned).")
     print("-" * 30)
-    print(f"✅ Success! Restored {restored_count} videos to the Gallery.")
+    print(f"✅ Success! Restored {summary['restored']} videos to the Gallery.")
+    if reverse:
+        print(f"🗑️ Marked {summary['expired']} tasks expired, revived {summary['revived']}.")
+    return summary
 
 if __name__ == "__main__":
-    restore_orphaned_videos()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Reconcile the gallery with local_storage/outputs")
+    parser.add_argument("--full", action="store_true", help="Ignore the scan checkpoint and list every directory")
+    parser.add_argument("--no-reverse", action="store_true", help="Skip flagging rows whose video is missing")
+    args = parser.parse_args()
+    restore_orphaned_videos(full=args.full, reverse=not args.no_reverse)
@@ -0,0 +1,55 @@
+"""
+Runs the suite against a throwaway database and storage tree, so tests never
+touch app.db or local_storage. Settings read the environment at import, so
+this has to happen before anything under app/ is imported.
+"""
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+WORK = Path(tempfile.mkdtemp(prefix="foundry-tests-"))
+os.environ.update({
+    "DATABASE_URL": f"sqlite+aiosqlite:///{WORK / 'test.db'}",
+    "OUTPUT_DIR": str(WORK / "outputs"),
+    "TEMP_DIR": str(WORK / "temp"),
+    "THUMB_DIR": str(WORK / "thumbs"),
+    "AUDIO_CACHE_DIR": str(WORK / "cache" / "audio"),
+    "CLIP_CACHE_DIR": str(WORK / "cache" / "clips"),
+    "TASK_STATE_DIR": str(WORK / "state"),
+    "RECONCILE_CHECKPOINT": str(WORK / "restore_checkpoint.json"),
+    "EMBEDDED_WORKER_CONCURRENCY": "0",
+    "JANITOR_ENABLED": "false",
+    "PROVIDERS_WARM_ON_STARTUP": "false",
+})
+sys.path.insert(0, str(ROOT))
+
+import pytest
+
+def run(coro):
+    """asyncio.run() that also drops pooled aiosqlite connections, which are bound to the loop."""
+    from app.db.session import async_engine
+
+    async def main():
+        try:
+            return await coro
+        finally:
+            await async_engine.dispose()
+
+    return asyncio.run(main())
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    from app.db.init_db import init_db
+    init_db()
+
+@pytest.fixture
+def clean_tasks():
+    from app.db.models import Task
+    from app.db.session import SessionLocal
+    with SessionLocal() as db:
+        db.query(Task).delete()
+        db.commit()
+    yield
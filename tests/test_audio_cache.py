@@ -0,0 +1,25 @@
+from prometheus_client import REGISTRY
+from app.providers.audio_cache import AudioCache
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+def lookups(result: str) -> float:
+    return sample("foundry_cache_lookups_total", cache="audio", result=result)
+
+def test_lookups_and_evictions_reach_metrics(tmp_path):
+    cache = AudioCache(tmp_path / "cache", max_bytes=2500)
+    hits, misses, evictions = lookups("hit"), lookups("miss"), sample("foundry_cache_evictions_total", cache="audio")
+
+    src = tmp_path / "speech.mp3"
+    src.write_bytes(b"x" * 1000)
+    keys = [AudioCache.key(f"line {n}", "voice", "edgetts") for n in range(3)]
+
+    assert not cache.fetch(keys[0], tmp_path / "out.mp3")
+    for key in keys:
+        cache.store(key, src)  # The third pushes the cache past its budget
+    assert cache.fetch(keys[2], tmp_path / "out.mp3")
+
+    assert lookups("miss") - misses == 1
+    assert lookups("hit") - hits == 1
+    assert sample("foundry_cache_evictions_total", cache="audio") - evictions >= 1
@@ -0,0 +1,65 @@
+import asyncio
+import pytest
+from app.core.config import settings
+from app.providers.audio import AudioProvider
+
+@pytest.fixture
+def hedging(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "ELEVENLABS_API_KEY", "test-key")
+    monkeypatch.setattr(settings, "TTS_HEDGE_ENABLED", True)
+    monkeypatch.setattr(settings, "TTS_HEDGE_AFTER_SECONDS", 0.05)
+    monkeypatch.setattr(settings, "TTS_HEDGE_GRACE_SECONDS", 0.05)
+    monkeypatch.setattr(settings, "USE_MOCK_AUDIO", False)
+    return tmp_path
+
+def fake_synths(provider: AudioProvider, premium_seconds: float, free_seconds: float):
+    events = {"premium_cancelled": False, "premium_finished": False}
+
+    async def premium(text, path):
+        try:
+            await asyncio.sleep(premium_seconds)
+        except asyncio.CancelledError:
+            events["premium_cancelled"] = True
+            raise
+        path.write_bytes(b"premium")
+        events["premium_finished"] = True
+        return True
+
+    async def free(text, path):
+        await asyncio.sleep(free_seconds)
+        path.write_bytes(b"free")
+        return True
+
+    provider._elevenlabs, provider._edgetts = premium, free
+    return events
+
+def generate(provider, out, text):
+    async def main():
+        winner = await provider.generate(text, out, force_premium=True)
+        await asyncio.sleep(0.3)  # Long enough for a leaked synthesis to finish and write
+        return winner
+
+    return asyncio.run(main())
+
+def test_slow_premium_is_cancelled_and_leaves_no_files(hedging):
+    provider = AudioProvider()
+    events = fake_synths(provider, premium_seconds=0.2, free_seconds=0.01)
+    out = hedging / "task.mp3"
+
+    winner = generate(provider, out, "a slow premium script")
+
+    assert winner == "edgetts"
+    assert out.read_bytes() == b"free"
+    assert events["premium_cancelled"] and not events["premium_finished"]
+    assert sorted(p.name for p in hedging.iterdir()) == ["task.mp3"]
+
+def test_premium_within_grace_wins(hedging):
+    provider = AudioProvider()
+    events = fake_synths(provider, premium_seconds=0.08, free_seconds=0.06)
+    out = hedging / "task.mp3"
+
+    winner = generate(provider, out, "a premium script inside the grace window")
+
+    assert winner == "elevenlabs"
+    assert out.read_bytes() == b"premium"
+    assert sorted(p.name for p in hedging.iterdir()) == ["task.mp3"]
@@ -0,0 +1,63 @@
+from datetime import timedelta
+from types import SimpleNamespace
+from sqlalchemy import select, update
+from app.core.config import settings
+from app.db.models import Task, utcnow
+from app.db.session import AsyncSessionLocal
+from app.services.batch import batch_service
+from app.services.queue import task_queue
+from conftest import run
+
+def item(prompt: str, fresh: bool = False):
+    return SimpleNamespace(prompt=prompt, style="cinematic", monologue="", use_paid_voice=False, fresh_video=fresh)
+
+async def submit(prompts):
+    async with AsyncSessionLocal() as db:
+        return await batch_service.submit(db, [item(p) for p in prompts])
+
+async def statuses(batch_id: str) -> dict:
+    async with AsyncSessionLocal() as db:
+        rows = await db.execute(select(Task.id, Task.status).where(Task.batch_id == batch_id))
+        return dict(rows.all())
+
+def test_submit_queues_every_unique_task(clean_tasks):
+    async def scenario():
+        batch = await submit(["a", "b", "a ", "c"])
+        return batch, await statuses(batch["batch_id"])
+
+    batch, states = run(scenario())
+    assert batch["unique"] == 3
+    assert len(batch["task_ids"]) == 4 and batch["task_ids"][0] == batch["task_ids"][2]
+    assert set(states.values()) == {"QUEUED"}
+
+def test_fresh_takes_are_never_collapsed(clean_tasks):
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            return await batch_service.submit(db, [item("a", fresh=True), item("a", fresh=True), item("a"), item("a")])
+
+    batch = run(scenario())
+    assert batch["unique"] == 3  # Two A/B takes, plus one task for the two plain items
+    fresh_1, fresh_2, plain_1, plain_2 = batch["task_ids"]
+    assert len({fresh_1, fresh_2, plain_1}) == 3 and plain_1 == plain_2
+
+def test_leader_exhausting_attempts_does_not_strand_followers(clean_tasks):
+    async def scenario():
+        batch = await submit(["a", "b", "c"])
+        leader = await task_queue.claim("dead-worker")
+        # The leader's worker died on its last attempt: the lease is long gone
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(Task).where(Task.id == leader)
+                .values(attempts=settings.QUEUE_MAX_ATTEMPTS, lease_expires_at=utcnow() - timedelta(seconds=1))
+            )
+            await db.commit()
+
+        claimed = []
+        while (task_id := await task_queue.claim("live-worker")) is not None:
+            claimed.append(task_id)
+        return leader, claimed, await statuses(batch["batch_id"])
+
+    leader, claimed, states = run(scenario())
+    assert states[leader] == "FAILED"
+    assert leader not in claimed and len(claimed) == 2
+    assert all(states[task_id] == "PROCESSING" for task_id in claimed)
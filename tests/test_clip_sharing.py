@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+from app.core.config import settings
+from app.providers.clip_cache import clip_store
+from app.providers.genai_gateway import VEO_CONFIG
+from app.providers.visual import VisualProvider
+
+@pytest.fixture
+def provider(monkeypatch):
+    monkeypatch.setattr(settings, "USE_MOCK_VEO", False)
+    monkeypatch.setattr(settings, "CLIP_CACHE_ENABLED", True)
+    monkeypatch.setattr(settings, "VEO_POLL_SECONDS", 0.01)
+    renders = []
+
+    def make():
+        p = VisualProvider()
+        p.renders = renders
+
+        async def render(prompt, path, resume, on_started):
+            renders.append(prompt)
+            take = len(renders)
+            await asyncio.sleep(0.05)
+            path.write_bytes(f"take {take}".encode())
+            return True
+
+        p._render = render
+        return p
+
+    p = make()
+    p.another_worker = make  # Own single-flight, same clip store: a second worker process
+    return p
+
+def test_identical_requests_share_one_render(provider, tmp_path):
+    async def main():
+        return await asyncio.gather(*(
+            provider.generate_video("shared prompt", tmp_path / f"{i}.mp4") for i in range(5)
+        ))
+
+    assert asyncio.run(main()) == [True] * 5
+    assert len(provider.renders) == 1
+
+def test_fresh_takes_never_share(provider, tmp_path):
+    async def main():
+        return await asyncio.gather(*(
+            provider.generate_video("a/b prompt", tmp_path / f"{i}.mp4", fresh=True) for i in range(2)
+        ))
+
+    assert asyncio.run(main()) == [True, True]
+    assert len(provider.renders) == 2
+    assert (tmp_path / "0.mp4").read_bytes() != (tmp_path / "1.mp4").read_bytes()
+
+def test_waiters_reclaim_when_the_other_render_fails(provider, tmp_path):
+    key = clip_store.key("contested prompt", settings.VEO_MODEL, VEO_CONFIG)
+    assert clip_store.claim(key)  # A third worker is rendering it...
+
+    async def main():
+        async def other_worker_fails():
+            await asyncio.sleep(0.05)
+            clip_store.release(key)  # ...and gives up without a clip
+
+        failing = asyncio.create_task(other_worker_fails())
+        results = await asyncio.gather(
+            provider.generate_video("contested prompt", tmp_path / "a.mp4"),
+            provider.another_worker().generate_video("contested prompt", tmp_path / "b.mp4"),
+        )
+        await failing
+        return results
+
+    assert asyncio.run(main()) == [True, True]
+    assert provider.renders == ["contested prompt"]  # One waiter re-claimed and rendered; the other attached
+    assert (tmp_path / "a.mp4").read_bytes() == (tmp_path / "b.mp4").read_bytes()
+    assert not clip_store.claimed(key)
@@ -0,0 +1,15 @@
+"""The cold-start budget of benchmarks/cold_start.py, enforced on every run."""
+import pytest
+from benchmarks.cold_start import DEFERRED, isolated_env, measure_import
+
+IMPORT_BUDGET_SECONDS = 1.5
+
+@pytest.fixture(scope="module")
+def cold_import(tmp_path_factory):
+    return measure_import(isolated_env(tmp_path_factory.mktemp("cold")), runs=3)
+
+def test_import_main_defers_provider_sdks(cold_import):
+    assert cold_import["loaded"] == [], f"`import main` loaded {cold_import['loaded']} (deferred: {DEFERRED})"
+
+def test_import_main_within_budget(cold_import):
+    assert cold_import["median"] < IMPORT_BUDGET_SECONDS
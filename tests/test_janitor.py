@@ -0,0 +1,73 @@
+import os
+import time
+import pytest
+from app.core.config import settings
+from app.services.storage import StorageJanitor, task_dir
+
+HOUR = 3600
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "OUTPUT_DIR", tmp_path / "outputs")
+    monkeypatch.setattr(settings, "TEMP_DIR", tmp_path / "temp")
+    monkeypatch.setattr(settings, "OUTPUT_QUOTA_BYTES", 3000)
+    monkeypatch.setattr(settings, "OUTPUT_MIN_AGE_SECONDS", HOUR)
+    monkeypatch.setattr(settings, "TEMP_TTL_SECONDS", HOUR)
+    settings.OUTPUT_DIR.mkdir()
+    settings.TEMP_DIR.mkdir()
+    return tmp_path
+
+def output(task_id: str, viewed_ago: float, written_ago: float = 2 * HOUR, hls: bool = False) -> list:
+    """A 1000-byte task output (optionally with an HLS ladder), last viewed `viewed_ago` seconds back."""
+    now = time.time()
+    final = task_dir(task_id) / f"{task_id}_final.mp4"
+    final.write_bytes(b"v" * 1000)
+    paths = [final]
+    if hls:
+        ladder = task_dir(task_id) / f"{task_id}_hls"
+        (ladder / "v0").mkdir(parents=True)
+        (ladder / "master.m3u8").write_text("#EXTM3U\n")
+        (ladder / "v0" / "seg_000.ts").write_bytes(b"")
+        paths += [ladder / "master.m3u8", ladder / "v0" / "seg_000.ts", ladder]
+    for path in paths:
+        if path.is_file():
+            os.utime(path, (now - viewed_ago, now - written_ago))
+    return paths
+
+def test_quota_evicts_least_recently_viewed_first(storage):
+    ladder = output("aaaa", viewed_ago=4 * HOUR, hls=True)
+    output("bbbb", viewed_ago=3 * HOUR)
+    output("cccc", viewed_ago=2 * HOUR)
+    output("dddd", viewed_ago=60)
+
+    # 4000 bytes against a 3000-byte quota: evict down to 2700
+    assert StorageJanitor()._enforce_quota() == ["aaaa", "bbbb"]
+    assert not any(path.exists() for path in ladder)  # The whole task, ladder included
+    assert (task_dir("cccc") / "cccc_final.mp4").exists()
+    assert (task_dir("dddd") / "dddd_final.mp4").exists()
+
+def test_recent_outputs_are_never_evicted(storage):
+    output("aaaa", viewed_ago=5 * HOUR, written_ago=60)  # Unviewed but just written
+    output("bbbb", viewed_ago=4 * HOUR)
+    output("cccc", viewed_ago=3 * HOUR)
+    output("dddd", viewed_ago=2 * HOUR)
+
+    assert StorageJanitor()._enforce_quota() == ["bbbb", "cccc"]
+    assert (task_dir("aaaa") / "aaaa_final.mp4").exists()
+
+def test_under_quota_nothing_is_evicted(storage):
+    output("aaaa", viewed_ago=5 * HOUR)
+    output("bbbb", viewed_ago=4 * HOUR)
+    assert StorageJanitor()._enforce_quota() == []
+
+def test_temp_files_past_their_ttl_are_swept(storage):
+    now = time.time()
+    stale, fresh = settings.TEMP_DIR / "stale_raw.mp4", settings.TEMP_DIR / "fresh_raw.mp4"
+    for path, age in ((stale, 2 * HOUR), (fresh, 60)):
+        path.write_bytes(b"x")
+        os.utime(path, (now, now - age))
+    (settings.TEMP_DIR / "subdir").mkdir()
+
+    assert StorageJanitor()._sweep_temp() == 1
+    assert not stale.exists() and fresh.exists()
+    assert (settings.TEMP_DIR / "subdir").exists()
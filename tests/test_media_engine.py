@@ -0,0 +1,61 @@
+import asyncio
+import os
+import pytest
+from app.services.media_engine import MediaEngine, media_engine
+from conftest import run
+
+@pytest.mark.skipif(not hasattr(os, "setpriority"), reason="POSIX only")
+def test_final_encode_is_reniced_after_spawn(monkeypatch):
+    """No preexec_fn (unsafe with threads): the parent lowers the child's priority."""
+    spawned = {}
+    real_exec = asyncio.create_subprocess_exec
+
+    async def spy(*cmd, **kwargs):
+        spawned["kwargs"] = kwargs
+        return await real_exec("sleep", "0.3", **kwargs)
+
+    async def go():
+        real_renice = media_engine._renice
+
+        def check(pid, nice):
+            real_renice(pid, nice)
+            spawned["nice"] = os.getpriority(os.PRIO_PROCESS, pid) - os.getpriority(os.PRIO_PROCESS, 0)
+        monkeypatch.setattr(media_engine, "_renice", check)
+        monkeypatch.setattr(asyncio, "create_subprocess_exec", spy)
+        await media_engine.run(["-version"], job="renice-test", tier="final")
+
+    run(go())
+    assert "preexec_fn" not in spawned["kwargs"]
+    assert spawned["nice"] > 0
+
+def test_previews_share_the_cap_but_never_wait_for_finals(monkeypatch):
+    engine = MediaEngine(max_jobs=4)  # One slot reserved for previews
+    running = {"final": 0, "preview": 0}
+    peak = {"final": 0, "total": 0}
+    real_exec = asyncio.create_subprocess_exec
+
+    async def spawn(*cmd, **kwargs):
+        tier = cmd[-1]
+        running[tier] += 1
+        peak["final"] = max(peak["final"], running["final"])
+        peak["total"] = max(peak["total"], sum(running.values()))
+        return await real_exec("sleep", "0.5" if tier == "final" else "0.05", **kwargs)
+
+    async def job(tier: str, n: int) -> float:
+        started = asyncio.get_running_loop().time()
+        await engine.run([tier], job=f"{tier}{n}", tier=tier)
+        running[tier] -= 1
+        return asyncio.get_running_loop().time() - started
+
+    async def go():
+        finals = [asyncio.create_task(job("final", n)) for n in range(6)]
+        await asyncio.sleep(0.05)  # Finals hold every slot they may take
+        previews = await asyncio.gather(*(job("preview", n) for n in range(2)))
+        await asyncio.gather(*finals)
+        return previews
+
+    monkeypatch.setattr(asyncio, "create_subprocess_exec", spawn)
+    preview_seconds = run(go())
+    assert peak["total"] <= 4  # Never more ffmpeg processes than the cap
+    assert peak["final"] == 3
+    assert max(preview_seconds) < 0.4  # Served by the reserved slot, not after a final
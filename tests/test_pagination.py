@@ -0,0 +1,37 @@
+from datetime import timedelta
+from fastapi.testclient import TestClient
+from app.db.models import Task, utcnow
+from app.db.session import SessionLocal
+import main
+
+def seed(n: int):
+    now = utcnow()
+    with SessionLocal() as db:
+        # Pairs share a timestamp, so the id tie-break is exercised
+        db.add_all(Task(id=f"t{i:03d}", prompt="p", status="COMPLETED", created_at=now - timedelta(seconds=i // 2))
+                   for i in range(n))
+        db.commit()
+
+def test_cursor_walks_every_task_once_newest_first(clean_tasks):
+    seed(45)
+    client = TestClient(main.app)
+    seen, cursor = [], None
+    while True:
+        response = client.get("/api/v1/tasks", params={"limit": 10, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        seen += [t["id"] for t in response.json()]
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    assert len(seen) == 45 and len(set(seen)) == 45
+    assert seen[:4] == ["t001", "t000", "t003", "t002"]
+
+def test_unchanged_page_answers_304(clean_tasks):
+    seed(3)
+    client = TestClient(main.app)
+    first = client.get("/api/v1/tasks")
+    again = client.get("/api/v1/tasks", headers={"If-None-Match": first.headers["etag"]})
+    assert again.status_code == 304
+
+def test_bad_cursor_is_400(clean_tasks):
+    assert TestClient(main.app).get("/api/v1/tasks", params={"cursor": "nope"}).status_code == 400
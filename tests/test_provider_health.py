@@ -0,0 +1,33 @@
+from datetime import timedelta
+from sqlalchemy import delete, select
+from app.db.models import ProviderHealth, utcnow
+from app.db.session import AsyncSessionLocal
+from app.services.provider_health import provider_health
+from conftest import run
+
+def row(process, state, updated_ago, retry_in=None):
+    now = utcnow()
+    return ProviderHealth(
+        provider="elevenlabs", process=process, state=state, failures=5,
+        retry_at=now + timedelta(seconds=retry_in) if retry_in is not None else None,
+        updated_at=now - timedelta(seconds=updated_ago),
+    )
+
+def test_report_prunes_dead_and_stale_processes():
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(ProviderHealth))
+            db.add_all([
+                row("elsewhere:1", "open", updated_ago=3600, retry_in=-3000),   # Long dead, cool-down long over
+                row("elsewhere:2", "open", updated_ago=30, retry_in=30),        # Genuinely open right now
+                row(f"{provider_health.process.rpartition(':')[0]}:999999999", "open", updated_ago=5, retry_in=-1),
+            ])
+            await db.commit()
+            report = await provider_health.report(db)
+            left = (await db.execute(select(ProviderHealth.process))).scalars().all()
+        return report, left
+
+    report, left = run(scenario())
+    assert left == ["elsewhere:2"]
+    assert report["elevenlabs"]["state"] == "open"
+    assert [p["process"] for p in report["elevenlabs"]["processes"]] == ["elsewhere:2"]
@@ -0,0 +1,62 @@
+import asyncio
+import uuid
+from datetime import timedelta
+from sqlalchemy import insert, select, update
+from app.db.models import Task, utcnow
+from app.db.session import AsyncSessionLocal
+from app.services.queue import task_queue
+from conftest import run
+
+async def enqueue(n: int) -> list:
+    ids = [str(uuid.uuid4()) for _ in range(n)]
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(Task), [{"id": i, "prompt": "p", "status": "QUEUED"} for i in ids])
+        await db.commit()
+    return ids
+
+async def row(task_id: str) -> Task:
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(select(Task).where(Task.id == task_id))).scalar_one()
+
+def test_concurrent_claims_lease_each_task_once(clean_tasks):
+    async def scenario():
+        ids = await enqueue(10)
+        claims = await asyncio.gather(*(task_queue.claim(f"worker-{n}") for n in range(25)))
+        return ids, [c for c in claims if c]
+
+    ids, claimed = run(scenario())
+    assert sorted(claimed) == sorted(set(claimed))  # No task leased twice
+    assert set(claimed) <= set(ids)
+
+def test_heartbeat_only_extends_own_lease(clean_tasks):
+    async def scenario():
+        await enqueue(1)
+        task_id = await task_queue.claim("a")
+        return await task_queue.heartbeat(task_id, "a"), await task_queue.heartbeat(task_id, "b")
+
+    assert run(scenario()) == (True, False)
+
+def test_expired_lease_is_reclaimed(clean_tasks):
+    async def scenario():
+        await enqueue(1)
+        task_id = await task_queue.claim("dead")
+        async with AsyncSessionLocal() as db:
+            await db.execute(update(Task).where(Task.id == task_id).values(lease_expires_at=utcnow() - timedelta(seconds=1)))
+            await db.commit()
+        reclaimed = await task_queue.claim("alive")
+        lost = await task_queue.heartbeat(task_id, "dead")
+        return task_id, reclaimed, lost, await row(task_id)
+
+    task_id, reclaimed, lost, task = run(scenario())
+    assert reclaimed == task_id and lost is False
+    assert task.worker_id == "alive" and task.attempts == 2
+
+def test_requeue_does_not_count_an_attempt(clean_tasks):
+    async def scenario():
+        await enqueue(1)
+        task_id = await task_queue.claim("w")
+        await task_queue.requeue(task_id, "w")
+        return await row(task_id)
+
+    task = run(scenario())
+    assert task.status == "QUEUED" and task.attempts == 0 and task.worker_id is None
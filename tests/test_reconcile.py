@@ -0,0 +1,71 @@
+import os
+import threading
+import pytest
+from sqlalchemy import func, select
+from app.core.config import settings
+from app.db.models import Task
+from app.db.session import SessionLocal
+from app.services import reconcile
+from app.services.reconcile import GalleryReconciler, ReconcileStopped
+from app.services.storage import task_dir
+
+@pytest.fixture
+def videos(clean_tasks, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "OUTPUT_DIR", tmp_path / "outputs")
+    monkeypatch.setattr(settings, "RECONCILE_PROBE_WORKERS", 2)
+    settings.OUTPUT_DIR.mkdir()
+    ids = [f"task{i:03d}" for i in range(40)]
+    for task_id in ids:
+        (task_dir(task_id) / f"{task_id}_final.mp4").write_bytes(b"not really a video")
+    return ids
+
+def count_tasks() -> int:
+    with SessionLocal() as db:
+        return db.execute(select(func.count()).select_from(Task)).scalar_one()
+
+def test_restores_missing_rows(videos, tmp_path):
+    summary = GalleryReconciler(tmp_path / "checkpoint.json").run()
+    assert summary["restored"] == len(videos)
+    assert count_tasks() == len(videos)
+
+def test_stop_cancels_probes_and_writes_nothing(videos, tmp_path):
+    stop = threading.Event()
+    stop.set()
+    checkpoint = tmp_path / "checkpoint.json"
+    with pytest.raises(ReconcileStopped):
+        GalleryReconciler(checkpoint).run(stop=stop)
+    assert count_tasks() == 0
+    assert not checkpoint.exists()
+
+def test_video_deleted_after_the_scan_is_skipped(videos, tmp_path, monkeypatch):
+    real_probe = GalleryReconciler._probe
+
+    def probe_after_eviction(self, paths, stop):
+        os.unlink(paths[0])  # The janitor got there first
+        return real_probe(self, paths, stop)
+
+    monkeypatch.setattr(GalleryReconciler, "_probe", probe_after_eviction)
+    summary = GalleryReconciler(tmp_path / "checkpoint.json").run()
+    assert summary["restored"] == len(videos) - 1
+    assert count_tasks() == len(videos) - 1
+
+def test_stop_during_inserts_writes_nothing(videos, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "RECONCILE_BATCH_SIZE", 10)
+    stop, inserts = threading.Event(), []
+    real_probe, real_insert = GalleryReconciler._probe, reconcile.insert
+
+    def probe_then_stop(self, paths, stop):
+        described = real_probe(self, paths, stop)
+        stop.set()  # E.g. the API shuts down right after probing
+        return described
+
+    def counting_insert(table):
+        inserts.append(table)
+        return real_insert(table)
+
+    monkeypatch.setattr(GalleryReconciler, "_probe", probe_then_stop)
+    monkeypatch.setattr(reconcile, "insert", counting_insert)
+    with pytest.raises(ReconcileStopped):
+        GalleryReconciler(tmp_path / "checkpoint.json").run(stop=stop)
+    assert inserts == []
+    assert count_tasks() == 0
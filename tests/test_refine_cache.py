@@ -0,0 +1,52 @@
+from prometheus_client import REGISTRY
+from app.providers.refine_cache import RefineCache
+from conftest import run
+
+def lookups(result: str) -> float:
+    return REGISTRY.get_sample_value("foundry_cache_lookups_total", {"cache": "refine", "result": result}) or 0.0
+
+async def refine_all(cache: RefineCache, pairs) -> int:
+    calls = 0
+
+    async def refine():
+        nonlocal calls
+        calls += 1
+        return "refined"
+
+    for prompt, style in pairs:
+        await cache.get_or_refine(prompt, style, refine)
+    return calls
+
+PAIRS = [("A fox", "cinematic"), ("A fox", "anime"), ("An owl", "anime")]
+
+def test_invalidating_a_prompt_drops_every_style():
+    async def scenario():
+        cache = RefineCache()
+        await cache.invalidate()
+        await refine_all(cache, PAIRS)
+        deleted = await cache.invalidate("  a FOX ")  # Same normalization as the keys
+        return deleted, await refine_all(RefineCache(), PAIRS)  # Fresh memory tier: reads the table
+
+    deleted, calls = run(scenario())
+    assert deleted == 2
+    assert calls == 2  # Both fox styles refined again, the owl still cached
+
+def test_invalidating_one_style_keeps_the_others():
+    async def scenario():
+        cache = RefineCache()
+        await cache.invalidate()
+        await refine_all(cache, PAIRS)
+        deleted = await cache.invalidate("A fox", "anime")
+        return deleted, await refine_all(cache, PAIRS)
+
+    assert run(scenario()) == (1, 1)
+
+def test_lookups_reach_metrics():
+    async def scenario():
+        cache = RefineCache()
+        await cache.invalidate()
+        hits, misses = lookups("hit"), lookups("miss")
+        await refine_all(cache, PAIRS[:1] * 3)
+        return lookups("hit") - hits, lookups("miss") - misses
+
+    assert run(scenario()) == (2, 1)
@@ -0,0 +1,71 @@
+import asyncio
+import pytest
+from app.core.resilience import (
+    CircuitBreaker, CircuitOpenError, ProviderGuard, ProviderHTTPError, RetryPolicy, guard, is_timeout,
+)
+
+def make_guard(threshold=3, attempts=3, retry_timeouts=True, reset=60.0):
+    breaker = CircuitBreaker("test", threshold, reset)
+    return ProviderGuard("test", 0, 1, 4, RetryPolicy(attempts, 0.001, 0.001), breaker, retry_timeouts)
+
+def flaky(errors, result="ok"):
+    calls = []
+
+    async def fn():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    return fn, calls
+
+def test_transient_errors_are_retried():
+    fn, calls = flaky([ProviderHTTPError(503), ProviderHTTPError(429)])
+    assert asyncio.run(make_guard().call(fn)) == "ok"
+    assert len(calls) == 3
+
+def test_client_errors_are_not_retried_and_do_not_trip_the_breaker():
+    g = make_guard(threshold=1)
+    fn, calls = flaky([ProviderHTTPError(400)])
+    with pytest.raises(ProviderHTTPError):
+        asyncio.run(g.call(fn))
+    assert len(calls) == 1 and g.breaker.state == "closed"
+
+def test_hard_failure_opens_at_once_then_short_circuits():
+    g = make_guard(threshold=5)
+    fn, calls = flaky([ProviderHTTPError(402)])
+    with pytest.raises(ProviderHTTPError):
+        asyncio.run(g.call(fn))
+    assert g.breaker.state == "open" and not g.available
+    with pytest.raises(CircuitOpenError):
+        asyncio.run(g.call(fn))
+    assert len(calls) == 1
+
+def test_half_open_trial_closes_or_reopens():
+    g = make_guard(threshold=1, attempts=1, reset=0.0)
+    fn, _ = flaky([ProviderHTTPError(500), ProviderHTTPError(500)])
+    for _ in range(2):
+        with pytest.raises(ProviderHTTPError):
+            asyncio.run(g.call(fn))
+        assert g.breaker.state == "open"  # Failed trial re-opens
+    assert asyncio.run(g.call(fn)) == "ok"
+    assert g.breaker.state == "closed"
+
+def test_only_one_half_open_trial_at_a_time():
+    breaker = CircuitBreaker("test", 1, 0.0)
+    breaker.failure(RuntimeError("down"))
+    assert breaker.allow() is True
+    assert breaker.state == "half_open"
+    assert breaker.allow() is False
+
+def test_timeouts_are_not_retried_for_providers_with_a_fallback():
+    fn, calls = flaky([asyncio.TimeoutError()])
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(make_guard(retry_timeouts=False).call(fn))
+    assert len(calls) == 1
+    assert guard("elevenlabs").retry_timeouts is False
+    assert guard("genai").retry_timeouts is True
+
+def test_is_timeout():
+    assert is_timeout(asyncio.TimeoutError()) and is_timeout(ProviderHTTPError(408))
+    assert not is_timeout(ProviderHTTPError(503))
@@ -0,0 +1,58 @@
+import asyncio
+import pytest
+from app.core.singleflight import SingleFlight
+
+def test_concurrent_callers_share_one_call():
+    async def scenario():
+        flight, calls = SingleFlight(), 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return "clip"
+
+        results = await asyncio.gather(*(flight.do("key", work) for _ in range(50)))
+        return calls, results, "key" in flight
+
+    calls, results, still_inflight = asyncio.run(scenario())
+    assert calls == 1
+    assert results == ["clip"] * 50
+    assert not still_inflight
+
+def test_failure_reaches_every_waiter_and_is_not_cached():
+    async def scenario():
+        flight, calls = SingleFlight(), 0
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            raise RuntimeError("provider down")
+
+        results = await asyncio.gather(*(flight.do("key", work) for _ in range(5)), return_exceptions=True)
+        with pytest.raises(RuntimeError):
+            await flight.do("key", work)  # Next call runs again
+        return calls, results
+
+    calls, results = asyncio.run(scenario())
+    assert calls == 2
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+def test_cancelling_one_waiter_keeps_the_shared_work():
+    async def scenario():
+        flight = SingleFlight()
+        done = asyncio.Event()
+
+        async def work():
+            await asyncio.sleep(0.02)
+            done.set()
+            return 1
+
+        first = asyncio.create_task(flight.do("key", work))
+        second = asyncio.create_task(flight.do("key", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second, done.is_set(), first.cancelled()
+
+    assert asyncio.run(scenario()) == (1, True, True)
@@ -0,0 +1,62 @@
+import shutil
+import subprocess
+import pytest
+from app.services.media_engine import MediaEngine, probe_file
+from conftest import run
+
+pytestmark = pytest.mark.skipif(
+    not (shutil.which("ffmpeg") and shutil.which("ffprobe")), reason="needs ffmpeg and ffprobe",
+)
+
+def ffmpeg(*args):
+    subprocess.run(["ffmpeg", "-v", "error", "-y", *args], check=True)
+
+@pytest.fixture
+def clip(tmp_path):
+    """2s H.264 clip. crf=40 is tagged in x264's SEI, so a stream copy keeps it and a re-encode doesn't."""
+    def make(pix_fmt: str = "yuv420p"):
+        path = tmp_path / f"clip_{pix_fmt}.mp4"
+        ffmpeg("-f", "lavfi", "-i", "testsrc=size=160x120:rate=24:duration=2",
+               "-c:v", "libx264", "-crf", "40", "-pix_fmt", pix_fmt, str(path))
+        return path
+    return make
+
+@pytest.fixture
+def speech(tmp_path):
+    """5.5s mp3: the clip has to loop three times and lose half a second."""
+    path = tmp_path / "speech.mp3"
+    ffmpeg("-f", "lavfi", "-i", "sine=frequency=440:duration=5.5", "-c:a", "libmp3lame", str(path))
+    return path
+
+def stitch(video, audio, output, monkeypatch):
+    engine, calls = MediaEngine(max_jobs=1), []
+    real_run = engine.run
+
+    async def spy(args, job, **kwargs):
+        calls.append(args)
+        return await real_run(args, job, **kwargs)
+
+    monkeypatch.setattr(engine, "run", spy)
+    run(engine.stitch_av(video, audio, output))
+    return calls
+
+def test_copyable_clip_is_looped_by_stream_copy(clip, speech, tmp_path, monkeypatch):
+    output = tmp_path / "final.mp4"
+    (args,) = stitch(clip(), speech, output, monkeypatch)
+
+    assert args[:2] == ["-f", "concat"]
+    assert args[args.index("-c:v") + 1] == "copy"
+    info = probe_file(output)
+    assert info.video_codec == "h264" and info.audio_codec == "aac"
+    assert info.duration == pytest.approx(5.5, abs=0.15)
+    assert b"crf=40.0" in output.read_bytes()  # The source bitstream, not a new encode
+
+def test_other_clips_are_re_encoded(clip, speech, tmp_path, monkeypatch):
+    output = tmp_path / "final.mp4"
+    (args,) = stitch(clip("yuv444p"), speech, output, monkeypatch)
+
+    assert "-stream_loop" in args and "libx264" in args
+    info = probe_file(output)
+    assert info.video_codec == "h264" and info.pix_fmt == "yuv420p"
+    assert info.duration == pytest.approx(5.5, abs=0.15)
+    assert b"crf=40.0" not in output.read_bytes()
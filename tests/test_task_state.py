@@ -0,0 +1,49 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.db.models import Task
+from app.db.session import SessionLocal
+from app.services.reconcile import GalleryReconciler
+from app.services.storage import janitor
+from app.services.task_state import FileBackend, MemoryBackend, TaskStateRegistry, task_states
+from conftest import run
+import main
+
+@pytest.mark.parametrize("backend, embedded, expected", [
+    ("auto", 0, FileBackend),    # Jobs run in python -m app.worker: the API must see their writes
+    ("auto", 2, MemoryBackend),  # Jobs run in the API process itself
+    ("memory", 0, MemoryBackend),
+])
+def test_backend_follows_worker_topology(monkeypatch, backend, embedded, expected):
+    monkeypatch.setattr(settings, "TASK_STATE_BACKEND", backend)
+    monkeypatch.setattr(settings, "EMBEDDED_WORKER_CONCURRENCY", embedded)
+    assert isinstance(TaskStateRegistry().backend, expected)
+
+@pytest.fixture
+def finished(clean_tasks, tmp_path):
+    """A completed task whose state is cached, as after the worker finished it."""
+    task = Task(id="done", prompt="p", status="COMPLETED", stage="COMPLETED", progress=100.0,
+                final_output=str(tmp_path / "gone_final.mp4"))
+    task_states.put(task)
+    with SessionLocal() as db:
+        db.add(task)
+        db.commit()
+    yield "done"
+    task_states.discard("done")
+
+def poll(task_id: str) -> dict:
+    return TestClient(main.app).get(f"/api/v1/tasks/{task_id}").json()
+
+def test_janitor_eviction_drops_cached_state(finished):
+    assert poll(finished)["final_output"]
+    run(janitor._mark_expired([finished]))
+    assert task_states.get(finished) is None
+    body = poll(finished)
+    assert body["expired"] and body["final_output"] is None
+    assert task_states.get(finished) is None  # Expired rows aren't re-cached
+
+def test_reconcile_expiry_drops_cached_state(finished, tmp_path):
+    summary = GalleryReconciler(tmp_path / "checkpoint.json").run()
+    assert summary["expired"] == 1
+    assert task_states.get(finished) is None
+    assert poll(finished)["final_output"] is None
@@ -0,0 +1,62 @@
+import random
+import shutil
+import subprocess
+import pytest
+from app.providers.audio import split_script
+from app.services.media_engine import MediaEngine, probe_file
+from conftest import run
+
+WORDS = "the fox owl river light shadow city night morning engine quiet storm".split()
+
+def script(sentences: int, seed: int = 1) -> list:
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 20))).capitalize() + rng.choice(".!?")
+        for _ in range(sentences)
+    ]
+
+def test_short_scripts_come_back_untouched():
+    text = "  One line,   with odd spacing.  "
+    assert split_script(text, 800) == [text]
+
+def test_chunks_respect_the_bound_and_rejoin_to_the_script():
+    text = " ".join(script(200))
+    chunks = split_script(text, 300)
+    assert len(chunks) > 1
+    assert all(len(c) <= 300 for c in chunks)
+    assert " ".join(chunks) == text
+
+def test_run_on_sentences_and_unpunctuated_text_are_wrapped_at_words():
+    run_on = " ".join(WORDS * 40)  # ~2400 chars, no sentence end anywhere
+    for text in (run_on, "Short start. " + run_on + ". Short end."):
+        chunks = split_script(text, 200)
+        assert all(len(c) <= 200 for c in chunks)
+        assert " ".join(chunks) == text
+
+def test_a_word_longer_than_the_bound_is_split():
+    chunks = split_script("x" * 500 + " tail.", 200)
+    assert all(len(c) <= 200 for c in chunks)
+    assert "".join(chunks).replace(" ", "") == "x" * 500 + "tail."
+
+def test_editing_one_sentence_keeps_the_other_boundaries():
+    sentences = script(300)
+    before = split_script(" ".join(sentences), 400)
+    sentences[150] = "An entirely different line goes here!"
+    after = split_script(" ".join(sentences), 400)
+
+    changed = set(after) - set(before)
+    assert 1 <= len(changed) <= 2  # The edited chunk, and at most the one it spills into
+    assert len(set(before) & set(after)) >= len(before) - 3
+
+@pytest.mark.skipif(not (shutil.which("ffmpeg") and shutil.which("ffprobe")), reason="needs ffmpeg and ffprobe")
+def test_concat_audio_joins_parts_end_to_end(tmp_path):
+    parts = []
+    for n, seconds in enumerate((1.0, 2.0, 1.5)):
+        part = tmp_path / f"part{n}.mp3"
+        subprocess.run(["ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", f"sine=duration={seconds}",
+                        "-c:a", "libmp3lame", str(part)], check=True)
+        parts.append(part)
+
+    output = tmp_path / "joined.mp3"
+    run(MediaEngine(max_jobs=1).concat_audio(parts, output))
+    assert probe_file(output).duration == pytest.approx(4.5, abs=0.15)
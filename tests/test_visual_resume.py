@@ -0,0 +1,74 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from app.core.resilience import ProviderHTTPError
+from app.providers import visual
+from app.providers.visual import VisualProvider
+
+class FakeGateway:
+    def __init__(self):
+        self.started = 0
+
+    def resume_video(self, name):
+        return SimpleNamespace(name=name)
+
+    async def start_video(self, model, prompt):
+        self.started += 1
+        return SimpleNamespace(name=f"new-{self.started}")
+
+    async def save_video(self, video, path):
+        path.write_bytes(b"clip")
+
+def done(videos=True):
+    return SimpleNamespace(done=True, result=SimpleNamespace(generated_videos=[SimpleNamespace(video=object())] if videos else []))
+
+@pytest.fixture
+def provider(monkeypatch):
+    p = VisualProvider()
+    p.gateway = FakeGateway()
+    return p
+
+def render(provider, monkeypatch, tmp_path, wait, resume="op-1"):
+    recorded = []
+
+    async def on_started(name):
+        recorded.append(name)
+
+    async def fake_wait(op, resumed=False, deadline=None):
+        return await wait(op, resumed)
+
+    monkeypatch.setattr(visual.veo_poller, "wait", fake_wait)
+    ok = asyncio.run(provider._render("prompt", tmp_path / "raw.mp4", resume, on_started))
+    return ok, recorded
+
+def test_poll_errors_keep_the_operation_for_the_next_attempt(provider, monkeypatch, tmp_path):
+    async def wait(op, resumed):
+        raise RuntimeError("status calls keep failing")
+
+    ok, recorded = render(provider, monkeypatch, tmp_path, wait)
+    assert not ok
+    assert recorded == []  # Nothing cleared, nothing new started
+    assert provider.gateway.started == 0
+
+def test_new_render_poll_errors_keep_its_name(provider, monkeypatch, tmp_path):
+    async def wait(op, resumed):
+        raise asyncio.TimeoutError()
+
+    ok, recorded = render(provider, monkeypatch, tmp_path, wait, resume=None)
+    assert not ok and recorded == ["new-1"]
+
+def test_missing_operation_starts_a_new_render(provider, monkeypatch, tmp_path):
+    async def wait(op, resumed):
+        if resumed:
+            raise ProviderHTTPError(404, "operation not found")
+        return done()
+
+    ok, recorded = render(provider, monkeypatch, tmp_path, wait)
+    assert ok and recorded == ["new-1"]
+
+def test_finished_without_video_clears_the_name(provider, monkeypatch, tmp_path):
+    async def wait(op, resumed):
+        return done(videos=False)
+
+    ok, recorded = render(provider, monkeypatch, tmp_path, wait, resume=None)
+    assert not ok and recorded == ["new-1", None]